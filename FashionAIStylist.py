@@ -1,15 +1,37 @@
 # app.py — Fashion AI Stylist (panel mode + profile expander + schema-fix + matching chips)
-import os, re, json, hashlib
+import os, time
+_T0 = time.perf_counter()   # scriptstart: basis voor first_paint_ms
 import streamlit as st
 import streamlit.components.v1 as components
-from urllib.parse import urlparse, quote
-from html import escape as html_escape
-from textwrap import dedent
-from openai import OpenAI
+
+from stylist.advice import (MODEL, LLM_TIMEOUT, DEFAULT_MODE, ADVICE_MODES, DEFAULT_PROFILE,
+                            _product_name, _profile_tags, _profile_hash, get_advice, local_first_advice, trace_hit)
+from stylist.cache import DEFAULT_CACHE_URL, CompactAdviceStore, cache_key, open_cache
+from stylist.canon import REPORT as CANON_REPORT, canonicalize_url
+from stylist.batch import unique_links, iter_advice_batch
+from stylist.assets import APP_CSS, PANEL_SCRIPT, HEADER_HTML, HEADER_HEIGHT, HERO_HEIGHT, hero_html
+from stylist.cards import DRESS_SVG, esc, _single_card_html, _matching_links_html, _combined_links_html
+from stylist.profiles import KEY_STATS, bucket_profile, _hash
+from stylist.prefetch import Prefetcher
+from stylist.trace import enable_trace
+from stylist.llmclient import LazyClient
+from stylist.metrics import begin_request, end_request, enable_request_log, record_advice, register_gauges, serve_metrics, timed
 
 # ========= Instellingen =========
 APP_URL = "https://fashion-ai-stylis-ifidobqmkgjtn7gjxgrudb.streamlit.app"  # optioneel
-MODEL   = "gpt-4o-mini"
+ADVICE_CACHE_URL = os.getenv("ADVICE_CACHE_URL", DEFAULT_CACHE_URL)  # sqlite:///…, memory://, of eigen backend
+ADVICE_STORE_MB = float(os.getenv("ADVICE_STORE_MB", "32"))              # bytegrens van de in-proces L1-store
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", LLM_TIMEOUT))             # sec latency-budget incl. retries
+ADVICE_MODE = os.getenv("ADVICE_MODE", DEFAULT_MODE)                    # llm | local | hybrid (regels eerst, dan LLM)
+if ADVICE_MODE not in ADVICE_MODES: ADVICE_MODE = DEFAULT_MODE
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))                     # >0: Prometheus-tekst op :PORT/metrics
+SIMILAR_INDEX_PATH = os.getenv("SIMILAR_INDEX_PATH", "")                 # .npz met keyword-vectoren (leeg: standaardpad)
+SIMILAR_THRESHOLD = os.getenv("SIMILAR_THRESHOLD", "")                   # cosine; 0 = geen hergebruik (leeg: standaard)
+PREFETCH = os.getenv("PREFETCH", "1") == "1"                              # advies vooruit ophalen na profielwijziging
+RECENT_LINKS = 5                                                         # per sessie onthouden voor prefetch
+REQUEST_LOG = os.getenv("STYLIST_REQUEST_LOG", "") == "1"               # JSON-logregel per run op stderr
+TRACE_PATH = os.getenv("STYLIST_TRACE", "")                              # JSONL-trace per adviesverzoek (stylist.replay)
+TRACE_SAMPLE = float(os.getenv("STYLIST_TRACE_SAMPLE", "1"))             # fractie van de verzoeken in de trace
 # =================================
 
 # --- API key ---
@@ -17,7 +39,7 @@ API_KEY = os.getenv("OPENAI_API_KEY") or st.secrets.get("OPENAI_API_KEY")
 if not API_KEY:
     st.error("Geen OpenAI API-sleutel gevonden. Zet OPENAI_API_KEY in Secrets.")
     st.stop()
-client = OpenAI(api_key=API_KEY)
+client = LazyClient(API_KEY)   # openai pas importeren bij de eerste LLM-call; één client + verbindingspool per proces
 
 # ---------- Query params ----------
 qp = st.query_params
@@ -25,341 +47,144 @@ def _get(name, default=""):
     v = qp.get(name, default)
     return (v[0] if isinstance(v, list) and v else v) or default
 
-link_qs = _get("u").strip()
+links_qs = [u.strip() for u in qp.get_all("u") if u.strip()]   # herhaalde u= : hele winkelmand
+link_qs = links_qs[0] if links_qs else ""
 auto    = str(_get("auto","0")) == "1"
 panel   = str(_get("panel","0")) == "1"
+stream  = str(_get("stream", "1" if panel else "0")) == "1"   # streaming standaard aan in panel modus
+debug   = str(_get("debug","0")) == "1"                          # toon CPU-tijd en HTML-bytes per (fragment-)run
 
 # ---------- Pagina ----------
 st.set_page_config(page_title="Fashion AI Stylist", page_icon="👗", layout="centered", initial_sidebar_state="collapsed")
 
+# ---------- Per-run meting ----------
+# Bij een fragment-rerun draait alleen de fragment-functie; zo is het verschil met een volledige run meetbaar.
+def _perf_begin(scope: str, w0: float = None):
+    st.session_state["_perf"] = {"scope": scope, "bytes": 0, "t0": time.thread_time(), "done": False,
+                                 "w0": w0 or time.perf_counter(), "paint_ms": None,
+                                 "req": begin_request(scope, panel=panel, stream=stream)}
+
+def _perf_bytes(n: int):
+    perf = st.session_state.get("_perf")
+    if perf is None: return
+    perf["bytes"] += n
+    if perf["paint_ms"] is None:   # eerste element naar de browser (server-kant)
+        perf["paint_ms"] = (time.perf_counter() - perf["w0"]) * 1000
+
+def _perf_end(scope: str):
+    perf = st.session_state.get("_perf")
+    if perf is None or perf["scope"] != scope or perf["done"]:
+        return
+    perf["done"] = True
+    perf["cpu_ms"] = (time.thread_time() - perf["t0"]) * 1000
+    paint = round(perf["paint_ms"] or 0.0, 2)
+    end_request(perf["req"], cpu_ms=round(perf["cpu_ms"], 2), html_bytes=perf["bytes"], first_paint_ms=paint)
+    if debug:
+        st.caption(f"{scope}-run: {perf['cpu_ms']:.1f} ms CPU, {perf['bytes']/1024:.1f} KB HTML, eerste paint {paint:.1f} ms")
+
+def _push(html: str, target=None):
+    _perf_bytes(len(html.encode("utf-8")))
+    (target or st).markdown(html, unsafe_allow_html=True)
+
+def _push_component(html: str, **kw):
+    _perf_bytes(len(html.encode("utf-8")))
+    components.html(html, **kw)
+
+_perf_begin("app", _T0)
+
 # ---------- CSS ----------
-st.markdown(dedent("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700;800&display=swap');
-
-html, body, [data-testid="stAppViewContainer"]{
-  height:100%;
-  font-family:"Inter", system-ui, -apple-system, Segoe UI, Roboto, Helvetica, Arial, sans-serif;
-}
-[data-testid="stHeader"]{ display:none; }
-footer { visibility:hidden; }
-
-[data-testid="stAppViewContainer"]{
-  background: radial-gradient(1200px 600px at 50% -120px, #C8B9FF 0%, #AA98FF 30%, #8F7DFF 60%, #7A66F7 100%);
-}
-.block-container{
-  max-width: 860px;
-  padding-top: 12px !important;
-  padding-bottom: 80px !important;
-}
-
-/* ===== Cards ===== */
-.card{
-  background:#ffffff; border-radius: 22px; padding: 22px;
-  box-shadow: 0 16px 40px rgba(23,0,75,0.18);
-  border: 1px solid #EFEBFF; margin-top: 16px;
-}
-.card-title{
-  font-size: 26px; font-weight: 800; color:#1f2358; margin:0 0 12px;
-  display:flex; gap:12px; align-items:center; letter-spacing:-.01em;
-}
-.card-sub{ color:#2b2b46; }
-.section-h{ font-weight:800; margin:14px 0 6px; color:#1f2358; }
-ul{ margin: 0 0 0 1.15rem; padding:0; line-height:1.6; }
-li{ margin: 6px 0; }
-
-/* Chips */
-.matching .btnrow{ display:flex; flex-wrap:wrap; gap:10px; margin-top:8px; }
-.matching .chip{
-  display:inline-flex; align-items:center; gap:8px;
-  padding:8px 12px; border-radius:10px;
-  background:#F3F4FF; border:1px solid #E3E6FF; text-decoration:none;
-  font-weight:700; color:#1f2a5a; font-size:14px; line-height:1.25;
-}
-.matching .chip svg{ width:16px; height:16px; }
-.matching .note{ color:#6B7280; font-size:13px; margin-top:10px; }
-
-/* Profile tag chips */
-.tagsrow{ display:flex; flex-wrap:wrap; gap:8px; margin: 6px 0 2px; }
-.tag{
-  background:#F7F7FF; border:1px solid #E8E9FF; color:#1f2a5a;
-  padding:6px 10px; border-radius:10px; font-weight:700; font-size:13px;
-}
-
-/* ===== Compacte header voor panel modus ===== */
-body[data-panel="1"] .compact-header{
-  background:#ffffffcc; border:1px solid #EFEBFF; border-radius:12px;
-  display:flex; align-items:center; gap:10px;
-  padding:10px 12px; margin:6px 0 6px;
-  box-shadow:0 10px 26px rgba(23,0,75,.18); backdrop-filter: blur(4px);
-}
-body[data-panel="1"] .compact-header .title{
-  font-weight:800; font-size:18px; color:#1f2358; letter-spacing:-.01em; margin:0;
-}
-body[data-panel="1"] .compact-header .icon{
-  width:22px; height:22px; display:inline-block;
-}
-
-/* ===== Popup/Panel-modus typografie ===== */
-body[data-panel="1"] .block-container{ max-width: 560px; padding-top: 6px !important; padding-bottom: 24px !important; }
-body[data-panel="1"] .card{ padding: 14px !important; border-radius: 16px !important; }
-body[data-panel="1"] .card-title{ font-size: 20px !important; margin-bottom: 6px !important; }
-body[data-panel="1"] .section-h{ font-size: 15px !important; margin:10px 0 4px !important; }
-body[data-panel="1"] ul li{ font-size: 14px !important; line-height: 1.35 !important; margin: 3px 0 !important; }
-
-/* ===== Expander (persoonlijke voorkeuren) in kaartstijl ===== */
-[data-testid="stExpander"]{
-  border: 1px solid #EFEBFF; border-radius: 22px; background:#fff;
-  box-shadow: 0 16px 40px rgba(23,0,75,0.18); margin-top: 10px;
-}
-[data-testid="stExpander"] [data-testid="stExpanderToggleIcon"] svg{ color:#6F5BFF; }
-[data-testid="stExpander"] .streamlit-expanderHeader p{
-  font-size: 20px; font-weight: 800; color:#1f2358; margin: 6px 0;
-}
-</style>
-"""), unsafe_allow_html=True)
+_push(APP_CSS)
 
 # body attribuut zodat CSS panel-modus kan herkennen
 if panel:
-    st.markdown("<script>document.body.setAttribute('data-panel','1');</script>", unsafe_allow_html=True)
-
-# ---------- Icons ----------
-DRESS_SVG = """<svg viewBox="0 0 24 24" fill="#556BFF" width="22" height="22" xmlns="http://www.w3.org/2000/svg"><path d="M8 3l1.5 3-2 3 2 11h5l2-11-2-3L16 3h-2l-1 2-1-2H8z"/></svg>"""
+    _push(PANEL_SCRIPT)
 
 # ---------- Helpers ----------
-def esc(x) -> str: return html_escape("" if x is None else str(x))
-def as_list(v): return v if isinstance(v, list) else ([] if v is None else [v])
-
-def _keywords_from_url(u: str):
-    try:
-        slug = urlparse(u).path.rstrip("/").split("/")[-1]
-        slug = re.sub(r"\d+", " ", slug)
-        words = [w for w in re.split(r"[-_]+", slug) if w and len(w) > 1]
-        return " ".join(words[:8]) or "fashion"
-    except Exception:
-        return "fashion"
-
-def _product_name(u: str):
-    kw = _keywords_from_url(u)
-    return re.sub(r"\s+", " ", kw).strip().title()
-
-def _host(u: str) -> str:
-    p = urlparse(u); return f"{p.scheme}://{p.netloc}"
-
-def _shop_searches(u: str, query: str, limit=1):
-    host = _host(u); q = quote(query)
-    patterns = [f"/search?q={q}", f"/zoeken?query={q}", f"/s?searchTerm={q}",
-                f"/search?text={q}", f"/catalogsearch/result/?q={q}"]
-    seen, out = set(), []
-    for path in patterns:
-        full = host + path
-        if full not in seen: out.append(full); seen.add(full)
-        if len(out) >= limit: break
-    return out
-
-def _google_fallback(u: str, query: str):
-    p = urlparse(u); host = p.netloc
-    q = quote(f"site:{host} {query}")
-    return f"https://www.google.com/search?q={q}"
-
-def _build_link_or_fallback(u: str, query: str):
-    found = _shop_searches(u, query, limit=1)
-    return found[0] if found else _google_fallback(u, query)
-
-# veilige normalisatie
-def _normalize_query_piece(p: str) -> str:
-    if not isinstance(p, str):
-        p = str(p or "")
-    p = re.sub(r"[^\w\s-]+", "", p, flags=re.UNICODE)
-    p = re.sub(r"\s+", " ", p).strip()
-    return p
-
-_SEP_RE = re.compile(r"\b(?:of|en|,|/|\+|&)\b", re.IGNORECASE)
-def _query_from_bullet(text: str):
-    s = str(text or "")
-    parts = _SEP_RE.split(s)
-    out = []
-    for p in parts:
-        p = _normalize_query_piece(p)
-        if len(p) >= 3:
-            out.append(p)
-    return out[:2]
-
-def _queries_from_combine(bullets, max_links=4):
-    seen, out = set(), []
-    for b in as_list(bullets):
-        for q in _query_from_bullet(b):
-            qn = q.lower()
-            if qn not in seen:
-                out.append(q); seen.add(qn)
-            if len(out) >= max_links:
-                return out
-    return out
-
-# ---------- Profiel helpers ----------
-DEFAULT_PROFILE = {
-    "doelgroep": "",
-    "maat_boven": "",
-    "maat_beneden": "",
-    "lengte_cm": "",
-    "bouw": "",
-    "fit": "",
-    "huidtint": "",
-    "kleuren": "",
-    "stijl": "",
-    "gelegenheid": "",
-    "comfort": "",
-    "notities": ""
-}
-
-def _profile_summary(profile: dict) -> str:
-    p = {**DEFAULT_PROFILE, **(profile or {})}
-    fields = []
-    def add(lbl, key):
-        v = (p.get(key) or "").strip()
-        if v: fields.append(f"{lbl}: {v}")
-    add("Doelgroep", "doelgroep")
-    add("Maat boven", "maat_boven")
-    add("Maat beneden", "maat_beneden")
-    add("Lengte (cm)", "lengte_cm")
-    add("Bouw", "bouw")
-    add("Voorkeursfit", "fit")
-    add("Huidtint", "huidtint")
-    add("Kleuren", "kleuren")
-    add("Stijl", "stijl")
-    add("Gelegenheid", "gelegenheid")
-    add("Comfort", "comfort")
-    add("Notities", "notities")
-    return "; ".join(fields)
-
-def _profile_tags(profile: dict):
-    p = {**DEFAULT_PROFILE, **(profile or {})}
-    tags = []
-    for key in ["doelgroep","fit","bouw","stijl","gelegenheid","huidtint"]:
-        v = (p.get(key) or "").strip()
-        if v: tags.append(v)
-    if (p.get("maat_boven") or "").strip():
-        tags.append(f"Boven: {p['maat_boven'].strip()}")
-    if (p.get("maat_beneden") or "").strip():
-        tags.append(f"Beneden: {p['maat_beneden'].strip()}")
-    if (p.get("kleuren") or "").strip():
-        k = p["kleuren"].split(",")[0].strip()
-        if k: tags.append(f"Kleur: {k}")
-    return tags
-
-def _profile_hash(profile: dict) -> str:
-    txt = _profile_summary(profile)
-    return hashlib.sha256(txt.encode("utf-8")).hexdigest()[:16]
-
-# ---------- Schema & failsafe ----------
-SCHEMA_HINT = {
-  "headline": "max 8 woorden samenvatting",
-  "personal_advice": {
-    "for_you": ["exact 3 bullets met persoonlijk advies"],
-    "avoid":   ["exact 2 bullets met wat te vermijden"],
-    "colors":  ["exact 2 bullets met passende kleuren"],
-    "combine": ["exact 2 bullets met combinaties (generieke items)"]
-  }
-}
-
-def _ensure_schema(data: dict, product_name: str, keywords: str) -> dict:
-    data = data or {}
-    data.setdefault("headline", product_name or "Snel advies")
-    pers = data.setdefault("personal_advice", {})
-
-    def _coerce_list(value, want_n: int, fallback: list) -> list:
-        if isinstance(value, list):
-            lst = [str(x).strip() for x in value if str(x).strip()]
-        elif isinstance(value, str) and value.strip():
-            lst = [value.strip()]
-        else:
-            lst = []
-        if len(lst) < want_n:
-            lst += fallback[: (want_n - len(lst))]
-        return lst[:want_n]
-
-    kw = (keywords or "").split()[:2] or ["casual", "basic"]
-    defaults = {
-        "for_you": [
-            f"Kies {kw[0]} pasvorm voor comfort",
-            "Houd lijnen rustig en tijdloos",
-            "Stem kleur af op je huidtint",
-        ],
-        "avoid": [
-            "Vermijd te strakke of formele items",
-            "Vermijd felle, schreeuwerige prints",
-        ],
-        "colors": [
-            "Neutraal: ecru, navy",
-            "Accent: olijf of bordeaux",
-        ],
-        "combine": [
-            "Jeans of chino",
-            "Basic t-shirt of hoodie",
-        ],
-    }
-
-    pers["for_you"] = _coerce_list(pers.get("for_you"), 3, defaults["for_you"])
-    pers["avoid"]   = _coerce_list(pers.get("avoid"),   2, defaults["avoid"])
-    pers["colors"]  = _coerce_list(pers.get("colors"),  2, defaults["colors"])
-    pers["combine"] = _coerce_list(pers.get("combine"), 2, defaults["combine"])
+# ---------- LLM call (cached: compacte L1 + persistente cache) ----------
+@st.cache_resource(show_spinner=False)
+def _advice_cache():
+    return open_cache(ADVICE_CACHE_URL)
+
+@st.cache_resource(show_spinner=False)
+def _similar_index():
+    # numpy pas bij het eerste advies importeren, niet bij de koude start van een lege pagina
+    from stylist.similar import DEFAULT_INDEX_PATH, DEFAULT_THRESHOLD, SimilarityIndex
+    threshold = float(SIMILAR_THRESHOLD or DEFAULT_THRESHOLD)
+    return SimilarityIndex(SIMILAR_INDEX_PATH or DEFAULT_INDEX_PATH, threshold=threshold) if threshold > 0 else None
+
+@st.cache_resource(show_spinner=False)
+def _advice_store():
+    # L1 vóór de persistente cache: compacte records onder een harde bytegrens (i.p.v. st.cache_data)
+    store = CompactAdviceStore(ttl=3600, max_bytes=int(ADVICE_STORE_MB * 1024 * 1024))
+    register_gauges("stylist_l1", lambda: store.stats().as_dict())
+    return store
+
+def _l1_advice(link: str, profile: dict, **kw) -> dict:
+    # L1-key op het gebuckete profiel (_profile_hash bucket zelf); get_advice krijgt het ruwe profiel,
+    # anders meet KEY_STATS ruw == gebucket en blijft stylist_profile_keys_reduction 0
+    t0 = time.perf_counter()
+    store, key = _advice_store(), cache_key(canonicalize_url(link), _profile_hash(profile))
+    data = store.get(key)
+    if data is not None:
+        KEY_STATS.observe(_hash(profile or {}), _hash(bucket_profile(profile)))
+        meta = {"cache": "l1", "fallback": False}
+        record_advice(meta, ADVICE_MODE)
+        trace_hit(link, profile, meta, ADVICE_MODE, t0)
+        return data
+    meta = {}
+    data = get_advice(client, link, profile, cache=_advice_cache(), model=MODEL, meta=meta, timeout=LLM_TIMEOUT, mode=ADVICE_MODE,
+                      similar=_similar_index(), **kw)
+    if not meta["fallback"]:   # een fallback blijft buiten L1, zodat de volgende run het opnieuw probeert
+        store.set(key, data)
     return data
 
-# ---------- LLM call (cached + strict schema + profile) ----------
-@st.cache_data(ttl=3600, show_spinner=False)
 def get_advice_json(link: str, profile: dict) -> dict:
-    product_name = _product_name(link)
-    keywords     = _keywords_from_url(link)
-    prof_summary = _profile_summary(profile)
-    prof_hash    = _profile_hash(profile)
-
-    system_msg = (
-        "Je bent een modieuze maar praktische personal stylist. "
-        "Schrijf in helder Nederlands (B1), kort en concreet. "
-        "Wees eerlijk over onzekerheid en speculeer niet. "
-        "Respecteer het schema en beperk je tot zekere, generieke adviezen."
-    )
-
-    profile_note = (
-        f"\nPersoonlijke voorkeuren (kort): {prof_summary}\n" if prof_summary else "\n"
-    )
-
-    user_msg = f"""
-Analyseer dit product uitsluitend op basis van de URL-naam/keywords.
-URL: {link}
-Vermoedelijke productnaam: {product_name}
-Keywords: {keywords}
-{profile_note}
-OPDRACHT:
-- Houd expliciet rekening met relevante persoonlijke voorkeuren (fit/bouw/kleuren/gelegenheid), voor zover van toepassing.
-- Geef ALLEEN JSON met exact deze velden (geen extra velden):
-{json.dumps(SCHEMA_HINT, ensure_ascii=False)}
-
-Schrijfregels:
-- Alleen stijl-advies dat je ZEKER kunt geven zonder productdetails te raden.
-- Max 8–10 woorden per bullet, geen emoji of merknamen.
-- Maak elk punt praktisch (comfort, pasvorm, kleur, combineren).
-- Als kleuren/fit in profiel staan: laat die voorkeur terugkomen.
-"""
-
-    try:
-        resp = client.chat.completions.create(
-            model=MODEL,
-            response_format={"type":"json_object"},
-            messages=[{"role":"system","content":system_msg},
-                      {"role":"user","content":user_msg}],
-            temperature=0.3, max_tokens=450,
-        )
-        raw = json.loads(resp.choices[0].message.content)
-        data = _ensure_schema(raw, product_name, keywords)
-        data["_cache_key"] = prof_hash
-        return data
-    except Exception:
-        data = _ensure_schema({}, product_name, keywords)
-        data["_cache_key"] = prof_hash
-        return data
+    return _l1_advice(link, profile)
+
+def get_advice_streaming(link: str, profile: dict, on_update) -> dict:
+    # een L1-hit rendert meteen volledig; alleen een misser streamt
+    return _l1_advice(link, profile, on_update=on_update)
+
+# ---------- Speculatief vooruit ophalen ----------
+@st.cache_resource(show_spinner=False)
+def _prefetcher():
+    # één begrensde worker-pool per proces, gedeeld door alle sessies
+    return Prefetcher() if PREFETCH else None
+
+def _remember_links(links: list):
+    recent = [l for l in st.session_state.get("recent_links", []) if l not in links]
+    st.session_state.recent_links = (list(links) + recent)[:RECENT_LINKS]
+
+def _prefetch_recent(profile: dict, skip: list):
+    # na opslaan/wissen van het profiel: recente links (nieuwste eerst) alvast met het nieuwe profiel ophalen;
+    # wat in deze run al gerenderd wordt haalt de voorgrond zelf op
+    pf = _prefetcher()
+    links = [l for l in st.session_state.get("recent_links", []) if l not in skip]
+    if pf is not None and links:
+        pf.prefetch(client, links, profile, _advice_cache(), model=MODEL, mode=ADVICE_MODE,
+                    timeout=LLM_TIMEOUT, similar=_similar_index())
+
+# ---------- Metrics ----------
+@st.cache_resource(show_spinner=False)
+def _metrics_server():
+    # één scrape-endpoint per proces, niet per sessie
+    return serve_metrics(METRICS_PORT, host="0.0.0.0", cache=_advice_cache(), similar=_similar_index()) if METRICS_PORT else None
+
+_metrics_server()
+if REQUEST_LOG:
+    enable_request_log()
+if TRACE_PATH:
+    enable_trace(TRACE_PATH, TRACE_SAMPLE)
 
 # ---------- UI: Persoonlijke voorkeuren ----------
+def _clear_profile():
+    # als on_click: draait vóór de widgets bestaan, alleen dan mogen de form_-keys gereset worden
+    st.session_state.profile = DEFAULT_PROFILE.copy()
+    for k in list(st.session_state.keys()):
+        if k.startswith("form_"):
+            st.session_state[k] = ""
+
+@timed()
 def render_profile_expander():
     st.markdown("")  # kleine spacer
     with st.expander("Vertel iets over jezelf (persoonlijke voorkeuren)"):
@@ -414,150 +239,130 @@ def render_profile_expander():
 
             b1, b2 = st.columns([1,1])
             save  = b1.form_submit_button("Opslaan")
-            clear = b2.form_submit_button("Wissen")
+            clear = b2.form_submit_button("Wissen", on_click=_clear_profile)
 
             if save:
                 st.session_state.profile = {k: (v or "").strip() for k, v in p.items()}
                 st.success("Voorkeuren opgeslagen.")
 
             if clear:
-                # reset state
-                st.session_state.profile = DEFAULT_PROFILE.copy()
-                # reset alle form velden
-                for k in list(st.session_state.keys()):
-                    if k.startswith("form_"):
-                        st.session_state[k] = ""
                 st.info("Voorkeuren gewist.")
-                st.rerun()   # forceer rerun zodat velden ook visueel leeg worden
 
         # tags laten zien
         tags = _profile_tags(st.session_state.profile)
         if tags:
-            st.markdown(
-                '<div class="tagsrow">' + "".join([f'<span class="tag">{esc(t)}</span>' for t in tags]) + '</div>',
-                unsafe_allow_html=True
-            )
+            _push('<div class="tagsrow">' + "".join([f'<span class="tag">{esc(t)}</span>' for t in tags]) + '</div>')
+        return save or clear
 
 # ---------- RENDER UI ----------
 def render_compact_header():
-    st.markdown(
+    _push(
         '<div class="card"><div class="card-title">'
         f'{DRESS_SVG} Fashion AI Stylist'
-        '</div></div>', unsafe_allow_html=True
+        '</div></div>'
     )
 
-def render_single_card(data: dict, link: str, profile: dict):
-    headline = esc(data.get("headline","Advies"))
-    pers = data.get("personal_advice", {})
-    for_you = as_list(pers.get("for_you"))[:3]
-    avoid   = as_list(pers.get("avoid"))[:2]
-    colors  = as_list(pers.get("colors"))[:2]
-    combine = as_list(pers.get("combine"))[:2]
-    tags = _profile_tags(profile)
-
-    tags_html = ""
-    if tags:
-        tags_html = '<div class="tagsrow">' + "".join([f'<span class="tag">{esc(t)}</span>' for t in tags]) + '</div>'
-
-    html = (
-        '<div class="card">'
-        f'<div class="card-title">{DRESS_SVG} {headline}</div>'
-        '<div class="card-sub">'
-        f'{tags_html}'
-        '<div class="section-h">• Specifiek advies voor jou</div>'
-        f'<ul>{"".join([f"<li>{esc(x)}</li>" for x in for_you])}</ul>'
-        '<div class="section-h">• Kleur & combineren</div>'
-        f'<ul>{"".join([f"<li>{esc(x)}</li>" for x in colors+combine])}</ul>'
-        '<div class="section-h">• Liever vermijden</div>'
-        f'<ul>{"".join([f"<li>{esc(x)}</li>" for x in avoid])}</ul>'
-        '</div>'
-        '</div>'
-    )
-    st.markdown(html, unsafe_allow_html=True)
-
-def render_matching_links_card(data: dict, link: str):
-    pers = data.get("personal_advice", {})
-    queries = _queries_from_combine(as_list(pers.get("combine")), max_links=4)
-
-    LINK_SVG = """<svg viewBox="0 0 24 24" xmlns="http://www.w3.org/2000/svg">
-<path d="M10 14l-1 1a4 4 0 105.7 5.7l2.6-2.6a4 4 0 00-5.7-5.7l-.6.6" stroke="#6F5BFF" stroke-width="2" stroke-linecap="round" fill="none"/>
-<path d="M14 10l1-1a4 4 0 10-5.7-5.7L6.7 5.9a4 4 0 105.7 5.7l.6-.6" stroke="#6F5BFF" stroke-width="2" stroke-linecap="round" fill="none"/>
-</svg>"""
-
-    if not queries:
-        return
+@timed()
+def render_single_card(data: dict, link: str, profile: dict, target=None):
+    _push(_single_card_html(data, profile), target=target)
+
+def _merge_partial(partial: dict, base: dict, link: str) -> dict:
+    # gestreamde secties vervangen de lokale eerste paint sectie voor sectie
+    if base is None:
+        partial.setdefault("headline", _product_name(link))
+        return partial
+    pers = {k: v for k, v in (partial.get("personal_advice") or {}).items() if v}
+    return {"headline": partial.get("headline") or base["headline"],
+            "personal_advice": {**base["personal_advice"], **pers}}
+
+@timed()
+def render_advice_card(link: str, profile: dict) -> dict:
+    key_link = CANON_REPORT.canonicalize(link)
+    if ADVICE_MODE == "local":
+        data = local_first_advice(key_link, profile)
+        render_single_card(data, link, profile)
+        return data
 
-    chips_html = []
-    for q in queries:
-        url = _build_link_or_fallback(link, q)
-        chips_html.append(f'<a class="chip" href="{url}" target="_blank" rel="nofollow noopener">{LINK_SVG} Zoek: {esc(q)}</a>')
-
-    html = (
-        '<div class="card matching">'
-        f'<div class="card-title">{DRESS_SVG} Bijpassende kleding (op deze shop)</div>'
-        '<div class="card-sub">'
-        f'<div class="btnrow">{"".join(chips_html)}</div>'
-        '<div class="note">We zoeken eerst binnen deze shop; lukt dat niet, dan via Google.</div>'
-        '</div>'
-        '</div>'
-    )
-    st.markdown(html, unsafe_allow_html=True)
+    slot = st.empty()
+    first = local_first_advice(key_link, profile) if ADVICE_MODE == "hybrid" else None
+    if first is not None:
+        render_single_card(first, link, profile, target=slot)   # eerste paint zonder netwerk
+    if stream:
+        def on_update(partial: dict):
+            render_single_card(_merge_partial(partial, first, link), link, profile, target=slot)
+        data = get_advice_streaming(key_link, profile, on_update)
+    else:
+        data = get_advice_json(key_link, profile)
+    render_single_card(data, link, profile, target=slot)
+    return data
 
+@timed()
+def render_matching_links_card(data: dict, link: str):
+    html = _matching_links_html(data, link)
+    if html:
+        _push(html)
+
+@timed()
+def render_batch_cards(links: list, profile: dict) -> list:
+    # één kaart per product; cache-hits meteen, misses parallel en per stuk zodra ze binnen zijn
+    items = unique_links(links)
+    slots = [st.empty() for _ in items]
+    if ADVICE_MODE == "hybrid":
+        for slot, (link, key_link) in zip(slots, items):
+            render_single_card(local_first_advice(key_link, profile), link, profile, target=slot)
+    datas = [None] * len(items)
+    for i, data, _ in iter_advice_batch(client, [k for _, k in items], profile, cache=_advice_cache(),
+                                        model=MODEL, mode=ADVICE_MODE, timeout=LLM_TIMEOUT, similar=_similar_index()):
+        datas[i] = data
+        render_single_card(data, items[i][0], profile, target=slots[i])
+    return [(link, data) for (link, _), data in zip(items, datas)]
+
+@timed()
+def render_combined_links_card(items: list):
+    html = _combined_links_html(items)
+    if html:
+        _push(html)
+
+@timed()
 def render_hero(link_prefill: str = ""):
-    components.html(f"""
-<!doctype html><html><head><meta charset="utf-8"/>
-<style>
-  body{{margin:0;font-family:Inter,system-ui}}
-  .hero{{background:#fff;border:1px solid #EFEBFF;border-radius:22px;box-shadow:0 16px 40px rgba(23,0,75,.18);padding:22px;margin-top:8px;}}
-  .hero-title{{font:800 34px/1.2 Inter,system-ui;color:#1f2358;letter-spacing:-.02em;margin:0 0 14px}}
-  .row{{display:flex;gap:12px;align-items:center}}
-  .inp{{flex:1;background:#fff;border:1px solid #E3E6FF;border-radius:14px;height:52px;padding:0 14px;font:500 16px Inter,system-ui;outline:none}}
-  .btn{{border:0;border-radius:14px;padding:14px 20px;font:800 16px Inter,system-ui;cursor:pointer;color:#fff;background:linear-gradient(180deg,#8C72FF 0%,#6F5BFF 100%);box-shadow:0 12px 28px rgba(23,0,75,.35)}}
-</style>
-<div class="hero">
-  <div class="hero-title">Plak een productlink en krijg direct stijl-advies</div>
-  <div class="row">
-    <input id="hero-url" class="inp" type="text" placeholder="https://…" value="{html_escape(link_prefill)}"/>
-    <button class="btn" onclick="
-      const v=document.getElementById('hero-url').value.trim();
-      if(v && /^https?:\\/\\//i.test(v)){{
-        const u=new URL(window.parent.location.href);
-        u.searchParams.set('auto','1'); u.searchParams.set('u',v);
-        window.parent.location=u.toString();
-      }} else {{ alert('Plak eerst een geldige URL'); }}
-    ">Advies ophalen</button>
-  </div>
-</div>
-</html>
-""", height=140, scrolling=False)
+    _push_component(hero_html(link_prefill), height=HERO_HEIGHT, scrolling=False)
+
+# ---------- Fragment: profiel + advies ----------
+# Opslaan/wissen van het profiel rerunt alleen dit fragment: geen CSS, header- of hero-iframe opnieuw.
+@st.fragment
+def render_advice_section(links: list):
+    perf = st.session_state.get("_perf")
+    if perf is None or perf["done"]:
+        _perf_begin("fragment")
+    changed = render_profile_expander()
+    profile = st.session_state.get("profile", DEFAULT_PROFILE)
+    if changed:
+        _prefetch_recent(profile, skip=links)
+    if len(links) > 1:
+        render_combined_links_card(render_batch_cards(links, profile))
+    elif links:
+        data = render_advice_card(links[0], profile)
+        render_matching_links_card(data, links[0])
+    if links:
+        _remember_links(links)
+    _perf_end("fragment")
 
 # ======================= MAIN FLOW =======================
 
 if panel and link_qs and auto:
     # render_compact_header()  # optioneel
-    render_profile_expander()
-    data = get_advice_json(link_qs, st.session_state.get("profile", DEFAULT_PROFILE))
-    render_single_card(data, link_qs, st.session_state.get("profile", DEFAULT_PROFILE))
-    render_matching_links_card(data, link_qs)
+    render_advice_section(links_qs)
 
 else:
-    components.html("""
-    <div style="display:flex;align-items:center;gap:14px;margin:10px 0 8px;color:#fff;">
-      <svg width="40" height="40" viewBox="0 0 24 24" fill="#fff" xmlns="http://www.w3.org/2000/svg"><path d="M8 3l1.5 3-2 3 2 11h5l2-11-2-3L16 3h-2l-1 2-1-2H8z"/></svg>
-      <h1 style="font:800 44px/1 'Inter',system-ui;letter-spacing:-.02em;margin:0;">Fashion AI Stylist</h1>
-    </div>
-    """, height=70)
-
-    render_profile_expander()
+    _push_component(HEADER_HTML, height=HEADER_HEIGHT)
 
     if "last_link" not in st.session_state:
         st.session_state.last_link = ""
-    prefill = link_qs if (auto and link_qs) else st.session_state.last_link
-    render_hero(prefill)
-
-    active_link = link_qs if (auto and link_qs) else st.session_state.last_link
-    if active_link:
-        st.session_state.last_link = active_link
-        data = get_advice_json(active_link, st.session_state.get("profile", DEFAULT_PROFILE))
-        render_single_card(data, active_link, st.session_state.get("profile", DEFAULT_PROFILE))
-        render_matching_links_card(data, active_link)
+    active_links = links_qs if (auto and links_qs) else [l for l in [st.session_state.last_link] if l]
+    render_hero(" ".join(active_links))   # boven het fragment: blijft staan bij profiel-reruns
+
+    if active_links:
+        st.session_state.last_link = active_links[0]
+    render_advice_section(active_links)
+
+_perf_end("app")
@@ -1,4 +1,4 @@
-const APP_URL = "https://fashion-ai-stylis-ifidobqmkgjtn7gjxgrudb.streamlit.app";
+importScripts("config.js");
 
 async function openInStylist(tab) {
   if (!tab || !tab.url) return;
@@ -6,8 +6,6 @@ async function openInStylist(tab) {
   chrome.tabs.create({ url: target });
 }
 
-chrome.action.onClicked.addListener(openInStylist);
-
 chrome.runtime.onInstalled.addListener(() => {
   chrome.contextMenus.create({
     id: "open-stylist",
@@ -19,3 +17,28 @@ chrome.runtime.onInstalled.addListener(() => {
 chrome.contextMenus.onClicked.addListener((info, tab) => {
   if (info.menuItemId === "open-stylist") openInStylist(tab);
 });
+
+// ---------- Prefetch-ping ----------
+// Alleen na opt-in, alleen op shops uit PREFETCH_HOSTS en alleen URL's die op een productpagina lijken;
+// elke URL maar één keer per sessie van de service worker.
+const pinged = new Set();
+const PRODUCT_RE = /\/[^/?#]*\d[^/?#]*\.html?(?:[?#]|$)|\/[^/?#]+-[^/?#]+-[^/?#]+(?:[/?#]|$)|\/p\/|\/product/i;
+let prefetchOn = PREFETCH_DEFAULT;
+
+chrome.storage.local.get({ prefetch: PREFETCH_DEFAULT }).then((s) => { prefetchOn = s.prefetch === true; });
+chrome.storage.onChanged.addListener((changes, area) => {
+  if (area === "local" && changes.prefetch) prefetchOn = changes.prefetch.newValue === true;
+});
+
+chrome.tabs.onUpdated.addListener((tabId, change, tab) => {
+  if (!prefetchOn || change.status !== "complete") return;
+  const url = tab.url || "";
+  if (!/^https:\/\//i.test(url) || !isShopUrl(url) || !PRODUCT_RE.test(url) || pinged.has(url)) return;
+  if (pinged.size > 500) pinged.clear();
+  pinged.add(url);
+  loadProfile().then((profile) => fetch(`${API_URL}/prefetch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ urls: [url], profile })
+  })).catch(() => {});   // API niet actief: stil negeren
+});
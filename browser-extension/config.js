@@ -0,0 +1,25 @@
+// Gedeelde instellingen voor popup en service worker.
+// API_URL = `python -m stylist.api`; pas ook host_permissions in manifest.json aan bij een andere host.
+const APP_URL = "https://fashion-ai-stylis-ifidobqmkgjtn7gjxgrudb.streamlit.app";
+const API_URL = "http://localhost:8765";
+// Prefetch-pings (POST /prefetch): advies klaarzetten vóór de popup opent. Opt-in: staat uit tot de
+// gebruiker het in de popup aanzet (chrome.storage.local "prefetch"); elke ping kan een LLM-call kosten.
+const PREFETCH_DEFAULT = false;
+// Alleen deze shops (en hun subdomeinen) worden ooit gepingd; gelijk houden met stylist/shop_search.json.
+const PREFETCH_HOSTS = ["zalando.nl", "zalando.be", "hm.com", "asos.com", "bol.com", "wehkamp.nl",
+                        "zara.com", "debijenkorf.nl", "nike.com"];
+
+// Profiel uit de popup (chrome.storage.local "profile"); gaat mee met /advice en /prefetch, zodat de
+// cache-key gelijk is aan die van het latere popup-verzoek.
+const PROFILE_FIELDS = ["doelgroep", "fit", "stijl", "maat_boven", "maat_beneden", "lengte_cm", "kleuren"];
+
+async function loadProfile() {
+  const s = await chrome.storage.local.get({ profile: {} });
+  return s.profile || {};
+}
+
+function isShopUrl(url) {
+  let host;
+  try { host = new URL(url).hostname.toLowerCase(); } catch (e) { return false; }
+  return PREFETCH_HOSTS.some((h) => host === h || host.endsWith("." + h));
+}
@@ -0,0 +1,79 @@
+function el(tag, attrs, text) {
+  const n = document.createElement(tag);
+  Object.assign(n, attrs || {});
+  if (text != null) n.textContent = text;
+  return n;
+}
+
+function section(parent, title, items) {
+  if (!items || !items.length) return;
+  parent.appendChild(el("div", { className: "section-h" }, "• " + title));
+  const ul = el("ul");
+  items.forEach((x) => ul.appendChild(el("li", null, x)));
+  parent.appendChild(ul);
+}
+
+function render(data) {
+  const box = document.getElementById("advice");
+  const pers = data.personal_advice || {};
+  box.replaceChildren(el("div", { className: "title" }, data.headline || "Advies"));
+  section(box, "Specifiek advies voor jou", pers.for_you);
+  section(box, "Kleur & combineren", [...(pers.colors || []), ...(pers.combine || [])]);
+  section(box, "Liever vermijden", pers.avoid);
+
+  const links = document.getElementById("links");
+  if (!data.links || !data.links.length) return;
+  const row = el("div", { className: "btnrow" });
+  data.links.forEach((l) => row.appendChild(el("a", { className: "chip", href: l.url, target: "_blank", rel: "nofollow noopener" }, "Zoek: " + l.query)));
+  links.replaceChildren(el("div", { className: "title" }, "Bijpassende kleding"), row);
+  links.hidden = false;
+}
+
+async function activeTab() {
+  const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
+  return tab;
+}
+
+document.getElementById("open-app").addEventListener("click", async () => {
+  const tab = await activeTab();
+  if (!tab || !tab.url) return;
+  chrome.tabs.create({ url: `${APP_URL}?u=${encodeURIComponent(tab.url)}&auto=1` });
+});
+
+const prefetchBox = document.getElementById("prefetch");
+chrome.storage.local.get({ prefetch: PREFETCH_DEFAULT }).then((s) => { prefetchBox.checked = s.prefetch === true; });
+prefetchBox.addEventListener("change", () => chrome.storage.local.set({ prefetch: prefetchBox.checked }));
+
+const profileForm = document.getElementById("profile");
+loadProfile().then((p) => {
+  PROFILE_FIELDS.forEach((k) => { profileForm.elements[k].value = p[k] || ""; });
+  if (!Object.values(p).some(Boolean)) document.getElementById("profile-card").open = true;
+});
+profileForm.addEventListener("submit", async (ev) => {
+  ev.preventDefault();
+  const p = {};
+  PROFILE_FIELDS.forEach((k) => { const v = profileForm.elements[k].value.trim(); if (v) p[k] = v; });
+  await chrome.storage.local.set({ profile: p });
+  document.getElementById("profile-card").open = false;
+  loadAdvice();
+});
+
+async function loadAdvice() {
+  const box = document.getElementById("advice");
+  const tab = await activeTab();
+  if (!tab || !/^https?:\/\//i.test(tab.url || "")) {
+    box.replaceChildren(el("div", { className: "muted" }, "Open eerst een productpagina."));
+    return;
+  }
+  box.replaceChildren(el("div", { className: "muted" }, "Advies ophalen…"));
+  try {
+    const profile = JSON.stringify(await loadProfile());
+    const resp = await fetch(`${API_URL}/advice?u=${encodeURIComponent(tab.url)}&profile=${encodeURIComponent(profile)}`);
+    if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+    render(await resp.json());
+  } catch (e) {
+    box.replaceChildren(el("div", { className: "muted" }, "Advies-API niet bereikbaar (" + e.message + ")."));
+  }
+}
+
+loadAdvice();
@@ -0,0 +1 @@
+# stylist — advies-pipeline van Fashion AI Stylist, los van de Streamlit UI
@@ -0,0 +1,320 @@
+# stylist/advice.py — advies-pipeline zonder Streamlit (keywords, profiel, schema, LLM-call, cache)
+import re, time, hashlib
+from urllib.parse import urlparse
+
+from .cache import cache_key
+from .canon import canonicalize_url
+from .singleflight import FLIGHT
+from .streaming import stream_json
+from .repair import parse_advice
+from .prompt import prompt_tokens, render as render_prompt
+from .resilience import Overloaded, call_with_retry
+from .gate import GATE, PRIORITY_INTERACTIVE
+from .local import local_advice
+from .metrics import annotate, capture, timer, record_usage, record_advice
+from .profiles import KEY_STATS, bucket_profile, _hash
+from . import trace
+
+MODEL = "gpt-4o-mini"
+MAX_TOKENS = 450
+LLM_TIMEOUT  = 20.0   # sec totaal latency-budget per upstream-call, inclusief retries
+FALLBACK_TTL = 60     # sec dat een fallback-antwoord in de cache mag staan (echte antwoorden: cache-ttl)
+FLIGHT_GRACE = 5.0    # sec die meelifters langer wachten dan het latency-budget
+ADVICE_MODES = ("llm", "local", "hybrid")
+DEFAULT_MODE = "hybrid"
+
+# ---------- URL helpers ----------
+def _keywords_from_url(u: str):
+    try:
+        slug = urlparse(u).path.rstrip("/").split("/")[-1]
+        slug = re.sub(r"\d+", " ", slug)
+        words = [w for w in re.split(r"[-_]+", slug) if w and len(w) > 1]
+        return " ".join(words[:8]) or "fashion"
+    except Exception:
+        return "fashion"
+
+def _product_name(u: str):
+    kw = _keywords_from_url(u)
+    return re.sub(r"\s+", " ", kw).strip().title()
+
+# ---------- Profiel helpers ----------
+DEFAULT_PROFILE = {
+    "doelgroep": "",
+    "maat_boven": "",
+    "maat_beneden": "",
+    "lengte_cm": "",
+    "bouw": "",
+    "fit": "",
+    "huidtint": "",
+    "kleuren": "",
+    "stijl": "",
+    "gelegenheid": "",
+    "comfort": "",
+    "notities": ""
+}
+
+def _profile_summary(profile: dict) -> str:
+    p = {**DEFAULT_PROFILE, **(profile or {})}
+    fields = []
+    def add(lbl, key):
+        v = (p.get(key) or "").strip()
+        if v: fields.append(f"{lbl}: {v}")
+    add("Doelgroep", "doelgroep")
+    add("Maat boven", "maat_boven")
+    add("Maat beneden", "maat_beneden")
+    add("Lengte (cm)", "lengte_cm")
+    add("Bouw", "bouw")
+    add("Voorkeursfit", "fit")
+    add("Huidtint", "huidtint")
+    add("Kleuren", "kleuren")
+    add("Stijl", "stijl")
+    add("Gelegenheid", "gelegenheid")
+    add("Comfort", "comfort")
+    add("Notities", "notities")
+    return "; ".join(fields)
+
+def _profile_tags(profile: dict):
+    p = {**DEFAULT_PROFILE, **(profile or {})}
+    tags = []
+    for key in ["doelgroep","fit","bouw","stijl","gelegenheid","huidtint"]:
+        v = (p.get(key) or "").strip()
+        if v: tags.append(v)
+    if (p.get("maat_boven") or "").strip():
+        tags.append(f"Boven: {p['maat_boven'].strip()}")
+    if (p.get("maat_beneden") or "").strip():
+        tags.append(f"Beneden: {p['maat_beneden'].strip()}")
+    if (p.get("kleuren") or "").strip():
+        k = p["kleuren"].split(",")[0].strip()
+        if k: tags.append(f"Kleur: {k}")
+    return tags
+
+def _profile_hash(profile: dict) -> str:
+    # key op het gebuckete profiel (stylist.profiles): 181 en 182 cm delen een cache-entry
+    txt = _profile_summary(bucket_profile(profile))
+    return hashlib.sha256(txt.encode("utf-8")).hexdigest()[:16]
+
+# ---------- Schema & failsafe ----------
+def _ensure_schema(data: dict, product_name: str, keywords: str) -> dict:
+    data = data or {}
+    data.setdefault("headline", product_name or "Snel advies")
+    pers = data.setdefault("personal_advice", {})
+
+    def _coerce_list(value, want_n: int, fallback: list) -> list:
+        if isinstance(value, list):
+            lst = [str(x).strip() for x in value if str(x).strip()]
+        elif isinstance(value, str) and value.strip():
+            lst = [value.strip()]
+        else:
+            lst = []
+        if len(lst) < want_n:
+            lst += fallback[: (want_n - len(lst))]
+        return lst[:want_n]
+
+    kw = (keywords or "").split()[:2] or ["casual", "basic"]
+    defaults = {
+        "for_you": [
+            f"Kies {kw[0]} pasvorm voor comfort",
+            "Houd lijnen rustig en tijdloos",
+            "Stem kleur af op je huidtint",
+        ],
+        "avoid": [
+            "Vermijd te strakke of formele items",
+            "Vermijd felle, schreeuwerige prints",
+        ],
+        "colors": [
+            "Neutraal: ecru, navy",
+            "Accent: olijf of bordeaux",
+        ],
+        "combine": [
+            "Jeans of chino",
+            "Basic t-shirt of hoodie",
+        ],
+    }
+
+    pers["for_you"] = _coerce_list(pers.get("for_you"), 3, defaults["for_you"])
+    pers["avoid"]   = _coerce_list(pers.get("avoid"),   2, defaults["avoid"])
+    pers["colors"]  = _coerce_list(pers.get("colors"),  2, defaults["colors"])
+    pers["combine"] = _coerce_list(pers.get("combine"), 2, defaults["combine"])
+    return data
+
+# ---------- Prompt ----------
+def build_messages(link: str, profile: dict) -> list:
+    # vaste system-prefix + compacte user-staart (stylist.prompt)
+    with timer("keywords"):
+        keywords = _keywords_from_url(link)
+    return render_prompt(link, keywords, profile)
+
+def estimate_tokens(messages: list) -> int:
+    # lokale schatting van de input + antwoordbudget; voor rate-limits/budgetten
+    return prompt_tokens(messages) + MAX_TOKENS
+
+# ---------- LLM call ----------
+def _usage_dict(usage) -> dict:
+    return {"prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0}
+
+def fetch_advice(client, link: str, profile: dict, model: str = MODEL, on_update=None, meta=None,
+                 timeout: float = LLM_TIMEOUT, priority: int = PRIORITY_INTERACTIVE, gate=GATE) -> dict:
+    # raise bij fouten; de aanroeper kiest de fallback.
+    # on_update(partial_dict) -> streaming: partiële JSON zodra er een nieuwe waarde binnen is
+    # meta (dict, optioneel) krijgt "usage" met de token-telling van de API en "parse" = clean/repaired/fallback
+    # timeout = totaal latency-budget inclusief retries (client hoort max_retries=0 te hebben)
+    # gate: proces-brede rate-limit/prioriteitswachtrij per poging; Overloaded -> aanroeper kiest fallback
+    t0 = time.perf_counter()
+    meta = {} if meta is None else meta
+    with timer("prompt_build"):
+        messages = build_messages(link, profile)
+    kw = {"stream": True, "stream_options": {"include_usage": True}} if on_update is not None else {}
+    emitted = []
+    est = estimate_tokens(messages)
+    meta["prompt_tokens_est"] = est - MAX_TOKENS
+    annotate(prompt_tokens_est=meta["prompt_tokens_est"])
+
+    def _on_update(partial):
+        emitted.append(1)
+        on_update(partial)
+
+    def attempt(left):
+        # elke poging neemt zijn eigen plek in de gate en verrekent die ook zelf (settle per acquire)
+        if gate is not None:
+            with timer("queue_wait"):
+                left -= gate.acquire(est, priority=priority, timeout=left)
+            if left <= 0:
+                # wachtrij at het budget op: lokaal probleem, geen upstream-timeout (telt niet voor de breaker)
+                gate.release(est)
+                raise Overloaded("latency-budget op in de LLM-wachtrij")
+        meta.pop("usage", None)
+        resp = client.chat.completions.create(
+            model=model,
+            response_format={"type":"json_object"},
+            messages=messages,
+            temperature=0.3, max_tokens=MAX_TOKENS, timeout=left, **kw,
+        )
+        if on_update is not None:
+            text = stream_json(resp, _on_update, t0=t0, meta=meta)
+        else:
+            if getattr(resp, "usage", None) is not None:
+                meta["usage"] = _usage_dict(resp.usage)
+            text = resp.choices[0].message.content
+        if gate is not None:
+            gate.settle(est, sum((meta.get("usage") or {}).values()))
+        return text
+
+    # na de eerste gestreamde bullet niet opnieuw beginnen: de kaart zou terugspringen
+    with timer("llm_call"):
+        text = call_with_retry(attempt, timeout, retry_if=lambda e: not emitted)
+    record_usage(model, meta.get("usage"))
+    with timer("parse"):
+        data = parse_advice(text, meta)   # repareert fences/trailing commas/afgekapte JSON; anders ValueError
+    with timer("schema"):
+        return _ensure_schema(data, _product_name(link), _keywords_from_url(link))
+
+def fallback_advice(link: str) -> dict:
+    return _ensure_schema({}, _product_name(link), _keywords_from_url(link))
+
+def local_first_advice(link: str, profile: dict) -> dict:
+    # regel-gebaseerd, microseconden, geen netwerk
+    product_name, keywords = _product_name(link), _keywords_from_url(link)
+    p = {**DEFAULT_PROFILE, **(profile or {})}
+    data = _ensure_schema(local_advice(keywords, p), product_name, keywords)
+    data["_source"] = "local"
+    return data
+
+def _fallback_for(link: str, profile: dict, prof_hash: str, mode: str) -> dict:
+    data = fallback_advice(link) if mode == "llm" else local_first_advice(link, profile)
+    data["_cache_key"] = prof_hash
+    data["_fallback"] = True
+    return data
+
+def get_advice(client, link: str, profile: dict, cache=None, model: str = MODEL,
+               flight=FLIGHT, wait_timeout: float = None, on_update=None, meta=None,
+               timeout: float = LLM_TIMEOUT, mode: str = DEFAULT_MODE, similar=None,
+               priority: int = PRIORITY_INTERACTIVE) -> dict:
+    # meta (dict, optioneel) krijgt: cache = hit/miss/joined/timeout/local/similar, fallback, error, usage
+    # mode: "llm" (alleen LLM, generieke fallback), "local" (alleen regels), "hybrid" (LLM, regels als fallback)
+    # similar (stylist.similar.SimilarityIndex, optioneel): bij een miss advies van een bijna-identiek product
+    # priority: plek in de LLM-wachtrij (stylist.gate); bij overbelasting volgt de fallback, niet gecachet
+    meta = {} if meta is None else meta
+    raw, profile = profile, bucket_profile(profile)   # ook de prompt krijgt alleen wat in de key zit
+    KEY_STATS.observe(_hash(raw or {}), _hash(profile))
+    tracer = trace.TRACER
+    if tracer is None or not tracer.sampled():
+        with timer("advice"):
+            data = _get_advice(client, link, profile, cache, model, flight, wait_timeout, on_update, meta, timeout, mode, similar, priority)
+    else:
+        with capture() as rec, timer("advice"):
+            data = _get_advice(client, link, profile, cache, model, flight, wait_timeout, on_update, meta, timeout, mode, similar, priority)
+        tracer.write(canonicalize_url(link), _profile_hash(profile), meta, rec, mode, priority)
+    record_advice(meta, mode)
+    return data
+
+def trace_hit(link: str, profile: dict, meta: dict, mode: str, t0: float, priority: int = PRIORITY_INTERACTIVE):
+    # cache-hits die get_advice niet passeren (app-L1, batch) ook in de trace; anders mist replay de heetste paden
+    tracer = trace.TRACER
+    if tracer is not None and tracer.sampled():
+        rec = {"dur_ms": (time.perf_counter() - t0) * 1000, "stages": {}}
+        tracer.write(canonicalize_url(link), _profile_hash(profile), meta, rec, mode, priority)
+
+def _get_advice(client, link, profile, cache, model, flight, wait_timeout, on_update, meta, timeout, mode, similar, priority) -> dict:
+    meta["fallback"] = False
+    link = canonicalize_url(link)   # idempotent; ook keywords/productnaam komen uit de canonieke vorm
+    prof_hash = _profile_hash(profile)
+    if mode == "local":
+        meta["cache"] = "local"
+        data = local_first_advice(link, profile)
+        data["_cache_key"] = prof_hash
+        return data
+    key = cache_key(link, prof_hash)
+    if cache is not None:
+        with timer("cache_get"):
+            hit = cache.get(key)
+        if hit is not None:
+            meta["cache"], meta["fallback"] = "hit", bool(hit.get("_fallback"))
+            return hit
+    if similar is not None:
+        with timer("similar_lookup"):
+            found = similar.lookup(link, _keywords_from_url(link), prof_hash, cache, cache_key)
+        if found is not None:
+            data, score, other = found
+            meta["cache"], meta["similar_to"], meta["similarity"] = "similar", other, round(score, 3)
+            # advies van de buur, maar de kop hoort bij dít product
+            return {**data, "headline": _product_name(link)}
+
+    def compute():
+        if cache is not None:
+            # vorige leader kan net opgeslagen hebben tussen onze miss en het starten van de flight
+            hit = cache.get(key)
+            if hit is not None:
+                meta["cache"], meta["fallback"] = "hit", bool(hit.get("_fallback"))
+                return hit
+        meta["cache"] = "miss"
+        try:
+            data = fetch_advice(client, link, profile, model=model, on_update=on_update, meta=meta, timeout=timeout,
+                                priority=priority)
+        except Exception as e:
+            # fallback kort cachen: beschermt upstream tijdens storingen, zonder een uur boilerplate.
+            # Overloaded niet: dan is upstream niet eens gevraagd en kan de volgende poging gewoon slagen.
+            meta["fallback"], meta["error"] = True, f"{type(e).__name__}: {e}"
+            meta["shed"] = isinstance(e, Overloaded)
+            data = _fallback_for(link, profile, prof_hash, mode)
+            if cache is not None and not meta["shed"]:
+                cache.set(key, data, ttl=FALLBACK_TTL)
+            return data
+        data["_cache_key"] = prof_hash
+        if cache is not None:
+            cache.set(key, data)
+            if similar is not None:
+                similar.add(link, prof_hash, _keywords_from_url(link))
+        return data
+
+    def on_timeout():
+        meta["cache"], meta["fallback"] = "timeout", True
+        return _fallback_for(link, profile, prof_hash, mode)
+
+    meta["cache"] = "joined"   # compute() overschrijft dit als wij de leader zijn
+    if wait_timeout is None:
+        wait_timeout = timeout + FLIGHT_GRACE
+    data = flight.do(key, compute, timeout=wait_timeout, on_timeout=on_timeout)
+    if data.get("_fallback"):
+        meta["fallback"] = True
+    return data
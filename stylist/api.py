@@ -0,0 +1,282 @@
+# stylist/api.py — headless JSON-API voor de browser-extensie (geen Streamlit, zelfde cache)
+#
+#   python -m stylist.api --port 8765
+#
+#   GET  /advice?u=<product-url>[&profile=<json>][&mode=llm|local|hybrid]
+#   POST /advice   {"url": "...", "profile": {...}, "mode": "..."}
+#   GET  /advice/batch?u=<url>&u=<url>...   POST /advice/batch {"urls": [...], "profile": {...}}
+#   GET  /healthz
+#   POST /prefetch {"urls": [...], "profile": {...}}   (extensie-ping: advies alvast klaarzetten, 202)
+#   GET  /metrics  (Prometheus-tekst)
+#   GET  /links/stats  (zoeklinks binnen de shop vs. Google-fallback, per host)
+import os, sys, json, argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from .advice import (DEFAULT_MODE, ADVICE_MODES, DEFAULT_PROFILE, LLM_TIMEOUT, MODEL,
+                     _product_name, get_advice)
+from .cache import DEFAULT_CACHE_URL, open_cache
+from .canon import REPORT as CANON_REPORT
+from .batch import MAX_BATCH, iter_advice_batch, unique_links
+from .llmclient import LazyClient
+from .links import LINK_STATS, as_list, build_links, _queries_from_combine, _queries_from_products
+from .prefetch import PREFETCH_MAX_PENDING, PREFETCH_WORKERS, Prefetcher
+from .metrics import enable_request_log, render_prometheus, request, timer
+from .similar import DEFAULT_INDEX_PATH, DEFAULT_THRESHOLD, SimilarityIndex
+from .trace import enable_trace
+
+MAX_BODY = 16 * 1024
+
+def body_error(body) -> str:
+    # "" = ok; anders de 400-melding. Elk veld van een POST-body op type controleren vóór gebruik.
+    if not isinstance(body, dict):
+        return "verwacht een JSON-object"
+    if not isinstance(body.get("url", ""), str):
+        return "url moet een string zijn"
+    urls = body.get("urls", [])
+    if not isinstance(urls, list) or not all(isinstance(u, str) for u in urls):
+        return "urls moet een lijst van strings zijn"
+    if not isinstance(body.get("profile", {}), dict):
+        return "profile moet een JSON-object zijn"
+    mode = body.get("mode", "")
+    if not isinstance(mode, str) or (mode and mode not in ADVICE_MODES):
+        return f"mode moet een van {', '.join(ADVICE_MODES)} zijn"
+    return ""
+
+def advice_payload(client, link: str, profile: dict, cache=None, mode: str = DEFAULT_MODE,
+                   model: str = MODEL, timeout: float = LLM_TIMEOUT, similar=None) -> dict:
+    # _keywords_from_url -> get_advice -> _queries_from_combine, als één JSON-antwoord
+    key_link = CANON_REPORT.canonicalize(link)
+    meta = {}
+    data = get_advice(client, key_link, profile, cache=cache, model=model, meta=meta, timeout=timeout, mode=mode,
+                      similar=similar)
+    return _product_payload(link, key_link, data, meta)
+
+def batch_payload(client, links: list, profile: dict, cache=None, mode: str = DEFAULT_MODE,
+                  model: str = MODEL, timeout: float = LLM_TIMEOUT, similar=None) -> dict:
+    # één advies per product + één gededupliceerde lijst bijpassende zoeklinks voor de hele mand
+    items = unique_links(links)
+    out = [None] * len(items)
+    for i, data, meta in iter_advice_batch(client, [k for _, k in items], profile, cache=cache,
+                                           model=model, mode=mode, timeout=timeout, similar=similar):
+        out[i] = _product_payload(items[i][0], items[i][1], data, meta)
+    with timer("links"):
+        pairs = [(p["url"], as_list(p["personal_advice"].get("combine"))) for p in out]
+        queries = _queries_from_products(pairs, max_links=6)
+        links = [{"query": q, "url": url, "product_url": link}
+                 for (q, link), url in zip(queries, build_links([(link, q) for q, link in queries]))]
+    return {"items": out, "links": links}
+
+def _product_payload(link: str, key_link: str, data: dict, meta: dict) -> dict:
+    pers = data.get("personal_advice", {})
+    with timer("links"):
+        queries = _queries_from_combine(as_list(pers.get("combine")), max_links=4)
+        links = [{"query": q, "url": url} for q, url in zip(queries, build_links([(link, q) for q in queries]))]
+    return {
+        "url": link,
+        "canonical_url": key_link,
+        "product_name": _product_name(key_link),
+        "headline": data.get("headline"),
+        "personal_advice": pers,
+        "links": links,
+        "cache": meta.get("cache"),
+        "fallback": meta.get("fallback", False),
+        **({"similar_to": meta["similar_to"], "similarity": meta["similarity"]} if meta.get("similar_to") else {}),
+    }
+
+def _profile_from(raw) -> dict:
+    if isinstance(raw, str):
+        raw = json.loads(raw) if raw.strip() else {}
+    if not isinstance(raw, dict):
+        raise ValueError("profile moet een JSON-object zijn")
+    return {k: str(raw.get(k) or "").strip() for k in DEFAULT_PROFILE}
+
+class AdviceHandler(BaseHTTPRequestHandler):
+    server_version = "FashionAIStylist/0.1"
+    client = None
+    cache = None
+    similar = None
+    prefetcher = None
+    mode = DEFAULT_MODE
+    allow_origin = "*"
+
+    _sent = False
+
+    def _send(self, status: int, body: dict):
+        self._sent = True
+        payload = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Access-Control-Allow-Origin", self.allow_origin)
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_text(self, status: int, text: str, content_type: str = "text/plain; version=0.0.4; charset=utf-8"):
+        payload = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Origin", self.allow_origin)
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Access-Control-Max-Age", "86400")
+        self.end_headers()
+
+    def _guarded(self, fn):
+        # een fout in de handler mag de verbinding niet zonder antwoord laten vallen
+        self._sent = False
+        try:
+            fn()
+        except Exception as e:
+            sys.stderr.write(f"api fout bij {self.command} {self.path}: {type(e).__name__}: {e}\n")
+            if not self._sent:
+                self._send(500, {"error": "interne fout"})
+
+    def do_GET(self):
+        self._guarded(self._get)
+
+    def do_POST(self):
+        self._guarded(self._post)
+
+    def _get(self):
+        p = urlparse(self.path)
+        if p.path == "/advice/batch":
+            qs = parse_qs(p.query)
+            return self._batch(qs.get("u", []), (qs.get("profile") or [""])[0], (qs.get("mode") or [""])[0])
+        if p.path == "/healthz":
+            return self._send(200, {"ok": True})
+        if p.path == "/links/stats":
+            return self._send(200, {**LINK_STATS.as_dict(), "top_fallback_hosts": LINK_STATS.top_fallback_hosts()})
+        if p.path == "/metrics":
+            return self._send_text(200, render_prometheus(self.cache, self.similar))
+        if p.path != "/advice":
+            return self._send(404, {"error": "not found"})
+        qs = {k: v[0] for k, v in parse_qs(p.query).items()}
+        self._advice(qs.get("u", ""), qs.get("profile", ""), qs.get("mode", ""))
+
+    def _post(self):
+        path = urlparse(self.path).path
+        if path not in ("/advice", "/advice/batch", "/prefetch"):
+            return self._send(404, {"error": "not found"})
+        try:
+            n = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            return self._send(400, {"error": "ongeldige Content-Length"})
+        if n > MAX_BODY:
+            return self._send(413, {"error": "body te groot"})
+        try:
+            body = json.loads(self.rfile.read(n) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "ongeldige JSON"})
+        err = body_error(body)
+        if err:
+            return self._send(400, {"error": err})
+        urls = body.get("urls", [])
+        if path == "/advice/batch":
+            return self._batch(urls, body.get("profile") or {}, body.get("mode", ""))
+        if path == "/prefetch":
+            return self._prefetch(urls, body.get("profile") or {})
+        self._advice(body.get("url", ""), body.get("profile") or {}, body.get("mode", ""))
+
+    def _advice(self, link, profile, mode):
+        link = (link or "").strip()
+        if not link.startswith(("http://", "https://")):
+            return self._send(400, {"error": "geef een geldige product-URL (u / url)"})
+        try:
+            profile = _profile_from(profile)
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        mode = mode if mode in ADVICE_MODES and self.client is not None else self.mode
+        with request("api", url=link):
+            self._send(200, advice_payload(self.client, link, profile, cache=self.cache, mode=mode,
+                                           similar=self.similar))
+
+    def _batch(self, links, profile, mode):
+        links = [str(u) for u in links]
+        if not unique_links(links):
+            return self._send(400, {"error": "geef één of meer geldige product-URLs (u / urls)"})
+        if len(links) > MAX_BATCH:
+            return self._send(413, {"error": f"maximaal {MAX_BATCH} producten per batch"})
+        try:
+            profile = _profile_from(profile)
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        mode = mode if mode in ADVICE_MODES and self.client is not None else self.mode
+        with request("api_batch", urls=len(links)):
+            self._send(200, batch_payload(self.client, links, profile, cache=self.cache, mode=mode,
+                                          similar=self.similar))
+
+    def _prefetch(self, links, profile):
+        if self.prefetcher is None or self.client is None:
+            return self._send(503, {"error": "prefetch staat uit"})
+        try:
+            profile = _profile_from(profile)
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        links = [k for _, k in unique_links([str(u) for u in links])]
+        queued = self.prefetcher.prefetch(self.client, links, profile, self.cache, mode=self.mode, similar=self.similar)
+        self._send(202, {"queued": queued, "received": len(links)})
+
+    def log_message(self, fmt, *args):
+        sys.stderr.write("api %s - %s\n" % (self.address_string(), fmt % args))
+
+def make_server(client, cache, host: str = "127.0.0.1", port: int = 8765, mode: str = DEFAULT_MODE,
+                allow_origin: str = "*", similar=None, prefetcher=None) -> ThreadingHTTPServer:
+    handler = type("Handler", (AdviceHandler,), {"client": client, "cache": cache, "mode": mode,
+                                                 "allow_origin": allow_origin, "similar": similar,
+                                                 "prefetcher": prefetcher})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m stylist.api", description="Headless advies-API (JSON) voor de browser-extensie.")
+    ap.add_argument("--host", default=os.getenv("STYLIST_API_HOST", "127.0.0.1"))
+    ap.add_argument("--port", type=int, default=int(os.getenv("STYLIST_API_PORT", "8765")))
+    ap.add_argument("--cache", default=os.getenv("ADVICE_CACHE_URL", DEFAULT_CACHE_URL))
+    ap.add_argument("--mode", default=os.getenv("ADVICE_MODE", DEFAULT_MODE), choices=ADVICE_MODES)
+    ap.add_argument("--allow-origin", default=os.getenv("STYLIST_API_ORIGIN", "*"))
+    ap.add_argument("--log-requests", action="store_true", default=os.getenv("STYLIST_REQUEST_LOG", "") == "1",
+                    help="één JSON-regel per request op stderr (stage-tijden, cache, tokens, kosten)")
+    ap.add_argument("--similar-index", default=os.getenv("SIMILAR_INDEX_PATH", DEFAULT_INDEX_PATH))
+    ap.add_argument("--similar-threshold", type=float, default=float(os.getenv("SIMILAR_THRESHOLD", DEFAULT_THRESHOLD)),
+                    help="cosine-drempel voor hergebruik van advies van een vergelijkbaar product; 0 = uit")
+    ap.add_argument("--prefetch-workers", type=int, default=int(os.getenv("PREFETCH_WORKERS", PREFETCH_WORKERS)),
+                    help="max. gelijktijdige speculatieve calls voor /prefetch; 0 = uit")
+    ap.add_argument("--trace", default=os.getenv("STYLIST_TRACE", ""),
+                    help="JSONL-trace per adviesverzoek (voor python -m stylist.replay); geen profielvelden")
+    ap.add_argument("--trace-sample", type=float, default=float(os.getenv("STYLIST_TRACE_SAMPLE", "1")))
+    args = ap.parse_args(argv)
+    if args.log_requests:
+        enable_request_log()
+    if args.trace:
+        enable_trace(args.trace, args.trace_sample)
+
+    client, mode = None, args.mode
+    if os.getenv("OPENAI_API_KEY"):
+        client = LazyClient(os.getenv("OPENAI_API_KEY"))   # gedeelde verbindingspool; retries via stylist.resilience
+    else:
+        print("Geen OPENAI_API_KEY: alleen lokaal advies (mode=local).", file=sys.stderr)
+        mode = "local"
+    similar = SimilarityIndex(args.similar_index, threshold=args.similar_threshold) if args.similar_threshold > 0 else None
+    prefetcher = Prefetcher(args.prefetch_workers, PREFETCH_MAX_PENDING) if args.prefetch_workers > 0 else None
+    srv = make_server(client, open_cache(args.cache), args.host, args.port, mode, args.allow_origin, similar, prefetcher)
+    print(f"Advies-API op http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        if prefetcher is not None:
+            prefetcher.shutdown()
+        if similar is not None:
+            similar.save()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# stylist/assets.py — statische CSS/HTML van de app, één keer per proces voorbereid
+#
+# Streamlit voert het app-script bij elke run opnieuw uit; wat hier staat wordt alleen bij de
+# eerste import gebouwd (CSS geminificeerd, iframe-HTML als vaste kop/staart rond de ingevulde waarde).
+import re
+from functools import lru_cache
+from html import escape as html_escape
+
+def minify_css(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+def minify_html(html: str) -> str:
+    return re.sub(r">\s+<", "><", re.sub(r"\n\s*", "\n", html.strip()))
+
+# ---------- App-CSS ----------
+_CSS = """
+@import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700;800&display=swap');
+
+html, body, [data-testid="stAppViewContainer"]{
+  height:100%;
+  font-family:"Inter", system-ui, -apple-system, Segoe UI, Roboto, Helvetica, Arial, sans-serif;
+}
+[data-testid="stHeader"]{ display:none; }
+footer { visibility:hidden; }
+
+[data-testid="stAppViewContainer"]{
+  background: radial-gradient(1200px 600px at 50% -120px, #C8B9FF 0%, #AA98FF 30%, #8F7DFF 60%, #7A66F7 100%);
+}
+.block-container{
+  max-width: 860px;
+  padding-top: 12px !important;
+  padding-bottom: 80px !important;
+}
+
+/* ===== Cards ===== */
+.card{
+  background:#ffffff; border-radius: 22px; padding: 22px;
+  box-shadow: 0 16px 40px rgba(23,0,75,0.18);
+  border: 1px solid #EFEBFF; margin-top: 16px;
+}
+.card-title{
+  font-size: 26px; font-weight: 800; color:#1f2358; margin:0 0 12px;
+  display:flex; gap:12px; align-items:center; letter-spacing:-.01em;
+}
+.card-sub{ color:#2b2b46; }
+.section-h{ font-weight:800; margin:14px 0 6px; color:#1f2358; }
+ul{ margin: 0 0 0 1.15rem; padding:0; line-height:1.6; }
+li{ margin: 6px 0; }
+
+/* Chips */
+.matching .btnrow{ display:flex; flex-wrap:wrap; gap:10px; margin-top:8px; }
+.matching .chip{
+  display:inline-flex; align-items:center; gap:8px;
+  padding:8px 12px; border-radius:10px;
+  background:#F3F4FF; border:1px solid #E3E6FF; text-decoration:none;
+  font-weight:700; color:#1f2a5a; font-size:14px; line-height:1.25;
+}
+.matching .chip svg{ width:16px; height:16px; }
+.matching .note{ color:#6B7280; font-size:13px; margin-top:10px; }
+
+/* Profile tag chips */
+.tagsrow{ display:flex; flex-wrap:wrap; gap:8px; margin: 6px 0 2px; }
+.tag{
+  background:#F7F7FF; border:1px solid #E8E9FF; color:#1f2a5a;
+  padding:6px 10px; border-radius:10px; font-weight:700; font-size:13px;
+}
+
+/* ===== Compacte header voor panel modus ===== */
+body[data-panel="1"] .compact-header{
+  background:#ffffffcc; border:1px solid #EFEBFF; border-radius:12px;
+  display:flex; align-items:center; gap:10px;
+  padding:10px 12px; margin:6px 0 6px;
+  box-shadow:0 10px 26px rgba(23,0,75,.18); backdrop-filter: blur(4px);
+}
+body[data-panel="1"] .compact-header .title{
+  font-weight:800; font-size:18px; color:#1f2358; letter-spacing:-.01em; margin:0;
+}
+body[data-panel="1"] .compact-header .icon{
+  width:22px; height:22px; display:inline-block;
+}
+
+/* ===== Popup/Panel-modus typografie ===== */
+body[data-panel="1"] .block-container{ max-width: 560px; padding-top: 6px !important; padding-bottom: 24px !important; }
+body[data-panel="1"] .card{ padding: 14px !important; border-radius: 16px !important; }
+body[data-panel="1"] .card-title{ font-size: 20px !important; margin-bottom: 6px !important; }
+body[data-panel="1"] .section-h{ font-size: 15px !important; margin:10px 0 4px !important; }
+body[data-panel="1"] ul li{ font-size: 14px !important; line-height: 1.35 !important; margin: 3px 0 !important; }
+
+/* ===== Expander (persoonlijke voorkeuren) in kaartstijl ===== */
+[data-testid="stExpander"]{
+  border: 1px solid #EFEBFF; border-radius: 22px; background:#fff;
+  box-shadow: 0 16px 40px rgba(23,0,75,0.18); margin-top: 10px;
+}
+[data-testid="stExpander"] [data-testid="stExpanderToggleIcon"] svg{ color:#6F5BFF; }
+[data-testid="stExpander"] .streamlit-expanderHeader p{
+  font-size: 20px; font-weight: 800; color:#1f2358; margin: 6px 0;
+}
+"""
+
+APP_CSS = f"<style>{minify_css(_CSS)}</style>"
+PANEL_SCRIPT = "<script>document.body.setAttribute('data-panel','1');</script>"
+
+# ---------- Iframes (components.html) ----------
+HEADER_HTML = minify_html("""
+<div style="display:flex;align-items:center;gap:14px;margin:10px 0 8px;color:#fff;">
+  <svg width="40" height="40" viewBox="0 0 24 24" fill="#fff" xmlns="http://www.w3.org/2000/svg"><path d="M8 3l1.5 3-2 3 2 11h5l2-11-2-3L16 3h-2l-1 2-1-2H8z"/></svg>
+  <h1 style="font:800 44px/1 'Inter',system-ui;letter-spacing:-.02em;margin:0;">Fashion AI Stylist</h1>
+</div>
+""")
+HEADER_HEIGHT = 70
+
+_HERO = """
+<!doctype html><html><head><meta charset="utf-8"/>
+<style>
+  body{margin:0;font-family:Inter,system-ui}
+  .hero{background:#fff;border:1px solid #EFEBFF;border-radius:22px;box-shadow:0 16px 40px rgba(23,0,75,.18);padding:22px;margin-top:8px;}
+  .hero-title{font:800 34px/1.2 Inter,system-ui;color:#1f2358;letter-spacing:-.02em;margin:0 0 14px}
+  .row{display:flex;gap:12px;align-items:center}
+  .inp{flex:1;background:#fff;border:1px solid #E3E6FF;border-radius:14px;height:52px;padding:0 14px;font:500 16px Inter,system-ui;outline:none}
+  .btn{border:0;border-radius:14px;padding:14px 20px;font:800 16px Inter,system-ui;cursor:pointer;color:#fff;background:linear-gradient(180deg,#8C72FF 0%,#6F5BFF 100%);box-shadow:0 12px 28px rgba(23,0,75,.35)}
+</style>
+<div class="hero">
+  <div class="hero-title">Plak een productlink en krijg direct stijl-advies</div>
+  <div class="row">
+    <input id="hero-url" class="inp" type="text" placeholder="https://…" value="@PREFILL@"/>
+    <button class="btn" onclick="
+      const vs=document.getElementById('hero-url').value.split(/\\s+/).filter(v=>/^https?:\\/\\//i.test(v));
+      if(vs.length){
+        const u=new URL(window.parent.location.href);
+        u.searchParams.set('auto','1'); u.searchParams.delete('u');
+        vs.forEach(v=>u.searchParams.append('u',v));
+        window.parent.location=u.toString();
+      } else { alert('Plak eerst een geldige URL'); }
+    ">Advies ophalen</button>
+  </div>
+</div>
+</html>
+"""
+_HERO_HEAD, _HERO_TAIL = minify_html(_HERO).split("@PREFILL@")
+HERO_HEIGHT = 140
+
+@lru_cache(maxsize=256)
+def hero_html(prefill: str = "") -> str:
+    # alleen de ingevulde link verschilt per run
+    return _HERO_HEAD + html_escape(prefill) + _HERO_TAIL
@@ -0,0 +1,68 @@
+# stylist/batch.py — advies voor meerdere producten tegelijk (winkelmand / wishlist)
+#
+# Cache-hits komen direct terug; misses gaan parallel via get_advice (zelfde cache-key per product,
+# single-flight, retries en fallback als bij één product).
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import time
+
+from .advice import DEFAULT_MODE, LLM_TIMEOUT, MODEL, _profile_hash, get_advice, trace_hit
+from .cache import cache_key
+from .canon import REPORT as CANON_REPORT
+from .gate import PRIORITY_BATCH
+from .metrics import annotate, bind, record_advice
+
+MAX_BATCH = 10           # producten per verzoek
+BATCH_CONCURRENCY = 4    # gelijktijdige upstream-calls per batch
+
+def unique_links(links, limit: int = MAX_BATCH) -> list:
+    # [(originele link, canonieke link)], dubbele producten (na canonicalisatie) eruit
+    seen, out = set(), []
+    for link in links:
+        link = (link or "").strip()
+        if not link.startswith(("http://", "https://")):
+            continue
+        key_link = CANON_REPORT.canonicalize(link)
+        if key_link not in seen:
+            seen.add(key_link); out.append((link, key_link))
+        if len(out) >= limit:
+            break
+    return out
+
+def iter_advice_batch(client, links: list, profile: dict, cache=None, model: str = MODEL,
+                      mode: str = DEFAULT_MODE, timeout: float = LLM_TIMEOUT,
+                      concurrency: int = BATCH_CONCURRENCY, similar=None):
+    # yield (index, data, meta) in volgorde van beschikbaarheid: eerst cache-hits, dan de misses
+    # links: canonieke links (zie unique_links); de aanroeper rendert in zijn eigen thread
+    prof_hash, misses = _profile_hash(profile), []
+    for i, link in enumerate(links):
+        t0 = time.perf_counter()
+        hit = cache.get(cache_key(link, prof_hash)) if cache is not None and mode != "local" else None
+        if hit is not None:
+            meta = {"cache": "hit", "fallback": bool(hit.get("_fallback"))}
+            record_advice(meta, mode)
+            trace_hit(link, profile, meta, mode, t0, PRIORITY_BATCH)
+            yield i, hit, meta
+        elif mode == "local":
+            meta = {}
+            yield i, get_advice(client, link, profile, cache=cache, model=model, meta=meta, mode=mode), meta
+        else:
+            misses.append(i)
+    annotate(batch_size=len(links), batch_hits=len(links) - len(misses))
+    if not misses:
+        return
+
+    def one(i):
+        meta = {}
+        return i, get_advice(client, links[i], profile, cache=cache, model=model, meta=meta,
+                             timeout=timeout, mode=mode, similar=similar, priority=PRIORITY_BATCH), meta
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(misses)))) as pool:
+        for fut in as_completed([pool.submit(bind(one), i) for i in misses]):
+            yield fut.result()
+
+def get_advice_batch(client, links: list, profile: dict, **kw) -> list:
+    out = [None] * len(links)
+    for i, data, _ in iter_advice_batch(client, links, profile, **kw):
+        out[i] = data
+    return out
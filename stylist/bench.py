@@ -0,0 +1,250 @@
+# stylist/bench.py — benchmark-suite tegen een lokale nep-LLM (geen API-kosten)
+#
+#   python -m stylist.bench [--out bench.json] [--compare vorige.json] [--quick]
+#
+# Meet: hot paths (helpers + HTML-bouwers), end-to-end advieslatency koud vs warm,
+# en doorvoer onder N gelijktijdige sessies; met --startup ook koude start en eerste paint van de
+# app (normaal en panel=1). Resultaat: JSON voor regressievergelijking.
+import os, sys, json, time, random, argparse, platform, tempfile, threading, statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from .advice import DEFAULT_PROFILE, _ensure_schema, _keywords_from_url, _product_name, build_messages, get_advice
+from .cache import SQLiteAdviceCache
+from .cards import _matching_links_html, _single_card_html
+from .fakellm import FakeLLM
+from .gate import GATE
+from .links import _queries_from_combine
+from .prompt import PROMPT_VERSION, prompt_tokens
+from .repair import repair_json
+
+SHOPS   = ["https://www.zalando.nl", "https://www2.hm.com/nl_nl", "https://www.asos.com/nl", "https://www.wehkamp.nl"]
+ITEMS   = ["chino", "jeans", "overhemd", "t-shirt", "hoodie", "parka", "blazer", "jurk", "rok", "sneakers"]
+FITS    = ["slim-fit", "regular-fit", "relaxed-fit", "oversized"]
+COLORS  = ["navy", "zwart", "wit", "beige", "olijf", "grijs", "bordeaux"]
+PROFILE = {**DEFAULT_PROFILE, "doelgroep": "Man", "fit": "Slim", "huidtint": "Warm", "kleuren": "navy, olijf"}
+
+def product_urls(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    out = set()
+    while len(out) < n:
+        slug = f"heren-{rng.choice(FITS)}-{rng.choice(ITEMS)}-{rng.choice(COLORS)}-{rng.randint(1000, 99999)}.html"
+        out.add(f"{rng.choice(SHOPS)}/{slug}")
+    return sorted(out)
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {"n": 0}
+    v = sorted(values)
+    pick = lambda q: v[min(len(v) - 1, int(round(q * (len(v) - 1))))]
+    return {"n": len(v), "mean_ms": round(statistics.fmean(v), 3), "p50_ms": round(pick(.5), 3),
+            "p95_ms": round(pick(.95), 3), "p99_ms": round(pick(.99), 3), "max_ms": round(v[-1], 3)}
+
+def _timeit(fn, number: int, repeat: int = 5) -> dict:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter_ns() - t0) / number)
+    return {"ns_per_op": round(statistics.median(runs), 1), "min_ns": round(min(runs), 1)}
+
+# ---------- Hot paths ----------
+def bench_hot_paths(number: int = 2000) -> dict:
+    url = "https://www.zalando.nl/heren-slim-fit-chino-navy-12345.html?utm_source=nl"
+    raw = {"headline": "Slanke chino voor elke dag", "personal_advice": {
+        "for_you": ["Kies slim fit met stretch", "Draag met korte sokken", "Rol de pijp één keer om"],
+        "avoid": ["Vermijd te lange pijpen", "Vermijd glanzende stof"],
+        "colors": ["Navy met ecru", "Olijf als accent"],
+        "combine": ["Wit overhemd of polo", "Witte sneakers en suède loafers"]}}
+    data = _ensure_schema(json.loads(json.dumps(raw)), _product_name(url), _keywords_from_url(url))
+    combine = data["personal_advice"]["combine"]
+    truncated = json.dumps(raw, ensure_ascii=False)[:300]
+    return {
+        "keywords_from_url":   _timeit(lambda: _keywords_from_url(url), number),
+        "queries_from_combine": _timeit(lambda: _queries_from_combine(combine, max_links=4), number),
+        "ensure_schema":       _timeit(lambda: _ensure_schema(json.loads(json.dumps(raw)), "Chino", "slim chino"), number),
+        "ensure_schema_empty": _timeit(lambda: _ensure_schema({}, "Chino", "slim chino"), number),
+        "repair_truncated":    _timeit(lambda: repair_json(truncated), number),
+        "single_card_html":    _timeit(lambda: _single_card_html(data, PROFILE), number),
+        "matching_links_html": _timeit(lambda: _matching_links_html(data, url), number),
+    }
+
+# ---------- Promptgrootte ----------
+def bench_prompt(urls: list) -> dict:
+    # geschatte input-tokens per call (stylist.prompt); groeit dit, dan betalen we dat bij elke call
+    profiles = [{}, PROFILE]
+    users = [prompt_tokens(build_messages(u, p)[1:]) for u in urls for p in profiles]
+    system = prompt_tokens(build_messages(urls[0], {})[:1])
+    return {"version": PROMPT_VERSION, "system_tokens": system,
+            "user_mean_tokens": round(statistics.mean(users), 1), "user_max_tokens": max(users)}
+
+# ---------- End-to-end ----------
+def bench_end_to_end(fake: FakeLLM, urls: list, cache_dir: str) -> dict:
+    client = fake.client()
+    cache = SQLiteAdviceCache(os.path.join(cache_dir, "e2e.sqlite3"))
+    cold, warm, first_bullet, streamed = [], [], [], []
+    for i, u in enumerate(urls):
+        t0 = time.perf_counter()
+        if i % 2:
+            seen = []
+            get_advice(client, u, PROFILE, cache=cache, on_update=lambda p: seen or seen.append(time.perf_counter()))
+            streamed.append((time.perf_counter() - t0) * 1000)
+            if seen:
+                first_bullet.append((seen[0] - t0) * 1000)
+        else:
+            get_advice(client, u, PROFILE, cache=cache)
+            cold.append((time.perf_counter() - t0) * 1000)
+    for u in urls:
+        t0 = time.perf_counter()
+        get_advice(client, u, PROFILE, cache=cache)
+        warm.append((time.perf_counter() - t0) * 1000)
+    cache.close()
+    return {"cold": percentiles(cold), "cold_stream": percentiles(streamed),
+            "stream_first_update": percentiles(first_bullet), "warm": percentiles(warm)}
+
+# ---------- Gelijktijdige sessies ----------
+def bench_concurrency(fake: FakeLLM, urls: list, cache_dir: str, sessions: int, per_session: int,
+                      hot_fraction: float = 0.5, seed: int = 11) -> dict:
+    client = fake.client()
+    cache = SQLiteAdviceCache(os.path.join(cache_dir, "conc.sqlite3"))
+    hot = urls[: max(1, len(urls) // 10)]   # virale links: veel sessies tegelijk op dezelfde URL
+    calls_before = fake.cfg.calls
+    lat, fallbacks, lock = [], [0], threading.Lock()
+
+    def session(sid):
+        rng = random.Random(seed + sid)
+        for _ in range(per_session):
+            u = rng.choice(hot) if rng.random() < hot_fraction else rng.choice(urls)
+            meta, t0 = {}, time.perf_counter()
+            get_advice(client, u, PROFILE, cache=cache, meta=meta)
+            with lock:
+                lat.append((time.perf_counter() - t0) * 1000)
+                fallbacks[0] += bool(meta.get("fallback"))
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(session, range(sessions)))
+    elapsed = time.perf_counter() - t0
+    stats = cache.stats()
+    cache.close()
+    return {"sessions": sessions, "requests": len(lat), "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(lat) / elapsed, 2), "latency": percentiles(lat),
+            "upstream_calls": fake.cfg.calls - calls_before, "fallbacks": fallbacks[0],
+            "cache_hit_rate": round(stats.hit_rate, 4)}
+
+# ---------- Koude start (Streamlit-app) ----------
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "FashionAIStylist.py")
+
+# draait in een vers proces: meet imports, de eerste (koude) run en een tweede (warme) run
+_STARTUP_SCRIPT = r"""
+import sys, json, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+for k, v in json.loads(sys.argv[2]).items():
+    at.query_params[k] = v
+t2 = time.perf_counter(); at.run(); t3 = time.perf_counter()
+perf = at.session_state["_perf"]
+first = {"paint_ms": perf.get("paint_ms"), "bytes": perf["bytes"]}
+at.run(); t4 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "first_run_ms": (t3 - t2) * 1000,
+                  "first_paint_ms": first["paint_ms"], "warm_run_ms": (t4 - t3) * 1000,
+                  "warm_paint_ms": at.session_state["_perf"].get("paint_ms"), "html_kb": first["bytes"] / 1024,
+                  "openai_imported": "openai" in sys.modules, "errors": len(at.exception)}))
+"""
+
+def bench_startup(fake: FakeLLM, app: str = APP_PATH, url: str = None) -> dict:
+    # normale layout (hero, geen link) en panel=1 met één link; cache leeg, advies van de nep-LLM
+    import subprocess
+    url = url or product_urls(1)[0]
+    layouts = {"normal": {}, "panel": {"u": url, "auto": "1", "panel": "1"}}
+    env = {**os.environ, "OPENAI_API_KEY": "sk-bench", "OPENAI_BASE_URL": fake.base_url,
+           "ADVICE_CACHE_URL": "memory://", "SIMILAR_THRESHOLD": "0", "METRICS_PORT": "0"}
+    out = {}
+    for name, qp in layouts.items():
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT, app, json.dumps(qp)], env=env,
+                              capture_output=True, text=True, timeout=300)
+        wall = (time.perf_counter() - t0) * 1000
+        if proc.returncode != 0:
+            out[name] = {"error": proc.stderr.strip().splitlines()[-1:]}
+            continue
+        res = json.loads(proc.stdout.strip().splitlines()[-1])
+        out[name] = {"process_ms": round(wall, 1),
+                     **{k: round(v, 2) if isinstance(v, float) else v for k, v in res.items()}}
+    return out
+
+# ---------- Vergelijken ----------
+def _flatten(d: dict, prefix: str = "") -> dict:
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + "."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = v
+    return out
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25) -> list:
+    # regressies: *_ms / *ns_per_op / *_tokens hoger, *_rps lager dan baseline * (1 ± tolerance)
+    cur, base = _flatten(current.get("results", {})), _flatten(baseline.get("results", {}))
+    out = []
+    for k, old in base.items():
+        new = cur.get(k)
+        if new is None or not old:
+            continue
+        lower_is_better = k.endswith(("_ms", "ns_per_op", "_tokens"))
+        higher_is_better = k.endswith("_rps")
+        if (lower_is_better and new > old * (1 + tolerance)) or (higher_is_better and new < old * (1 - tolerance)):
+            out.append({"metric": k, "baseline": old, "current": new, "change": round(new / old - 1, 3)})
+    return out
+
+def run(quick: bool = False, latency_ms: float = 300.0, token_ms: float = 5.0, error_rate: float = 0.0,
+        sessions: int = 16, startup: bool = False, app: str = APP_PATH) -> dict:
+    n_urls = 20 if quick else 60
+    GATE.configure(rpm=1e6, tpm=1e9)   # de bench meet de pipeline, niet het OpenAI-quotum
+    urls = product_urls(n_urls)
+    results = {"hot_paths": bench_hot_paths(500 if quick else 5000), "prompt": bench_prompt(urls)}
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeLLM(latency_ms=latency_ms, token_ms=token_ms, error_rate=error_rate, seed=1) as fake:
+        results["end_to_end"] = bench_end_to_end(fake, urls[: n_urls // 2], tmp)
+        results["concurrency"] = bench_concurrency(fake, urls, tmp, sessions=sessions,
+                                                   per_session=5 if quick else 20)
+        if startup:
+            results["startup"] = bench_startup(fake, app)
+    return {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "platform": platform.platform(), "quick": quick, "fake_latency_ms": latency_ms,
+                 "fake_token_ms": token_ms, "fake_error_rate": error_rate, "sessions": sessions},
+        "results": results,
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m stylist.bench", description="Benchmark-suite met lokale nep-LLM.")
+    ap.add_argument("--out", default="", help="schrijf resultaat-JSON naar dit bestand (default: stdout)")
+    ap.add_argument("--compare", default="", help="vorige resultaat-JSON; exit 1 bij regressie")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--quick", action="store_true")
+    ap.add_argument("--latency-ms", type=float, default=300.0)
+    ap.add_argument("--token-ms", type=float, default=5.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--sessions", type=int, default=16)
+    ap.add_argument("--startup", action="store_true", help="meet ook koude start en eerste paint van de Streamlit-app")
+    ap.add_argument("--app", default=APP_PATH)
+    args = ap.parse_args(argv)
+
+    report = run(args.quick, args.latency_ms, args.token_ms, args.error_rate, args.sessions, args.startup, args.app)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if report.get("regressions") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,380 @@
+# stylist/cache.py — persistente advies-cache, gedeeld tussen processen/replicas
+#
+# Standaard: SQLite in WAL-modus op lokale schijf. Andere stores (Redis, memcached, ...)
+# implementeren AdviceCache en registreren zich via register_backend().
+import os, sys, json, sqlite3, threading, time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from urllib.parse import urlparse, parse_qsl
+
+from .prompt import PROMPT_VERSION
+
+DEFAULT_CACHE_URL   = ".cache/advice.sqlite3"
+DEFAULT_TTL         = 3600
+DEFAULT_MAX_BYTES   = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 50_000
+TOUCH_INTERVAL      = 60   # sec; LRU-tijdstempel niet bij elke hit herschrijven
+
+def cache_key(link: str, prof_hash: str) -> str:
+    # promptversie in de sleutel: na een promptwijziging geen oud advies meer serveren
+    return f"p{PROMPT_VERSION}|{prof_hash}|{link}"
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    stores: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "hit_rate": round(self.hit_rate, 4)}
+
+# ---------- Interface ----------
+class AdviceCache:
+    # get/set werken met JSON-serialiseerbare dicts; ttl=None -> default ttl van de store
+    def __init__(self, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = int(ttl)
+        self.max_bytes = int(max_bytes)
+        self.max_entries = int(max_entries)
+        self._stats = CacheStats()
+        self._lock = threading.RLock()
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def set(self, key: str, value: dict, ttl=None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def _usage(self):
+        # -> (entries, bytes)
+        raise NotImplementedError
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            entries, size = self._usage()
+            return CacheStats(**{**asdict(self._stats), "entries": entries, "bytes": size})
+
+    def close(self) -> None:
+        pass
+
+# ---------- In-memory (per proces; tests en single-replica) ----------
+class MemoryAdviceCache(AdviceCache):
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self._items = OrderedDict()   # key -> (expires, payload)
+        self._bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self._stats.misses += 1
+                return None
+            expires, payload = item
+            if expires <= time.time():
+                self._drop(key)
+                self._stats.expired += 1
+                self._stats.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self._stats.hits += 1
+            return json.loads(payload)
+
+    def set(self, key, value, ttl=None):
+        payload = _dumps(value)
+        with self._lock:
+            self._drop(key)
+            self._items[key] = (time.time() + (self.ttl if ttl is None else ttl), payload)
+            self._bytes += len(payload.encode("utf-8"))
+            self._stats.stores += 1
+            while self._items and (self._bytes > self.max_bytes or len(self._items) > self.max_entries):
+                self._drop(next(iter(self._items)))
+                self._stats.evictions += 1
+
+    def _drop(self, key):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._bytes -= len(item[1].encode("utf-8"))
+
+    def delete(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear(); self._bytes = 0
+
+    def _usage(self):
+        return len(self._items), self._bytes
+
+# ---------- Compact in-proces (L1 op het hot path) ----------
+_SECTIONS = ("for_you", "avoid", "colors", "combine")
+
+class _Record:
+    # één advies als slots + platte tuples i.p.v. geneste dicts/lists:
+    # shape = (lengte per sectie of -1, extra keys...) gedeeld tussen records; strings uit de pool van de store
+    __slots__ = ("expires", "shape", "strings", "values", "raw", "size")
+
+def _fits(value: dict) -> bool:
+    pers = value.get("personal_advice")
+    return (isinstance(pers, dict) and set(pers) <= set(_SECTIONS) and isinstance(value.get("headline"), str)
+            and all(isinstance(v, list) and all(isinstance(x, str) for x in v) for v in pers.values())
+            and all(isinstance(v, (str, int, float, bool)) or v is None
+                    for k, v in value.items() if k not in ("headline", "personal_advice")))
+
+_POOL_SLOT = 2 * sys.getsizeof(0) + 32   # ruwe schatting per pool-entry (twee dict-slots)
+_ENTRY_SLOT = 104                        # idem per OrderedDict-entry (slot + gelinkte node)
+
+class CompactAdviceStore(AdviceCache):
+    # vervangt st.cache_data: harde bytegrens, LRU, TTL, en elke get levert een eigen dict.
+    # Strings (bullets, headlines) staan één keer in een refcounted pool: standaard-bullets en
+    # veelvoorkomende adviezen kosten maar één keer geheugen, en de bytetelling houdt daar rekening mee.
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self._items = OrderedDict()   # key -> _Record
+        self._pool, self._refs = {}, {}
+        self._shapes = {}
+        self._bytes = 0
+
+    def _intern(self, s: str) -> str:
+        c = self._pool.get(s)
+        if c is None:
+            c = self._pool[s] = s
+            self._refs[s] = 0
+            self._bytes += sys.getsizeof(s) + _POOL_SLOT
+        self._refs[c] += 1
+        return c
+
+    def _release(self, s: str):
+        n = self._refs.get(s)
+        if n is None:
+            return
+        if n > 1:
+            self._refs[s] = n - 1
+        else:
+            del self._refs[s], self._pool[s]
+            self._bytes -= sys.getsizeof(s) + _POOL_SLOT
+
+    def _pack(self, value: dict, expires: float) -> _Record:
+        rec = _Record()
+        rec.expires, rec.shape, rec.strings, rec.values, rec.raw = expires, None, (), (), None
+        if _fits(value):
+            pers, i = value["personal_advice"], self._intern
+            extra = [k for k in value if k not in ("headline", "personal_advice")]
+            shape = tuple(len(pers[k]) if k in pers else -1 for k in _SECTIONS) + tuple(extra)
+            rec.shape = self._shapes.setdefault(shape, shape) if len(self._shapes) < 1024 else shape
+            rec.strings = (i(value["headline"]),) + tuple(i(x) for k in _SECTIONS for x in pers.get(k, ()))
+            rec.values = tuple(i(value[k]) if isinstance(value[k], str) else value[k] for k in extra)
+        else:
+            rec.raw = _dumps(value)   # afwijkende vorm: gewoon JSON
+        # eigen overhead; de strings zelf tellen in de pool
+        rec.size = (sys.getsizeof(rec) + sys.getsizeof(rec.strings) + sys.getsizeof(rec.values)
+                    + (sys.getsizeof(rec.raw) if rec.raw is not None else 0))
+        return rec
+
+    @staticmethod
+    def _unpack(rec: _Record) -> dict:
+        if rec.raw is not None:
+            return json.loads(rec.raw)
+        pers, pos = {}, 1
+        for k, n in zip(_SECTIONS, rec.shape):
+            if n >= 0:
+                pers[k] = list(rec.strings[pos:pos + n])
+                pos += n
+        return {"headline": rec.strings[0], "personal_advice": pers, **dict(zip(rec.shape[len(_SECTIONS):], rec.values))}
+
+    def get(self, key):
+        with self._lock:
+            rec = self._items.get(key)
+            if rec is None:
+                self._stats.misses += 1
+                return None
+            if rec.expires <= time.time():
+                self._drop(key)
+                self._stats.expired += 1
+                self._stats.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self._stats.hits += 1
+        return self._unpack(rec)
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._drop(key)
+            rec = self._pack(value, expires)
+            rec.size += sys.getsizeof(key) + _ENTRY_SLOT
+            self._items[key] = rec
+            self._bytes += rec.size
+            self._stats.stores += 1
+            while self._items and (self._bytes > self.max_bytes or len(self._items) > self.max_entries):
+                self._drop(next(iter(self._items)))
+                self._stats.evictions += 1
+
+    def _drop(self, key):
+        rec = self._items.pop(key, None)
+        if rec is not None:
+            self._bytes -= rec.size
+            for s in rec.strings:
+                self._release(s)
+            for v in rec.values:
+                if isinstance(v, str):
+                    self._release(v)
+
+    def delete(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear(); self._pool.clear(); self._refs.clear(); self._shapes.clear(); self._bytes = 0
+
+    def _usage(self):
+        return len(self._items), self._bytes
+
+# ---------- SQLite / WAL (standaard) ----------
+class SQLiteAdviceCache(AdviceCache):
+    def __init__(self, path: str, **kw):
+        super().__init__(**kw)
+        self.path = path
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        # één connectie per proces, geserialiseerd via self._lock; WAL laat andere processen gelijktijdig lezen
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=10000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS advice("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " expires REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS advice_accessed ON advice(accessed)")
+        # lopende totalen via triggers: _usage() is één rij lezen i.p.v. COUNT/SUM over de hele tabel,
+        # en blijft kloppen als andere processen op dezelfde database schrijven
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("CREATE TABLE IF NOT EXISTS advice_usage("
+                                 " id INTEGER PRIMARY KEY CHECK (id = 1), n INTEGER NOT NULL, bytes INTEGER NOT NULL)")
+                self._db.execute("INSERT OR IGNORE INTO advice_usage SELECT 1, COUNT(*), COALESCE(SUM(size), 0) FROM advice")
+                self._db.execute("CREATE TRIGGER IF NOT EXISTS advice_usage_ins AFTER INSERT ON advice BEGIN"
+                                 " UPDATE advice_usage SET n = n + 1, bytes = bytes + NEW.size WHERE id = 1; END")
+                self._db.execute("CREATE TRIGGER IF NOT EXISTS advice_usage_del AFTER DELETE ON advice BEGIN"
+                                 " UPDATE advice_usage SET n = n - 1, bytes = bytes - OLD.size WHERE id = 1; END")
+                self._db.execute("CREATE TRIGGER IF NOT EXISTS advice_usage_upd AFTER UPDATE OF size ON advice BEGIN"
+                                 " UPDATE advice_usage SET bytes = bytes + NEW.size - OLD.size WHERE id = 1; END")
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires, accessed FROM advice WHERE key=?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats.misses += 1
+                return None
+            value, expires, accessed = row
+            if expires <= now:
+                self._db.execute("DELETE FROM advice WHERE key=? AND expires<=?", (key, now))
+                self._stats.expired += 1
+                self._stats.misses += 1
+                return None
+            if now - accessed > TOUCH_INTERVAL:
+                self._db.execute("UPDATE advice SET accessed=? WHERE key=?", (now, key))
+            self._stats.hits += 1
+        return json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        payload = _dumps(value)
+        now = time.time()
+        with self._lock:
+            # upsert i.p.v. INSERT OR REPLACE: REPLACE vuurt de delete-trigger niet (zonder recursive_triggers)
+            self._db.execute(
+                "INSERT INTO advice(key, value, size, expires, accessed) VALUES (?,?,?,?,?)"
+                " ON CONFLICT(key) DO UPDATE SET value=excluded.value, size=excluded.size,"
+                " expires=excluded.expires, accessed=excluded.accessed",
+                (key, payload, len(payload.encode("utf-8")), now + (self.ttl if ttl is None else ttl), now),
+            )
+            self._stats.stores += 1
+            self._evict(now)
+
+    def _evict(self, now):
+        entries, size = self._usage()
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+        cur = self._db.execute("DELETE FROM advice WHERE expires<=?", (now,))
+        self._stats.evictions += max(cur.rowcount, 0)
+        entries, size = self._usage()
+        victims = []
+        for key, sz in self._db.execute("SELECT key, size FROM advice ORDER BY accessed"):
+            if entries <= self.max_entries and size <= self.max_bytes:
+                break
+            victims.append((key,)); entries -= 1; size -= sz
+        if victims:
+            self._db.executemany("DELETE FROM advice WHERE key=?", victims)
+            self._stats.evictions += len(victims)
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM advice WHERE key=?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM advice")
+
+    def _usage(self):
+        n, size = self._db.execute("SELECT n, bytes FROM advice_usage WHERE id = 1").fetchone()
+        return n, size
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+# ---------- Backends ----------
+BACKENDS = {
+    "sqlite": lambda loc, **kw: SQLiteAdviceCache(loc, **kw),
+    "memory": lambda loc, **kw: MemoryAdviceCache(**kw),
+    "compact": lambda loc, **kw: CompactAdviceStore(**kw),
+}
+
+def register_backend(scheme: str, factory) -> None:
+    # factory(location, ttl=..., max_bytes=..., max_entries=...) -> AdviceCache
+    BACKENDS[scheme] = factory
+
+def open_cache(url: str) -> AdviceCache:
+    # "sqlite:///pad/advice.db?ttl=3600&max_bytes=...", "memory://", "compact://", of gewoon een bestandspad
+    if "://" not in url:
+        url = "sqlite:///" + url
+    p = urlparse(url)
+    opts = {k: int(v) for k, v in parse_qsl(p.query) if k in ("ttl", "max_bytes", "max_entries")}
+    # sqlite:///rel.db -> "rel.db", sqlite:////abs.db -> "/abs.db"
+    loc = p.path[1:] if p.scheme == "sqlite" else p.netloc + p.path
+    if p.scheme not in BACKENDS:
+        raise ValueError(f"Onbekende cache-backend: {p.scheme}")
+    return BACKENDS[p.scheme](loc, **opts)
+
+if __name__ == "__main__":
+    c = open_cache(sys.argv[1] if len(sys.argv) > 1 else os.getenv("ADVICE_CACHE_URL", DEFAULT_CACHE_URL))
+    print(json.dumps(c.stats().as_dict(), indent=2))
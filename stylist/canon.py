@@ -0,0 +1,153 @@
+# stylist/canon.py — URL-canonicalisatie voor cache-keys (tracking-params, varianten, host)
+import sys, json, bisect, hashlib, threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+TRACKING_PARAMS = {
+    "gclid", "gclsrc", "dclid", "fbclid", "msclkid", "yclid", "igshid", "twclid", "ttclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "ref", "ref_src", "referrer", "source", "cmp", "cid",
+    "campaign", "affiliate", "aff_id", "awc", "sc_cid", "wt_mc", "wt.mc_id", "emc", "spm",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_", "epik")
+
+# varianten van hetzelfde product: zelfde advies
+VARIANT_PARAMS = {
+    "color", "colour", "kleur", "size", "maat", "variant", "sizecode", "colorcode",
+    "selectedcolor", "selectedsize", "swatch", "lengte", "length",
+}
+
+# per shop: "keep" = alleen deze params houden (zonder "keep": alles behalve tracking/varianten),
+# "drop" = extra params die voor deze shop niets aan het product veranderen
+SHOP_RULES = {
+    "zalando.nl":    {"keep": set()},
+    "zalando.be":    {"keep": set()},
+    "hm.com":        {"keep": set()},
+    "asos.com":      {"keep": set()},
+    "bol.com":       {"keep": set()},
+    "wehkamp.nl":    {"keep": set()},
+    "aboutyou.nl":   {"keep": set()},
+    "zara.com":      {"keep": {"v1"}},
+    "debijenkorf.nl": {"drop": {"sku"}},
+}
+
+_HOST_PREFIXES = ("www.", "m.", "mobile.")
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+def _norm_host(netloc: str) -> str:
+    host = netloc.rsplit("@", 1)[-1].lower().rstrip(".")
+    name, _, port = host.partition(":")
+    if port and port not in _DEFAULT_PORTS.values():
+        name = f"{name}:{port}"
+    for pre in _HOST_PREFIXES:
+        if name.startswith(pre) and name.count(".") > 1:
+            name = name[len(pre):]
+            break
+    return name
+
+def _shop_rule(host: str) -> dict:
+    # ook subdomeinen (nl.shop.com) vallen onder de regel van shop.com
+    parts = host.split(".")
+    for i in range(len(parts) - 1):
+        rule = SHOP_RULES.get(".".join(parts[i:]))
+        if rule is not None:
+            return rule
+    return {}
+
+def _keep_param(k: str, rule: dict) -> bool:
+    kl = k.lower()
+    if "keep" in rule:
+        return kl in rule["keep"]
+    if kl in TRACKING_PARAMS or kl.startswith(TRACKING_PREFIXES):
+        return False
+    return kl not in VARIANT_PARAMS and kl not in rule.get("drop", ())
+
+def canonicalize_url(u: str) -> str:
+    u = (u or "").strip()
+    if not u:
+        return ""
+    if "://" not in u:
+        u = "https://" + u
+    try:
+        p = urlsplit(u)
+    except ValueError:
+        return u
+    if p.scheme not in ("http", "https") or not p.netloc:
+        return u
+    host = _norm_host(p.netloc)
+    rule = _shop_rule(host)
+    path = "/".join(seg for seg in p.path.split("/") if seg)
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(p.query, keep_blank_values=False) if _keep_param(k, rule)))
+    return urlunsplit(("https", host, "/" + path, query, ""))
+
+# ---------- Rapportage: hoeveel ruwe URLs vallen samen per key ----------
+# Per key een begrensde schets van de ruwe varianten: de K kleinste 64-bit hashes (KMV). Exact tot K (kmv)
+# verschillende varianten, daarna een schatting (~1/sqrt(K) fout); herhalingen tellen nooit opnieuw.
+# Plus een steekproef van een paar ruwe URLs voor top(). Begrensd geheugen in een langlopend proces.
+KMV_SIZE = 64
+_H = float(1 << 64)
+
+def _h64(raw: str) -> int:
+    return int.from_bytes(hashlib.blake2b(raw.encode("utf-8"), digest_size=8).digest(), "big")
+
+def _distinct(mins: list, k: int) -> float:
+    return len(mins) if len(mins) < k else (k - 1) / (mins[-1] / _H)
+
+class CanonReport:
+    def __init__(self, max_keys: int = 10_000, sample: int = 4, kmv: int = KMV_SIZE):
+        self.max_keys, self.sample, self.kmv = max_keys, sample, kmv
+        self._keys = {}         # canonical -> [gesorteerde kleinste hashes, set(steekproef ruwe URLs)]
+        self.requests = 0
+        self.overflow = 0
+        self._lock = threading.Lock()
+
+    def canonicalize(self, u: str) -> str:
+        c = canonicalize_url(u)
+        raw = (u or "").strip()
+        h = _h64(raw)
+        with self._lock:
+            self.requests += 1
+            rec = self._keys.get(c)
+            if rec is None:
+                if len(self._keys) >= self.max_keys:
+                    self.overflow += 1
+                    return c
+                rec = self._keys[c] = [[], set()]
+            mins = rec[0]
+            if len(mins) < self.kmv or h < mins[-1]:
+                i = bisect.bisect_left(mins, h)
+                if i == len(mins) or mins[i] != h:
+                    mins.insert(i, h)
+                    if len(mins) > self.kmv:
+                        mins.pop()
+            if len(rec[1]) < self.sample:
+                rec[1].add(raw)
+        return c
+
+    def summary(self) -> dict:
+        with self._lock:
+            n_raw = round(sum(_distinct(r[0], self.kmv) for r in self._keys.values()))
+            n_keys = len(self._keys)
+            requests = self.requests
+        return {
+            "requests": requests,
+            "raw_urls": n_raw,
+            "canonical_keys": n_keys,
+            "collapsed": n_raw - n_keys,
+            "collapse_ratio": round(1 - n_keys / n_raw, 4) if n_raw else 0.0,
+            "overflow": self.overflow,
+        }
+
+    def top(self, n: int = 20) -> list:
+        with self._lock:
+            rows = [(c, round(_distinct(r[0], self.kmv)), sorted(r[1])) for c, r in self._keys.items() if len(r[0]) > 1]
+        return sorted(rows, key=lambda r: -r[1])[:n]
+
+REPORT = CanonReport()
+
+if __name__ == "__main__":
+    # python -m stylist.canon urls.txt  -> collapse-rapport als JSON
+    rep = CanonReport(max_keys=sys.maxsize, kmv=sys.maxsize)   # exact
+    src = open(sys.argv[1], encoding="utf-8") if len(sys.argv) > 1 else sys.stdin
+    for line in src:
+        if line.strip():
+            rep.canonicalize(line)
+    print(json.dumps({**rep.summary(), "top": rep.top()}, indent=2, ensure_ascii=False))
@@ -0,0 +1,83 @@
+# stylist/cards.py — HTML-bouwers voor de advies- en matching-kaarten (puur, zonder Streamlit)
+from html import escape as html_escape
+
+from .advice import _profile_tags
+from .links import as_list, build_links, _queries_from_combine, _queries_from_products
+
+# ---------- Icons ----------
+DRESS_SVG = """<svg viewBox="0 0 24 24" fill="#556BFF" width="22" height="22" xmlns="http://www.w3.org/2000/svg"><path d="M8 3l1.5 3-2 3 2 11h5l2-11-2-3L16 3h-2l-1 2-1-2H8z"/></svg>"""
+LINK_SVG = """<svg viewBox="0 0 24 24" xmlns="http://www.w3.org/2000/svg">
+<path d="M10 14l-1 1a4 4 0 105.7 5.7l2.6-2.6a4 4 0 00-5.7-5.7l-.6.6" stroke="#6F5BFF" stroke-width="2" stroke-linecap="round" fill="none"/>
+<path d="M14 10l1-1a4 4 0 10-5.7-5.7L6.7 5.9a4 4 0 105.7 5.7l.6-.6" stroke="#6F5BFF" stroke-width="2" stroke-linecap="round" fill="none"/>
+</svg>"""
+
+def esc(x) -> str: return html_escape("" if x is None else str(x))
+
+def _single_card_html(data: dict, profile: dict) -> str:
+    headline = esc(data.get("headline","Advies"))
+    pers = data.get("personal_advice", {})
+    for_you = as_list(pers.get("for_you"))[:3]
+    avoid   = as_list(pers.get("avoid"))[:2]
+    colors  = as_list(pers.get("colors"))[:2]
+    combine = as_list(pers.get("combine"))[:2]
+    tags = _profile_tags(profile)
+
+    tags_html = ""
+    if tags:
+        tags_html = '<div class="tagsrow">' + "".join([f'<span class="tag">{esc(t)}</span>' for t in tags]) + '</div>'
+
+    return (
+        '<div class="card">'
+        f'<div class="card-title">{DRESS_SVG} {headline}</div>'
+        '<div class="card-sub">'
+        f'{tags_html}'
+        '<div class="section-h">• Specifiek advies voor jou</div>'
+        f'<ul>{"".join([f"<li>{esc(x)}</li>" for x in for_you])}</ul>'
+        '<div class="section-h">• Kleur & combineren</div>'
+        f'<ul>{"".join([f"<li>{esc(x)}</li>" for x in colors+combine])}</ul>'
+        '<div class="section-h">• Liever vermijden</div>'
+        f'<ul>{"".join([f"<li>{esc(x)}</li>" for x in avoid])}</ul>'
+        '</div>'
+        '</div>'
+    )
+
+def _matching_links_html(data: dict, link: str) -> str:
+    pers = data.get("personal_advice", {})
+    queries = _queries_from_combine(as_list(pers.get("combine")), max_links=4)
+    if not queries:
+        return ""
+
+    urls = build_links([(link, q) for q in queries])   # alle chips van de kaart in één keer
+    chips_html = [f'<a class="chip" href="{url}" target="_blank" rel="nofollow noopener">{LINK_SVG} Zoek: {esc(q)}</a>'
+                  for q, url in zip(queries, urls)]
+
+    return (
+        '<div class="card matching">'
+        f'<div class="card-title">{DRESS_SVG} Bijpassende kleding (op deze shop)</div>'
+        '<div class="card-sub">'
+        f'<div class="btnrow">{"".join(chips_html)}</div>'
+        '<div class="note">We zoeken eerst binnen deze shop; lukt dat niet, dan via Google.</div>'
+        '</div>'
+        '</div>'
+    )
+
+def _combined_links_html(items: list) -> str:
+    # items: [(product_link, data)] -> één matching-kaart voor de hele mand, zonder dubbele zoekopdrachten
+    pairs = [(link, as_list((data or {}).get("personal_advice", {}).get("combine"))) for link, data in items]
+    queries = _queries_from_products(pairs, max_links=6)
+    if not queries:
+        return ""
+
+    urls = build_links([(link, q) for q, link in queries])
+    chips_html = [f'<a class="chip" href="{url}" target="_blank" rel="nofollow noopener">{LINK_SVG} Zoek: {esc(q)}</a>'
+                  for (q, _), url in zip(queries, urls)]
+
+    return (
+        '<div class="card matching">'
+        f'<div class="card-title">{DRESS_SVG} Bijpassende kleding (hele mand)</div>'
+        '<div class="card-sub">'
+        f'<div class="btnrow">{"".join(chips_html)}</div>'
+        '<div class="note">Elke zoekopdracht opent in de shop van het product waar hij bij hoort.</div>'
+        '</div>'
+        '</div>'
+    )
@@ -0,0 +1,157 @@
+# stylist/fakellm.py — lokale stand-in voor de OpenAI chat-completions API (benchmarks, replay)
+#
+#   python -m stylist.fakellm --port 8900 --latency-ms 400 --token-ms 8 --error-rate 0.05
+#
+# Antwoordt met schema-conform advies (via de lokale regel-engine), optioneel gestreamd (SSE),
+# met instelbare latency, token-snelheid en foutinjectie (429/500/kapotte JSON).
+import sys, json, time, random, argparse, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .local import local_advice
+
+class FakeConfig:
+    def __init__(self, latency_ms=300.0, token_ms=5.0, error_rate=0.0, malformed_rate=0.0, seed=None):
+        self.latency_ms = latency_ms          # tijd tot eerste token
+        self.token_ms = token_ms              # per gestreamd stukje (~4 tekens)
+        self.error_rate = error_rate          # kans op 429/500
+        self.malformed_rate = malformed_rate  # kans op afgekapte JSON
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def roll(self, p: float) -> bool:
+        with self.lock:
+            return self.rng.random() < p
+
+def _keywords(messages: list) -> str:
+    for m in messages:
+        for line in (m.get("content") or "").splitlines():
+            if line.startswith("Keywords:"):
+                return line.split(":", 1)[1].strip()
+    return "fashion"
+
+def _usage(messages: list, text: str) -> dict:
+    prompt = sum(len(m.get("content") or "") for m in messages) // 4
+    completion = max(1, len(text) // 4)
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+class FakeHandler(BaseHTTPRequestHandler):
+    cfg = FakeConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _json(self, status: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._json(404, {"error": {"message": "not found"}})
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        cfg = self.cfg
+        with cfg.lock:
+            cfg.calls += 1
+        time.sleep(cfg.latency_ms / 1000.0)
+        if cfg.roll(cfg.error_rate):
+            with cfg.lock:
+                cfg.errors += 1
+            status = 429 if cfg.roll(0.5) else 500
+            return self._json(status, {"error": {"message": "injected", "type": "fake", "code": status}})
+
+        messages = req.get("messages") or []
+        text = json.dumps(local_advice(_keywords(messages), {}), ensure_ascii=False)
+        if cfg.roll(cfg.malformed_rate):
+            text = text[: len(text) * 2 // 3]
+        usage = _usage(messages, text)
+        base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": req.get("model", "fake")}
+
+        if not req.get("stream"):
+            if cfg.token_ms:
+                time.sleep(cfg.token_ms * usage["completion_tokens"] / 1000.0)
+            return self._json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [
+                {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}]})
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def event(obj):
+            self.wfile.write(b"data: " + json.dumps(obj).encode("utf-8") + b"\n\n")
+            self.wfile.flush()
+
+        for i in range(0, len(text), 4):
+            event({**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {"content": text[i:i + 4]}, "finish_reason": None}]})
+            if cfg.token_ms:
+                time.sleep(cfg.token_ms / 1000.0)
+        event({**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (req.get("stream_options") or {}).get("include_usage"):
+            event({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+class FakeLLM:
+    # with FakeLLM(latency_ms=50) as fake: client = fake.client()
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **cfg):
+        self.cfg = FakeConfig(**cfg)
+        handler = type("Handler", (FakeHandler,), {"cfg": self.cfg})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def client(self):
+        from openai import OpenAI
+        return OpenAI(api_key="sk-fake", base_url=self.base_url, max_retries=0)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m stylist.fakellm", description="Lokale nep-OpenAI chat-completions server.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8900)
+    ap.add_argument("--latency-ms", type=float, default=300.0)
+    ap.add_argument("--token-ms", type=float, default=5.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--malformed-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args(argv)
+    fake = FakeLLM(args.host, args.port, latency_ms=args.latency_ms, token_ms=args.token_ms,
+                   error_rate=args.error_rate, malformed_rate=args.malformed_rate, seed=args.seed)
+    print(f"Nep-LLM op {fake.base_url} (zet OPENAI_BASE_URL hierop)", file=sys.stderr)
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# stylist/gate.py — proces-brede toegangspoort voor upstream LLM-calls
+#
+# Eén token-bucket op requests/min en één op (geschatte) tokens/min voor álle sessies in het proces,
+# een prioriteitswachtrij (interactief vóór batch vóór achtergrond) en load shedding:
+# bij een te lange rij of te lange wachttijd volgt Overloaded en serveert de aanroeper de fallback.
+import os, heapq, itertools, threading, time
+
+from .metrics import METRICS
+from .ratelimit import TokenBucket
+from .resilience import Overloaded
+
+PRIORITY_INTERACTIVE = 0   # paneel/pagina: gebruiker kijkt mee
+PRIORITY_BATCH = 1         # winkelmand
+PRIORITY_BACKGROUND = 2    # prewarm / speculatief vooruit ophalen
+PRIORITY_NAMES = {0: "interactive", 1: "batch", 2: "background"}
+
+class LLMGate:
+    def __init__(self, rpm: float = 500, tpm: float = 200_000, max_queue: int = 64, burst: float = None):
+        self.max_queue = max_queue
+        self.configure(rpm, tpm, burst=burst)
+        self._heap = []            # (priority, seq, waiter)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.depth = 0
+        self.admitted = 0
+        self.shed = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(rpm=float(os.getenv("LLM_RPM", "500")), tpm=float(os.getenv("LLM_TPM", "200000")),
+                   max_queue=int(os.getenv("LLM_MAX_QUEUE", "64")))
+
+    def configure(self, rpm: float, tpm: float, max_queue: int = None, burst: float = None):
+        self.requests = TokenBucket(rpm, burst=burst if burst is not None else max(1.0, rpm / 10))
+        self.tokens = TokenBucket(tpm, burst=max(1.0, tpm / 10))
+        if max_queue is not None:
+            self.max_queue = max_queue
+
+    def _limit(self, priority: int) -> int:
+        # achtergrondwerk wordt eerder geweigerd, zodat er altijd plek blijft voor interactief
+        return self.max_queue if priority <= PRIORITY_INTERACTIVE else max(1, self.max_queue >> priority)
+
+    def _shed(self, priority: int, reason: str):
+        self.shed += 1
+        METRICS.inc("stylist_llm_shed_total", priority=PRIORITY_NAMES.get(priority, priority), reason=reason)
+        raise Overloaded(f"LLM-wachtrij {reason} (prioriteit {priority})")
+
+    def acquire(self, est_tokens: float, priority: int = PRIORITY_INTERACTIVE, timeout: float = None) -> float:
+        # blokkeert tot dit verzoek aan de beurt is én beide buckets ruimte hebben; geeft de wachttijd terug
+        t0 = time.monotonic()
+        deadline = None if timeout is None else t0 + timeout
+        waiter = [False]   # [geannuleerd]
+        with self._cond:
+            if self.depth >= self._limit(priority):
+                self._shed(priority, "vol")
+            heapq.heappush(self._heap, (priority, next(self._seq), waiter))
+            self.depth += 1
+            try:
+                while True:
+                    while self._heap and self._heap[0][2][0]:
+                        heapq.heappop(self._heap)   # geannuleerde wachters opruimen
+                    wait = 0.25
+                    if self._heap[0][2] is waiter:
+                        wait = self.requests.try_acquire(1)
+                        if wait == 0.0:
+                            wait = self.tokens.try_acquire(est_tokens)
+                            if wait == 0.0:
+                                heapq.heappop(self._heap)
+                                self.admitted += 1
+                                self._cond.notify_all()
+                                break
+                            self.requests.charge(-1)   # request-token teruggeven
+                    if deadline is not None:
+                        left = deadline - time.monotonic()
+                        if left <= 0 or (self._heap[0][2] is waiter and wait > left):
+                            waiter[0] = True
+                            self._cond.notify_all()
+                            self._shed(priority, "timeout")
+                        wait = min(wait, left)
+                    self._cond.wait(wait)
+            finally:
+                self.depth -= 1
+        waited = time.monotonic() - t0
+        METRICS.observe("stylist_llm_queue_wait_seconds", waited, priority=PRIORITY_NAMES.get(priority, priority))
+        return waited
+
+    def release(self, est_tokens: float):
+        # toegelaten maar nooit verstuurd (bv. budget op na het wachten): request en tokens teruggeven
+        self.requests.charge(-1)
+        self.tokens.charge(-est_tokens)
+
+    def settle(self, est_tokens: float, used_tokens: float):
+        # werkelijk verbruik verrekenen met de schatting (beide kanten op)
+        if used_tokens:
+            self.tokens.charge(used_tokens - est_tokens)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"queue_depth": self.depth, "admitted": self.admitted, "shed": self.shed}
+
+GATE = LLMGate.from_env()
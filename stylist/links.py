@@ -0,0 +1,104 @@
+# stylist/links.py — zoeklinks binnen de shop + queries uit de "combine"-bullets
+import re, threading
+from urllib.parse import urlparse, urlsplit, quote
+
+from .canon import _norm_host
+from .shops import REGISTRY
+
+def as_list(v): return v if isinstance(v, list) else ([] if v is None else [v])
+
+def _shop_searches(u: str, query: str, limit=1):
+    # zoek-URL volgens de template van deze shop (stylist.shops); [] als er geen is
+    found = REGISTRY.search_url(u, query)
+    return [found][:limit] if found else []
+
+def _google_fallback(u: str, query: str):
+    p = urlparse(u); host = p.netloc
+    q = quote(f"site:{host} {query}")
+    return f"https://www.google.com/search?q={q}"
+
+# ---------- Hoe vaak nog via Google ----------
+class LinkStats:
+    def __init__(self, max_hosts: int = 1000):
+        self.max_hosts = max_hosts
+        self.shop = self.google = 0
+        self._hosts = {}   # host -> aantal Google-fallbacks
+        self._lock = threading.Lock()
+
+    def observe(self, host: str, fallback: bool):
+        with self._lock:
+            if not fallback:
+                self.shop += 1
+                return
+            self.google += 1
+            if host in self._hosts or len(self._hosts) < self.max_hosts:
+                self._hosts[host] = self._hosts.get(host, 0) + 1
+
+    def top_fallback_hosts(self, n: int = 20) -> list:
+        with self._lock:
+            return sorted(self._hosts.items(), key=lambda kv: -kv[1])[:n]
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            total = self.shop + self.google
+            return {"shop": self.shop, "google": self.google, "fallback_hosts": len(self._hosts),
+                    "google_rate": round(self.google / total, 4) if total else 0.0}
+
+LINK_STATS = LinkStats()
+
+def build_links(pairs) -> list:
+    # pairs: [(product_link, query)] -> zoek-URL per paar; elke productlink wordt één keer geparsed
+    parsed, out = {}, []
+    for u, query in pairs:
+        p = parsed.get(u)
+        if p is None:
+            p = parsed[u] = urlsplit(u)
+        url = REGISTRY.search_url(u, query, parts=p)
+        LINK_STATS.observe(_norm_host(p.netloc), url is None)
+        out.append(url or _google_fallback(u, query))
+    return out
+
+def _build_link_or_fallback(u: str, query: str):
+    return build_links([(u, query)])[0]
+
+# veilige normalisatie
+def _normalize_query_piece(p: str) -> str:
+    if not isinstance(p, str):
+        p = str(p or "")
+    p = re.sub(r"[^\w\s-]+", "", p, flags=re.UNICODE)
+    p = re.sub(r"\s+", " ", p).strip()
+    return p
+
+_SEP_RE = re.compile(r"\b(?:of|en|,|/|\+|&)\b", re.IGNORECASE)
+def _query_from_bullet(text: str):
+    s = str(text or "")
+    parts = _SEP_RE.split(s)
+    out = []
+    for p in parts:
+        p = _normalize_query_piece(p)
+        if len(p) >= 3:
+            out.append(p)
+    return out[:2]
+
+def _queries_from_combine(bullets, max_links=4):
+    seen, out = set(), []
+    for b in as_list(bullets):
+        for q in _query_from_bullet(b):
+            qn = q.lower()
+            if qn not in seen:
+                out.append(q); seen.add(qn)
+            if len(out) >= max_links:
+                return out
+    return out
+
+def _queries_from_products(items, max_links=6):
+    # items: [(product_link, combine_bullets)] -> [(query, product_link)], gededupliceerd over producten heen
+    per = [_queries_from_combine(bullets, max_links=max_links) for _, bullets in items]
+    seen, out = set(), []
+    for rank in range(max((len(q) for q in per), default=0)):   # om en om: elk product komt aan bod
+        for (link, _), queries in zip(items, per):
+            if rank < len(queries) and queries[rank].lower() not in seen:
+                out.append((queries[rank], link)); seen.add(queries[rank].lower())
+                if len(out) >= max_links:
+                    return out
+    return out
@@ -0,0 +1,39 @@
+# stylist/llmclient.py — gedeelde, lui aangemaakte OpenAI-client per proces
+#
+# `import openai` kost honderden ms bij een koude start; LazyClient stelt dat uit tot de eerste
+# echte LLM-call (een pagina zonder link of met een cache-hit importeert openai nooit). Alle sessies
+# delen één client en dus één httpx-verbindingspool (keep-alive naar de API).
+import os, threading
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_KEEPALIVE = int(os.getenv("LLM_KEEPALIVE", "16"))
+
+_clients = {}
+_lock = threading.Lock()
+
+def shared_client(api_key: str, base_url: str = None):
+    key = (api_key, base_url)
+    c = _clients.get(key)
+    if c is None:
+        with _lock:
+            c = _clients.get(key)
+            if c is None:
+                import httpx
+                from openai import DefaultHttpxClient, OpenAI
+                limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_KEEPALIVE)
+                # retries/timeouts via stylist.resilience; base_url=None -> OPENAI_BASE_URL of de standaard
+                c = _clients[key] = OpenAI(api_key=api_key, base_url=base_url, max_retries=0,
+                                           http_client=DefaultHttpxClient(limits=limits))
+    return c
+
+class LazyClient:
+    # gedraagt zich als de OpenAI-client; bouwt (en importeert) pas bij het eerste attribuut
+    def __init__(self, api_key: str, base_url: str = None):
+        self._api_key, self._base_url = api_key, base_url
+
+    def __getattr__(self, name):
+        return getattr(shared_client(self._api_key, self._base_url), name)
+
+    @property
+    def loaded(self) -> bool:
+        return (self._api_key, self._base_url) in _clients
@@ -0,0 +1,164 @@
+# stylist/local.py — deterministische lokale advies-engine (eerste paint + fallback zonder LLM)
+#
+# URL-keywords + profielvelden -> regels uit een vaste lexicon-tabel -> zelfde schema als het LLM.
+import re
+
+# ---------- Lexicon: keyword -> categorie ----------
+CATEGORY_WORDS = {
+    "broek":   ("broek", "chino", "chinos", "pantalon", "trousers", "pants", "cargo", "joggers", "jogger"),
+    "jeans":   ("jeans", "denim", "spijkerbroek"),
+    "short":   ("short", "shorts", "bermuda"),
+    "shirt":   ("overhemd", "shirt", "blouse", "oxford"),
+    "tshirt":  ("tshirt", "tee", "tees", "polo", "longsleeve", "top"),
+    "trui":    ("trui", "sweater", "hoodie", "sweatshirt", "vest", "cardigan", "pullover", "knit", "gebreid"),
+    "jas":     ("jas", "jacket", "jack", "coat", "parka", "bomber", "trenchcoat", "overshirt", "mantel"),
+    "blazer":  ("blazer", "colbert", "suit", "kostuum", "pak"),
+    "jurk":    ("jurk", "dress", "maxi", "midi", "mini"),
+    "rok":     ("rok", "skirt"),
+    "schoen":  ("sneaker", "sneakers", "schoen", "schoenen", "shoes", "boots", "laarzen", "loafers", "instappers"),
+}
+_WORD2CAT = {w: cat for cat, words in CATEGORY_WORDS.items() for w in words}
+
+FIT_WORDS = {
+    "slim": "Slim", "skinny": "Slim", "tapered": "Slim",
+    "regular": "Regular", "straight": "Regular", "classic": "Regular",
+    "relaxed": "Relaxed", "loose": "Relaxed", "wide": "Relaxed", "oversized": "Relaxed", "baggy": "Relaxed",
+}
+
+COLOR_WORDS = {
+    "navy": "navy", "donkerblauw": "navy", "blauw": "blauw", "blue": "blauw", "zwart": "zwart", "black": "zwart",
+    "wit": "wit", "white": "wit", "ecru": "ecru", "beige": "beige", "sand": "beige", "zand": "beige",
+    "camel": "camel", "bruin": "bruin", "brown": "bruin", "groen": "groen", "green": "groen", "olijf": "olijf",
+    "olive": "olijf", "khaki": "khaki", "grijs": "grijs", "grey": "grijs", "gray": "grijs", "antraciet": "grijs",
+    "rood": "rood", "red": "rood", "bordeaux": "bordeaux", "burgundy": "bordeaux", "roze": "roze", "pink": "roze",
+    "geel": "geel", "yellow": "geel", "oranje": "oranje", "orange": "oranje", "paars": "paars", "purple": "paars",
+}
+NEUTRALS = {"navy", "zwart", "wit", "ecru", "beige", "camel", "bruin", "grijs", "khaki"}
+
+# ---------- Regels per categorie ----------
+CATEGORY_RULES = {
+    "broek":  {"for_you": "Kies een broek die recht valt over je schoen",
+               "avoid":   "Vermijd te lange pijpen die plooien bij de enkel",
+               "combine": ["Basic t-shirt of polo", "Sneakers of loafers"]},
+    "jeans":  {"for_you": "Kies donkere wassing voor een nettere uitstraling",
+               "avoid":   "Vermijd zware destroyed-details voor dagelijks gebruik",
+               "combine": ["Wit t-shirt of overhemd", "Sneakers of boots"]},
+    "short":  {"for_you": "Kies lengte net boven de knie",
+               "avoid":   "Vermijd te wijde pijpen bij slanke benen",
+               "combine": ["Linnen overhemd of polo", "Witte sneakers of instappers"]},
+    "shirt":  {"for_you": "Let op schoudernaad precies op je schouder",
+               "avoid":   "Vermijd trekkende knopen over borst of buik",
+               "combine": ["Chino of donkere jeans", "Blazer of fijngebreide trui"]},
+    "tshirt": {"for_you": "Kies stevige katoen die niet doorschijnt",
+               "avoid":   "Vermijd te korte lengte boven de broekband",
+               "combine": ["Jeans of chino", "Overshirt of open jas"]},
+    "trui":   {"for_you": "Kies een trui die net over de heup valt",
+               "avoid":   "Vermijd dikke breisels bij een brede bovenkant",
+               "combine": ["Overhemd of t-shirt eronder", "Chino of jeans"]},
+    "jas":    {"for_you": "Pas met een trui eronder voor genoeg ruimte",
+               "avoid":   "Vermijd mouwen die over je duim vallen",
+               "combine": ["Trui of hoodie", "Jeans of chino"]},
+    "blazer": {"for_you": "Laat schouders en mouwlengte goed aansluiten",
+               "avoid":   "Vermijd blazers die trekken bij de knoop",
+               "combine": ["Wit overhemd of fijne trui", "Pantalon of donkere jeans"]},
+    "jurk":   {"for_you": "Kies een taille die bij je natuurlijke taille zit",
+               "avoid":   "Vermijd stof die spant over heup of buik",
+               "combine": ["Jeansjack of blazer", "Sneakers of sandalen"]},
+    "rok":    {"for_you": "Kies lengte die bij je gelegenheid past",
+               "avoid":   "Vermijd stijve stof bij bredere heupen",
+               "combine": ["Tucked-in top of blouse", "Sneakers of laarzen"]},
+    "schoen": {"for_you": "Kies een model dat je outfit rustig afmaakt",
+               "avoid":   "Vermijd te drukke zolen bij nette outfits",
+               "combine": ["Chino of jeans", "Basic t-shirt of trui"]},
+    None:     {"for_you": "Kies een tijdloos model dat je vaak draagt",
+               "avoid":   "Vermijd te felle, drukke prints",
+               "combine": ["Jeans of chino", "Basic t-shirt of hoodie"]},
+}
+
+FIT_RULES = {
+    "Slim":    "Slim fit: kies net wat stretch voor bewegingsvrijheid",
+    "Regular": "Regular fit: rechte lijn, niet te strak of wijd",
+    "Relaxed": "Relaxed fit: balanceer met een strakker ander item",
+}
+
+BOUW_RULES = {
+    "Slank":             ("Laagjes geven je silhouet meer volume", "Vermijd heel wijde, vormeloze items"),
+    "Gemiddeld":         ("Houd proporties in balans, boven en onder", "Vermijd te veel volume tegelijk"),
+    "Atletisch":         ("Kies stretch rond schouders en dijen", "Vermijd stijve stof over armen en borst"),
+    "Bredere schouders": ("Kies rechte lijnen en V-hals", "Vermijd schouderstukken en horizontale strepen"),
+    "Bredere heupen":    ("Kies rechte of licht uitlopende pijpen", "Vermijd opvallende details op de heup"),
+}
+
+HUIDTINT_COLORS = {
+    "Koel":     ("Koel: navy, grijs, ijsblauw", "Accent: bordeaux of smaragd"),
+    "Warm":     ("Warm: camel, olijf, ecru", "Accent: roest of mosterd"),
+    "Neutraal": ("Neutraal: navy, ecru, grijs", "Accent: olijf of bordeaux"),
+}
+
+GELEGENHEID_COMBINE = {
+    "Werk":      "Maak het af met blazer of net overhemd",
+    "Feest":     "Combineer met leren schoen of statement-jas",
+    "Dagelijks": "Houd het simpel met sneakers",
+}
+
+_URL_NOISE = {"html", "htm", "php", "aspx", "jsp", "product", "productpage", "p", "nl", "en"}
+
+def _words(keywords: str) -> list:
+    return [w for w in re.split(r"[^\w]+", (keywords or "").lower()) if w]
+
+def _detect(words: list, table: dict):
+    for w in words:
+        if w in table:
+            return table[w]
+    return None
+
+def local_advice(keywords: str, profile: dict) -> dict:
+    # keywords zoals _keywords_from_url ze geeft; profiel zoals DEFAULT_PROFILE
+    p = profile or {}
+    words = _words(keywords)
+    cat = _detect(words, _WORD2CAT)
+    url_fit = _detect(words, FIT_WORDS)
+    url_color = _detect(words, COLOR_WORDS)
+    rule = CATEGORY_RULES[cat]
+    fit = (p.get("fit") or "").strip() or url_fit
+    bouw = (p.get("bouw") or "").strip()
+    huid = (p.get("huidtint") or "").strip()
+    pref = [c.strip() for c in (p.get("kleuren") or "").split(",") if c.strip()]
+    occasion = (p.get("gelegenheid") or "").strip()
+
+    for_you = [rule["for_you"]]
+    if fit in FIT_RULES:
+        for_you.append(FIT_RULES[fit])
+    if bouw in BOUW_RULES:
+        for_you.append(BOUW_RULES[bouw][0])
+    for_you.append("Stem kleur af op je huidtint" if not huid else f"Kies tinten die bij een {huid.lower()} huidtint passen")
+
+    avoid = [rule["avoid"]]
+    if bouw in BOUW_RULES:
+        avoid.insert(0, BOUW_RULES[bouw][1])
+    if fit == "Slim":
+        avoid.append("Vermijd maat kleiner nemen voor een strakker effect")
+    avoid.append("Vermijd te veel drukke details tegelijk")
+
+    colors = []
+    if url_color:
+        colors.append(f"Dit item in {url_color}: combineer met rustige basis"
+                      if url_color not in NEUTRALS else f"{url_color.capitalize()} is veelzijdig: combineer vrij")
+    if pref:
+        colors.append(f"Jouw voorkeur: {', '.join(pref[:2])}")
+    colors.extend(HUIDTINT_COLORS.get(huid, HUIDTINT_COLORS["Neutraal"]))
+
+    combine = list(rule["combine"])
+    if occasion in GELEGENHEID_COMBINE:
+        combine.insert(1, GELEGENHEID_COMBINE[occasion])
+
+    name = " ".join([w.capitalize() for w in words if w not in _URL_NOISE][:4])
+    return {
+        "headline": f"{name}: snel stijl-advies" if name else "Snel stijl-advies",
+        "personal_advice": {
+            "for_you": for_you[:3],
+            "avoid":   avoid[:2],
+            "colors":  colors[:2],
+            "combine": combine[:2],
+        },
+    }
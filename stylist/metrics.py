@@ -0,0 +1,296 @@
+# stylist/metrics.py — stage-timers, token/kosten-tellers, Prometheus-tekst en per-request logregels
+#
+#   with timer("llm_call"): ...          -> stylist_stage_seconds{stage="llm_call"} + logregel-veld
+#   @timed("render_single_card")          -> idem voor een hele functie
+#   with request("api", url=link): ...    -> één JSON-logregel per request (logger "stylist.requests")
+#
+# Scrapen: GET /metrics op de advies-API, of METRICS_PORT=9108 voor de Streamlit-app.
+import sys, json, time, logging, threading, contextvars
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS = (.001, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+# USD per 1M tokens (input, output); onbekend model telt tokens maar geen kosten
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o":      (2.50, 10.00),
+}
+
+HELP = {
+    "stylist_stage_seconds":           ("histogram", "Duur per pipeline-stap"),
+    "stylist_advice_requests_total":   ("counter", "Adviesverzoeken per cache-uitkomst en modus"),
+    "stylist_advice_fallbacks_total":  ("counter", "Adviesverzoeken die op een fallback uitkwamen"),
+    "stylist_llm_tokens_total":        ("counter", "Tokens volgens resp.usage"),
+    "stylist_llm_cost_usd_total":      ("counter", "Geschatte kosten in USD volgens PRICES"),
+    "stylist_requests_total":          ("counter", "Afgeronde requests per soort"),
+    "stylist_llm_queue_wait_seconds":  ("histogram", "Wachttijd in de LLM-wachtrij per prioriteit"),
+    "stylist_llm_shed_total":          ("counter", "Door load shedding geweigerde LLM-calls"),
+    "stylist_prefetch_total":          ("counter", "Speculatieve prefetches per uitkomst"),
+    "stylist_llm_parse_total":         ("counter", "Model-output per parse-uitkomst (clean/repaired/fallback)"),
+}
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in sorted(labels.items())) + "}"
+
+class Metrics:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}   # (name, labels) -> waarde
+        self._hists = {}      # (name, labels) -> [bucket-tellingen..., sum, count]
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._hists.get(key)
+            if h is None:
+                h = self._hists[key] = [0] * (len(self.buckets) + 2)
+            for i, b in enumerate(self.buckets):
+                if seconds <= b:
+                    h[i] += 1
+            h[-2] += seconds
+            h[-1] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"counters": dict(self._counters), "histograms": {k: list(v) for k, v in self._hists.items()}}
+
+    def render(self) -> str:
+        snap, out, seen = self.snapshot(), [], set()
+
+        def header(name):
+            if name not in seen:
+                seen.add(name)
+                kind, text = HELP.get(name, ("untyped", name))
+                out.append(f"# HELP {name} {text}")
+                out.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), v in sorted(snap["counters"].items()):
+            header(name)
+            out.append(f"{name}{_labels(dict(labels))} {v:g}")
+        for (name, labels), h in sorted(snap["histograms"].items()):
+            header(name)
+            lab = dict(labels)
+            for b, n in zip(self.buckets, h):
+                out.append(f"{name}_bucket{_labels({**lab, 'le': f'{b:g}'})} {n}")
+            out.append(f"{name}_bucket{_labels({**lab, 'le': '+Inf'})} {h[-1]}")
+            out.append(f"{name}_sum{_labels(lab)} {h[-2]:.6f}")
+            out.append(f"{name}_count{_labels(lab)} {h[-1]}")
+        return "\n".join(out) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._hists.clear()
+
+METRICS = Metrics()
+
+# ---------- Per-request context ----------
+_current = contextvars.ContextVar("stylist_request", default=None)
+_merge_lock = threading.Lock()   # worker-threads (bind) tellen tegelijk op bij dezelfde request
+_SUMMED = ("prompt_tokens", "completion_tokens", "cost_usd")
+LOG = logging.getLogger("stylist.requests")
+
+def begin_request(kind: str, **fields):
+    req = {"kind": kind, "t0": time.perf_counter(), "stages": {}, **fields}
+    return _current.set(req)
+
+def end_request(token, **fields):
+    req = _current.get()
+    try:
+        _current.reset(token)
+    except ValueError:   # token uit een andere context (bv. afgebroken Streamlit-run)
+        _current.set(None)
+    if req is None:
+        return None
+    req.update(fields)
+    dur = time.perf_counter() - req.pop("t0")
+    METRICS.inc("stylist_requests_total", kind=req["kind"])
+    req = {"ts": round(time.time(), 3), "dur_ms": round(dur * 1000, 2), **req,
+           "stages": {k: round(v, 2) for k, v in req["stages"].items()}}
+    if LOG.isEnabledFor(logging.INFO):
+        LOG.info(json.dumps(req, ensure_ascii=False, separators=(",", ":"), default=str))
+    return req
+
+@contextmanager
+def request(kind: str, **fields):
+    token = begin_request(kind, **fields)
+    try:
+        yield
+    finally:
+        end_request(token)
+
+@contextmanager
+def capture():
+    # geneste scope (bv. één adviesverzoek binnen een batch-request): eigen stage-timings en velden,
+    # die bij het verlaten ook bij de omsluitende request worden opgeteld
+    parent = _current.get()
+    rec = {"t0": time.perf_counter(), "stages": {}}
+    token = _current.set(rec)
+    try:
+        yield rec
+    finally:
+        _current.reset(token)
+        rec["dur_ms"] = (time.perf_counter() - rec.pop("t0")) * 1000
+        if parent is not None:
+            with _merge_lock:
+                for k, v in rec["stages"].items():
+                    parent["stages"][k] = parent["stages"].get(k, 0.0) + v
+                # tokens/kosten optellen (batch: som over de producten); cache-uitkomsten tellen
+                summed = {k: parent.get(k, 0) + rec[k] for k in _SUMMED if k in rec}
+                if rec.get("cache"):
+                    caches = parent.setdefault("caches", {})
+                    caches[rec["cache"]] = caches.get(rec["cache"], 0) + 1
+                parent.update({k: v for k, v in rec.items() if k not in ("stages", "dur_ms", "caches")}, **summed)
+                if "cost_usd" in summed:
+                    parent["cost_usd"] = round(parent["cost_usd"], 6)
+
+def bind(fn):
+    # voor ThreadPoolExecutor: workers erven de contextvar niet. bind() (in de indienende thread aanroepen)
+    # draait fn in een kopie van de huidige context, in een eigen capture()-scope die bij de request optelt.
+    ctx = contextvars.copy_context()
+    def run(*a, **kw):
+        def scoped():
+            with capture():
+                return fn(*a, **kw)
+        return ctx.run(scoped)
+    return run
+
+def annotate(**fields):
+    req = _current.get()
+    if req is not None:
+        req.update(fields)
+
+@contextmanager
+def timer(stage: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        METRICS.observe("stylist_stage_seconds", dt, stage=stage)
+        req = _current.get()
+        if req is not None:
+            with _merge_lock:
+                req["stages"][stage] = req["stages"].get(stage, 0.0) + dt * 1000
+
+def timed(stage: str = None):
+    def deco(fn):
+        name = stage or fn.__name__
+        @wraps(fn)
+        def wrapper(*a, **kw):
+            with timer(name):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
+
+# ---------- Domeintellers ----------
+def cost_usd(model: str, usage: dict) -> float:
+    p_in, p_out = PRICES.get(model, (0.0, 0.0))
+    return (usage.get("prompt_tokens", 0) * p_in + usage.get("completion_tokens", 0) * p_out) / 1e6
+
+def record_usage(model: str, usage: dict):
+    if not usage:
+        return
+    for kind in ("prompt", "completion"):
+        METRICS.inc("stylist_llm_tokens_total", usage.get(f"{kind}_tokens", 0), model=model, kind=kind)
+    cost = cost_usd(model, usage)
+    METRICS.inc("stylist_llm_cost_usd_total", cost, model=model)
+    annotate(model=model, prompt_tokens=usage.get("prompt_tokens", 0),
+             completion_tokens=usage.get("completion_tokens", 0), cost_usd=round(cost, 6))
+
+def record_advice(meta: dict, mode: str):
+    METRICS.inc("stylist_advice_requests_total", cache=meta.get("cache", "?"), mode=mode)
+    if meta.get("fallback"):
+        METRICS.inc("stylist_advice_fallbacks_total", mode=mode)
+    annotate(cache=meta.get("cache"), fallback=bool(meta.get("fallback")), mode=mode,
+             **({"error": meta["error"]} if meta.get("error") else {}))
+
+# ---------- Export ----------
+GAUGES = {}   # prefix -> fn() -> {naam: waarde}; voor stores die pas in de app ontstaan
+
+def register_gauges(prefix: str, fn):
+    GAUGES[prefix] = fn
+
+def _gauges() -> list:
+    # bestaande stats van resilience/singleflight/streaming/links/canon als gauges
+    from .canon import REPORT as CANON_REPORT
+    from .gate import GATE
+    from .links import LINK_STATS
+    from .resilience import stats as resilience_stats
+    from .profiles import KEY_STATS
+    from .singleflight import FLIGHT
+    from .streaming import STREAM_STATS
+    res = resilience_stats()
+    breaker = res.pop("breaker")
+    rows = [(f"stylist_upstream_{k}", v) for k, v in res.items()]
+    rows += [("stylist_breaker_open", int(breaker["state"] != "closed")),
+             ("stylist_breaker_opens", breaker["opens"]),
+             ("stylist_breaker_short_circuits", breaker["short_circuits"])]
+    rows += [(f"stylist_flight_{k}", v) for k, v in FLIGHT.stats().items()]
+    rows += [(f"stylist_llm_{k}", v) for k, v in GATE.stats().items()]
+    rows += [(f"stylist_stream_{k}", v) for k, v in STREAM_STATS.as_dict().items()]
+    rows += [(f"stylist_profile_{k}", v) for k, v in KEY_STATS.as_dict().items()]
+    rows += [(f"stylist_links_{k}", v) for k, v in LINK_STATS.as_dict().items()]
+    rows += [(f"stylist_canon_{k}", v) for k, v in CANON_REPORT.summary().items()]
+    for prefix, fn in list(GAUGES.items()):
+        rows += [(f"{prefix}_{k}", v) for k, v in fn().items() if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    return rows
+
+def render_prometheus(cache=None, similar=None) -> str:
+    lines = [METRICS.render().rstrip("\n")]
+    rows = _gauges()
+    if cache is not None:
+        rows += [(f"stylist_cache_{k}", v) for k, v in cache.stats().as_dict().items()
+                 if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    if similar is not None:
+        rows += [(f"stylist_similar_{k}", v) for k, v in similar.stats().items()]
+    for name, v in rows:
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {v:g}")
+    return "\n".join(l for l in lines if l) + "\n"
+
+_log_handler = None
+
+def enable_request_log(stream=None):
+    # idempotent: Streamlit voert de module bij elke rerun opnieuw uit
+    global _log_handler
+    if _log_handler is None:
+        _log_handler = logging.StreamHandler(stream or sys.stderr)
+        _log_handler.setFormatter(logging.Formatter("%(message)s"))
+        LOG.addHandler(_log_handler)
+        LOG.setLevel(logging.INFO)
+        LOG.propagate = False
+    return LOG
+
+def serve_metrics(port: int, host: str = "127.0.0.1", cache=None, similar=None) -> ThreadingHTTPServer:
+    # losse scrape-endpoint in een daemon-thread (voor processen zonder eigen HTTP-server)
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus(cache, similar).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    srv = ThreadingHTTPServer((host, port), Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
@@ -0,0 +1,76 @@
+# stylist/prefetch.py — speculatief advies vooruit ophalen (na een profielwijziging, of op ping van de extensie)
+#
+# Begrensd: max. `workers` tegelijk, max. `max_pending` in de rij (daarna vallen pings af), dubbele
+# (link, profiel)-combinaties lopen maar één keer. Upstream-calls gaan met PRIORITY_BACKGROUND door de gate.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .advice import DEFAULT_MODE, LLM_TIMEOUT, MODEL, _profile_hash, get_advice
+from .cache import cache_key
+from .canon import canonicalize_url
+from .gate import PRIORITY_BACKGROUND
+from .metrics import METRICS, request
+
+PREFETCH_WORKERS = 2
+PREFETCH_MAX_PENDING = 16
+
+class Prefetcher:
+    def __init__(self, workers: int = PREFETCH_WORKERS, max_pending: int = PREFETCH_MAX_PENDING):
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prefetch")
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.counts = {"submitted": 0, "cached": 0, "deduplicated": 0, "dropped": 0, "done": 0, "failed": 0}
+
+    def _count(self, name: str):
+        METRICS.inc("stylist_prefetch_total", outcome=name)
+        with self._lock:
+            self.counts[name] += 1
+
+    def prefetch(self, client, links: list, profile: dict, cache, model: str = MODEL, mode: str = DEFAULT_MODE,
+                 timeout: float = LLM_TIMEOUT, similar=None) -> int:
+        # niet-blokkerend; geeft het aantal ingeplande links terug
+        if mode == "local" or cache is None:
+            return 0
+        prof_hash, queued = _profile_hash(profile), 0
+        profile = dict(profile or {})
+        for link in links:
+            link = canonicalize_url(link)
+            key = cache_key(link, prof_hash)
+            hit = cache.get(key)
+            if hit is not None and not hit.get("_fallback"):
+                self._count("cached")
+                continue
+            with self._lock:
+                outcome = ("deduplicated" if key in self._pending else
+                           "dropped" if len(self._pending) >= self.max_pending else "submitted")
+                if outcome == "submitted":
+                    self._pending.add(key)
+            self._count(outcome)
+            if outcome != "submitted":
+                continue
+            self._pool.submit(self._run, key, client, link, profile, cache, model, mode, timeout, similar)
+            queued += 1
+        return queued
+
+    def _run(self, key, client, link, profile, cache, model, mode, timeout, similar):
+        # eigen request-scope: de aanleidende request is meestal al klaar, maar tokens/kosten/llm_call
+        # van de speculatieve call horen in een eigen logregel
+        meta = {}
+        try:
+            with request("prefetch", url=link):
+                get_advice(client, link, profile, cache=cache, model=model, meta=meta, timeout=timeout,
+                           mode=mode, similar=similar, priority=PRIORITY_BACKGROUND)
+            self._count("failed" if meta.get("fallback") else "done")
+        except Exception:
+            self._count("failed")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counts, "pending": len(self._pending)}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,166 @@
+# stylist/prewarm.py — advies voor bekende product-URLs vooraf in de gedeelde cache zetten
+#
+#   python -m stylist.prewarm urls.txt [--profiles profiles.json] [--concurrency 4]
+#                                      [--rpm 60] [--tpm 60000] [--cache sqlite:///.cache/advice.sqlite3]
+#
+# Hervatten na onderbreking: al gecachte (url, profiel)-paren worden overgeslagen.
+import os, sys, json, time, argparse, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .advice import (DEFAULT_PROFILE, MODEL, MAX_TOKENS, _keywords_from_url, _profile_hash, build_messages,
+                     estimate_tokens, get_advice)
+from .cache import DEFAULT_CACHE_URL, cache_key, open_cache
+from .canon import canonicalize_url
+from .gate import GATE, PRIORITY_BACKGROUND
+from .llmclient import LazyClient
+from .ratelimit import TokenBucket
+
+def read_urls(path: str) -> list:
+    seen, out = set(), []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            u = canonicalize_url(line)
+            if u and u not in seen:
+                seen.add(u); out.append(u)
+    return out
+
+def read_profiles(path: str) -> list:
+    # JSON-lijst van profiel-dicts, of JSONL met één profiel per regel
+    if not path:
+        return [DEFAULT_PROFILE.copy()]
+    with open(path, encoding="utf-8") as f:
+        txt = f.read().strip()
+    items = json.loads(txt) if txt.startswith("[") else [json.loads(l) for l in txt.splitlines() if l.strip()]
+    return [{**DEFAULT_PROFILE, **p} for p in items]
+
+class Summary:
+    def __init__(self, total: int):
+        self._lock = threading.Lock()
+        self.total, self.skipped, self.done, self.failed, self.shed = total, 0, 0, 0, 0
+        self.prompt_tokens = self.completion_tokens = 0
+        self.errors = {}
+        self.interrupted = False
+        self.t0 = time.perf_counter()
+
+    def add(self, meta: dict):
+        with self._lock:
+            if meta.get("cache") == "hit":
+                self.skipped += 1
+            elif meta.get("shed"):
+                self.shed += 1   # lokaal geweigerd door de gate: niet gecachet, volgende run probeert opnieuw
+            elif meta.get("fallback"):
+                self.failed += 1
+                err = (meta.get("error") or "timeout").split(":")[0]
+                self.errors[err] = self.errors.get(err, 0) + 1
+            else:
+                self.done += 1
+            usage = meta.get("usage") or {}
+            self.prompt_tokens += usage.get("prompt_tokens", 0)
+            self.completion_tokens += usage.get("completion_tokens", 0)
+
+    def as_dict(self) -> dict:
+        # remaining = wat een hervatte run nog oppakt: geweigerd (shed), mislukt (kort gecachte fallback)
+        # en nooit gestart (onderbroken); alleen warmed/already_cached zijn echt klaar
+        elapsed = time.perf_counter() - self.t0
+        not_started = self.total - self.done - self.skipped - self.failed - self.shed
+        return {
+            "jobs": self.total, "warmed": self.done, "already_cached": self.skipped,
+            "failed": self.failed, "shed": self.shed, "not_started": not_started,
+            "remaining": self.total - self.done - self.skipped,
+            "errors": self.errors, "interrupted": self.interrupted, "elapsed_s": round(elapsed, 2),
+            "warmed_per_s": round(self.done / elapsed, 3) if elapsed else 0.0,
+            "prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+        }
+
+def prewarm(client, urls: list, profiles: list, cache, concurrency: int = 4,
+            rpm: float = 60, tpm: float = 60_000, model: str = MODEL, log=None, similar=None, gate=GATE) -> Summary:
+    # similar (SimilarityIndex, optioneel): elk gecacht product komt in de index, ook bestaande hits
+    # concurrency gaat niet boven wat de gate op achtergrondprioriteit toelaat (max_queue >> 2), anders
+    # wordt het overschot meteen geweigerd (Overloaded)
+    if gate is not None:
+        concurrency = min(concurrency, gate._limit(PRIORITY_BACKGROUND))
+    jobs = [(u, p) for p in profiles for u in urls]
+    summary = Summary(len(jobs))
+    req_bucket = TokenBucket(rpm, burst=max(1, concurrency))
+    tok_bucket = TokenBucket(tpm)
+
+    def run(u, p):
+        meta = {}
+        hit = cache.get(cache_key(u, _profile_hash(p)))
+        if hit is not None and not hit.get("_fallback"):
+            meta["cache"] = "hit"
+            if similar is not None:
+                similar.add(u, _profile_hash(p), _keywords_from_url(u))
+            return u, meta
+        est = estimate_tokens(build_messages(u, p))
+        req_bucket.acquire(1)
+        tok_bucket.acquire(est)
+        if hit is not None:
+            cache.delete(cache_key(u, _profile_hash(p)))   # kort gecachte fallback: opnieuw proberen
+        get_advice(client, u, p, cache=cache, model=model, meta=meta, priority=PRIORITY_BACKGROUND)
+        if similar is not None and not meta.get("fallback"):
+            similar.add(u, _profile_hash(p), _keywords_from_url(u))
+        used = sum((meta.get("usage") or {}).values())
+        if used > est:
+            tok_bucket.charge(used - est)
+        return u, meta
+
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        futures = [pool.submit(run, u, p) for u, p in jobs]
+        for fut in as_completed(futures):
+            u, meta = fut.result()
+            summary.add(meta)
+            if log is not None:
+                flag = " shed" if meta.get("shed") else " fallback" if meta.get("fallback") else ""
+                log(f"[{meta.get('cache')}{flag}] {u}")
+    except KeyboardInterrupt:
+        # lopende calls afmaken (die schrijven nog naar de cache), de rest bij hervatten
+        summary.interrupted = True
+        pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        pool.shutdown(wait=True)
+        if similar is not None:
+            similar.save()
+    return summary
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m stylist.prewarm", description="Vul de advies-cache vooraf voor een lijst product-URLs.")
+    ap.add_argument("urls", help="bestand met één product-URL per regel")
+    ap.add_argument("--profiles", default="", help="JSON/JSONL met representatieve profielen (default: leeg profiel)")
+    ap.add_argument("--cache", default=os.getenv("ADVICE_CACHE_URL", DEFAULT_CACHE_URL))
+    ap.add_argument("--concurrency", type=int, default=4,
+                    help="gelijktijdige calls; begrensd op de achtergrondlimiet van de LLM-gate (LLM_MAX_QUEUE / 4)")
+    ap.add_argument("--rpm", type=float, default=60, help="max requests per minuut")
+    ap.add_argument("--tpm", type=float, default=60_000, help="max (geschatte) tokens per minuut")
+    ap.add_argument("--model", default=MODEL)
+    ap.add_argument("--similar-index", default=os.getenv("SIMILAR_INDEX_PATH", ""),
+                    help="bouw/actualiseer ook de similarity-index (.npz) voor hergebruik van advies")
+    ap.add_argument("-q", "--quiet", action="store_true")
+    args = ap.parse_args(argv)
+
+    client = LazyClient(os.getenv("OPENAI_API_KEY"))   # gedeelde client, max_retries=0: retries via stylist.resilience
+    cache = open_cache(args.cache)
+    urls, profiles = read_urls(args.urls), read_profiles(args.profiles)
+    similar = None
+    if args.similar_index:
+        from .similar import SimilarityIndex
+        similar = SimilarityIndex(args.similar_index)
+    log = None if args.quiet else (lambda msg: print(msg, file=sys.stderr))
+    print(f"{len(urls)} URLs x {len(profiles)} profielen (max {MAX_TOKENS} output-tokens per call)", file=sys.stderr)
+    summary = prewarm(client, urls, profiles, cache, concurrency=args.concurrency,
+                      rpm=args.rpm, tpm=args.tpm, model=args.model, log=log, similar=similar)
+    print(json.dumps({**summary.as_dict(), "cache": cache.stats().as_dict()}, indent=2))
+    if summary.shed:
+        print(f"{summary.shed} verzoeken geweigerd door de LLM-gate; opnieuw starten pakt ze op.", file=sys.stderr)
+    if summary.interrupted:
+        print("Onderbroken; opnieuw starten hervat vanaf de niet-gecachte URLs.", file=sys.stderr)
+        return 130
+    return 1 if summary.failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# stylist/profiles.py — profiel-normalisatie voor grovere cache-keys (gedeeld advies voor vergelijkbare profielen)
+#
+#   python -m stylist.profiles profielen.jsonl      -> aantal unieke keys vóór/na bucketing
+#
+# Het genormaliseerde profiel gaat óók de prompt in: advies onder een gedeelde key hangt
+# nooit af van velden die buiten de key vallen.
+import os, re, sys, json, hashlib, argparse, threading
+from dataclasses import dataclass, field
+
+from .local import COLOR_WORDS
+
+FREE_TEXT_FIELDS = ("notities", "comfort")
+
+@dataclass
+class BucketConfig:
+    enabled: bool = True
+    height_step: int = 5                            # cm per bucket; 0 = exact
+    drop_fields: tuple = field(default_factory=tuple)   # bv. FREE_TEXT_FIELDS: niet in key én niet in prompt
+    max_colors: int = 3
+
+    @classmethod
+    def from_env(cls):
+        drop = os.getenv("PROFILE_DROP_FIELDS", "")
+        if drop == "free_text":
+            drop = ",".join(FREE_TEXT_FIELDS)
+        return cls(enabled=os.getenv("PROFILE_BUCKETING", "1") != "0",
+                   height_step=int(os.getenv("PROFILE_HEIGHT_STEP", "5")),
+                   drop_fields=tuple(f.strip() for f in drop.split(",") if f.strip()))
+
+BUCKETS = BucketConfig.from_env()
+
+# ---------- Velden ----------
+_SIZE_WORDS = {"extra small": "XS", "xsmall": "XS", "small": "S", "medium": "M", "large": "L",
+               "xlarge": "XL", "extra large": "XL", "xxlarge": "XXL"}
+
+def bucket_height(v: str, step: int) -> str:
+    m = re.search(r"\d{2,3}", v or "")
+    if not m:
+        return ""
+    cm = int(m.group())
+    if not 100 <= cm <= 230:
+        return ""
+    if step <= 1:
+        return str(cm)
+    lo = cm - cm % step
+    return f"{lo}-{lo + step - 1}"
+
+def normalize_size(v: str) -> str:
+    s = re.sub(r"\s+", " ", (v or "").strip().lower())
+    if not s:
+        return ""
+    if s in _SIZE_WORDS:
+        return _SIZE_WORDS[s]
+    m = re.fullmatch(r"w?\s*(\d{2})\s*(?:/|l|\s)\s*l?\s*(\d{2})", s)   # 32/32, W32 L34, 32 34
+    if m:
+        return f"{m.group(1)}/{m.group(2)}"
+    s = re.sub(r"\s*/\s*", "/", s)
+    return s.upper() if re.fullmatch(r"\d*x*[sml]", s) else s
+
+def canonical_colors(v: str, limit: int = 3) -> str:
+    out = []
+    for c in re.split(r"\s*(?:,|/|;|\ben\b|\bof\b|&)\s*", (v or "").lower()):
+        c = COLOR_WORDS.get(c.strip(), c.strip())
+        if c and c not in out:
+            out.append(c)
+    return ", ".join(sorted(out[:limit]))
+
+def _text(v: str) -> str:
+    return re.sub(r"\s+", " ", (v or "").strip().lower())
+
+def bucket_profile(profile: dict, cfg: BucketConfig = None) -> dict:
+    # idempotent: bucket_profile(bucket_profile(p)) == bucket_profile(p)
+    cfg = BUCKETS if cfg is None else cfg
+    p = {k: (v if isinstance(v, str) else str(v or "")) for k, v in (profile or {}).items()}
+    if not cfg.enabled:
+        return p
+    out = {k: v.strip() for k, v in p.items()}
+    out["lengte_cm"]    = bucket_height(p.get("lengte_cm", ""), cfg.height_step)
+    out["maat_boven"]   = normalize_size(p.get("maat_boven", ""))
+    out["maat_beneden"] = normalize_size(p.get("maat_beneden", ""))
+    out["kleuren"]      = canonical_colors(p.get("kleuren", ""), cfg.max_colors)
+    for k in FREE_TEXT_FIELDS:
+        out[k] = _text(p.get(k, ""))
+    for k in cfg.drop_fields:
+        if k in out:
+            out[k] = ""
+    return {k: v for k, v in out.items() if k in p}
+
+# ---------- Meting: unieke keys vóór/na ----------
+class KeyStats:
+    def __init__(self, limit: int = 100_000):
+        self.limit = limit   # geheugengrens: daarna tellen we niet verder
+        self._raw, self._bucketed = set(), set()
+        self._lock = threading.Lock()
+
+    def observe(self, raw_hash: str, bucketed_hash: str):
+        with self._lock:
+            if len(self._raw) < self.limit:
+                self._raw.add(raw_hash)
+                self._bucketed.add(bucketed_hash)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            raw, b = len(self._raw), len(self._bucketed)
+        return {"keys_raw": raw, "keys_bucketed": b, "reduction": round(1 - b / raw, 4) if raw else 0.0}
+
+KEY_STATS = KeyStats()
+
+def _hash(profile: dict) -> str:
+    txt = json.dumps({k: v for k, v in sorted(profile.items()) if v}, ensure_ascii=False)
+    return hashlib.sha256(txt.encode("utf-8")).hexdigest()[:16]
+
+def main(argv=None):
+    from .prewarm import read_profiles
+    ap = argparse.ArgumentParser(prog="python -m stylist.profiles", description="Unieke profiel-keys vóór/na bucketing.")
+    ap.add_argument("profiles", help="JSON-lijst of JSONL met profielen")
+    ap.add_argument("--height-step", type=int, default=BUCKETS.height_step)
+    ap.add_argument("--drop", default=",".join(BUCKETS.drop_fields), help="komma-gescheiden velden, of 'free_text'")
+    args = ap.parse_args(argv)
+    drop = ",".join(FREE_TEXT_FIELDS) if args.drop == "free_text" else args.drop
+    cfg = BucketConfig(height_step=args.height_step, drop_fields=tuple(f for f in drop.split(",") if f))
+    stats = KeyStats(limit=10**9)
+    for p in read_profiles(args.profiles):
+        stats.observe(_hash(p), _hash(bucket_profile(p, cfg)))
+    print(json.dumps({"config": {"height_step": cfg.height_step, "drop_fields": list(cfg.drop_fields)},
+                      **stats.as_dict()}, indent=2))
+
+if __name__ == "__main__":
+    sys.exit(main())
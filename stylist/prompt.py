@@ -0,0 +1,83 @@
+# stylist/prompt.py — prompt-template: vaste prefix + compacte variabele staart, lokale token-schatting
+#
+# Alles wat voor elke call gelijk is (rol, opdracht, schrijfregels, schema) staat in één vooraf
+# gebouwde system-message; die prefix is byte-identiek tussen calls, zodat prompt-caching bij de
+# provider hem kan hergebruiken. De user-message bevat alleen URL, keywords en ingevulde profielvelden.
+#
+#   python -m stylist.prompt https://www.zalando.nl/heren-slim-fit-chino-navy-123.html --profile '{"fit": "Slim"}'
+import re, sys, json, argparse
+
+PROMPT_VERSION = 2
+
+SCHEMA = {
+    "headline": "max 8 woorden",
+    "personal_advice": {
+        "for_you": ["3 bullets persoonlijk advies"],
+        "avoid":   ["2 bullets wat te vermijden"],
+        "colors":  ["2 bullets passende kleuren"],
+        "combine": ["2 bullets combinaties (generieke items)"],
+    },
+}
+
+def compile_system(schema: dict = SCHEMA) -> str:
+    return (
+        "Je bent een modieuze maar praktische personal stylist. Schrijf helder Nederlands (B1), kort en concreet.\n"
+        "Beoordeel het product alleen op URL en keywords; raad geen productdetails en speculeer niet.\n"
+        "Stem het advies af op de opgegeven profielvelden (fit, bouw, kleuren, gelegenheid), voor zover relevant.\n"
+        "Bullets: max 8-10 woorden, praktisch (comfort, pasvorm, kleur, combineren), geen emoji of merknamen.\n"
+        "Antwoord ALLEEN met JSON in exact dit schema, zonder extra velden:\n"
+        + json.dumps(schema, ensure_ascii=False, separators=(",", ":"))
+    )
+
+SYSTEM_PROMPT = compile_system()   # één keer per proces
+
+def compact_profile(profile: dict) -> str:
+    # alleen ingevulde velden, "veld=waarde" gescheiden door ';'
+    return ";".join(f"{k}={v.strip()}" for k, v in (profile or {}).items() if isinstance(v, str) and v.strip())
+
+def user_message(link: str, keywords: str, profile: dict) -> str:
+    lines = [f"URL: {link}", f"Keywords: {keywords}"]
+    prof = compact_profile(profile)
+    if prof:
+        lines.append(f"Profiel: {prof}")
+    return "\n".join(lines)
+
+def render(link: str, keywords: str, profile: dict) -> list:
+    return [{"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_message(link, keywords, profile)}]
+
+# ---------- Token-schatting (lokaal, zonder tokenizer) ----------
+_PIECES = re.compile(r"[^\W\d_]+|\d+|[^\w\s]")
+
+def count_tokens(text: str) -> int:
+    # BPE-achtig: woorden ~4 tekens per token, getallen per 3 cijfers, leestekens apart
+    n = 0
+    for piece in _PIECES.findall(text or ""):
+        if piece[0].isdigit():
+            n += (len(piece) + 2) // 3
+        elif piece[0].isalpha():
+            n += (len(piece) + 3) // 4
+        else:
+            n += 1
+    return n
+
+def prompt_tokens(messages: list) -> int:
+    # + ~4 tokens overhead per message (rol/scheiding)
+    return sum(count_tokens(m.get("content") or "") + 4 for m in messages) + 2
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m stylist.prompt", description="Toon de prompt en de geschatte tokens.")
+    ap.add_argument("url")
+    ap.add_argument("--profile", default="{}", help="profiel als JSON")
+    ap.add_argument("--show", action="store_true", help="print ook de messages zelf")
+    args = ap.parse_args(argv)
+    from .advice import build_messages
+    messages = build_messages(args.url, json.loads(args.profile))
+    if args.show:
+        for m in messages:
+            print(f"--- {m['role']}\n{m['content']}")
+    print(json.dumps({"version": PROMPT_VERSION, "system_tokens": prompt_tokens(messages[:1]),
+                      "user_tokens": prompt_tokens(messages[1:]), "total_tokens": prompt_tokens(messages)}))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+# stylist/ratelimit.py — token-bucket voor requests/min en tokens/min budgetten
+import threading, time
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst: float = None):
+        self.rate = float(per_minute) / 60.0
+        self.capacity = float(burst if burst is not None else per_minute)
+        self.tokens = self.capacity
+        self._t = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._t) * self.rate)
+        self._t = now
+
+    def try_acquire(self, n: float = 1.0) -> float:
+        # 0.0 = gelukt; anders het aantal seconden tot het wel lukt.
+        # n > capacity mag zodra de bucket vol is (saldo gaat dan negatief) i.p.v. eeuwig te blokkeren.
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            need = min(n, self.capacity)
+            if self.tokens >= need:
+                self.tokens -= n
+                return 0.0
+            return (need - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def acquire(self, n: float = 1.0, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(n)
+            if wait == 0.0:
+                return True
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0 or wait > left:
+                    return False
+            time.sleep(min(wait, 1.0))
+
+    def charge(self, n: float) -> None:
+        # achteraf verrekenen (bv. werkelijk tokenverbruik > schatting); mag negatief gaan
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= n
@@ -0,0 +1,113 @@
+# stylist/repair.py — tolerant JSON parsen van model-output: repareren en redden wat er is
+#
+# Volgorde: gewoon json.loads -> code fences / tekst eromheen weg, trailing commas weg ->
+# afgekapt einde sluiten op de laatste complete waarde (PartialJSON). Daarna alleen de bruikbare
+# velden houden; _ensure_schema vult de gaten. Niets bruikbaars -> ValueError (aanroeper: fallback).
+import re, json
+
+from .metrics import METRICS, annotate
+from .streaming import PartialJSON
+
+SECTIONS = ("for_you", "avoid", "colors", "combine")
+
+_FENCE = re.compile(r"```[a-zA-Z]*\s*\n?(.*?)(?:```|$)", re.S)
+
+def _strip_fences(text: str) -> str:
+    m = _FENCE.search(text)
+    return m.group(1) if m else text
+
+def _drop_trailing_commas(text: str) -> str:
+    # ", ]" / ", }" buiten strings
+    out, in_str, esc = [], False, False
+    for ch in text:
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch in "]}":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+        out.append(ch)
+    return "".join(out)
+
+def _close_truncated(text: str):
+    parser = PartialJSON()
+    parser.feed(text)
+    return parser.snapshot()
+
+def _salvage(data: dict) -> dict:
+    # alleen wat past: headline-string, secties als lijst (of losse string); secties op topniveau ook
+    out = {}
+    if isinstance(data.get("headline"), str) and data["headline"].strip():
+        out["headline"] = data["headline"].strip()
+    pers = data.get("personal_advice")
+    pers = pers if isinstance(pers, dict) else {}
+    kept = {}
+    for k in SECTIONS:
+        v = pers.get(k, data.get(k))
+        if isinstance(v, str):
+            v = [v]
+        if isinstance(v, list):
+            v = [x for x in v if isinstance(x, (str, int, float)) and str(x).strip()]
+            if v:
+                kept[k] = v
+    out["personal_advice"] = kept
+    return out
+
+def _checked(data: dict):
+    if "headline" not in data and not data["personal_advice"]:
+        raise ValueError("geen bruikbare velden in model-output")
+    return data, "repaired"
+
+def repair_json(text: str):
+    # -> (dict, "clean" | "repaired"); ValueError als er niets bruikbaars in zit
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict) and isinstance(data.get("personal_advice"), dict):
+            return data, "clean"
+    except (TypeError, ValueError):
+        data = None
+    if isinstance(data, dict):   # geldige JSON maar verkeerde vorm (bv. secties op topniveau)
+        return _checked(_salvage(data))
+    body = _strip_fences(text or "")
+    start = body.find("{")
+    if start < 0:
+        raise ValueError("geen JSON-object in model-output")
+    body = _drop_trailing_commas(body[start:])
+    end = body.rfind("}")
+    data = None
+    if end >= 0:
+        try:
+            data = json.loads(body[: end + 1])
+        except ValueError:
+            pass
+    if not isinstance(data, dict):
+        data = _close_truncated(body)
+    if not isinstance(data, dict):
+        raise ValueError("model-output niet te repareren")
+    return _checked(_salvage(data))
+
+def parse_advice(text: str, meta: dict = None) -> dict:
+    # repair_json + teller stylist_llm_parse_total{outcome=clean|repaired|fallback}
+    try:
+        data, outcome = repair_json(text)
+    except ValueError:
+        METRICS.inc("stylist_llm_parse_total", outcome="fallback")
+        annotate(parse="fallback")
+        if meta is not None:
+            meta["parse"] = "fallback"
+        raise
+    METRICS.inc("stylist_llm_parse_total", outcome=outcome)
+    annotate(parse=outcome)
+    if meta is not None:
+        meta["parse"] = outcome
+        if outcome == "repaired":
+            meta["salvaged"] = sorted(data["personal_advice"])
+    return data
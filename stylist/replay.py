@@ -0,0 +1,124 @@
+# stylist/replay.py — trace (stylist.trace) afspelen tegen de pipeline en een lokale nep-LLM
+#
+#   python -m stylist.replay .cache/trace.jsonl --speedup 10 --concurrency 16 [--seed-hits] [--out replay.json]
+#
+# Elk verzoek start op zijn oorspronkelijke tijdstip / speedup (0 = zo snel als kan). Profielen zitten
+# niet in de trace: per profiel-hash een vervangend profiel, zodat keys even vaak samenvallen als live.
+import sys, json, time, argparse, threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from .advice import _profile_hash, get_advice, local_first_advice
+from .bench import percentiles
+from .cache import cache_key, open_cache
+from .fakellm import FakeLLM
+from .gate import GATE
+from .similar import SimilarityIndex
+
+HIT_OUTCOMES = ("hit", "l1", "similar")
+
+def stand_in_profile(prof_hash: str) -> dict:
+    return {"stijl": f"trace-{prof_hash}"}
+
+def summarize_trace(rows: list) -> dict:
+    outcomes = Counter(r.get("cache") or "?" for r in rows)
+    span = rows[-1]["ts"] - rows[0]["ts"] if rows else 0.0
+    return {"requests": len(rows), "span_s": round(span, 3), "outcomes": dict(outcomes),
+            "hit_rate": round(sum(outcomes[o] for o in HIT_OUTCOMES) / len(rows), 4) if rows else 0.0,
+            "latency": percentiles([r["dur_ms"] for r in rows]),
+            "upstream_calls": outcomes["miss"]}
+
+def seed_hits(rows: list, cache) -> int:
+    # wat live bij de eerste keer al een hit was (ook app-L1), stond toen al in de cache: lokaal advies erin zetten
+    seen, n = set(), 0
+    for r in rows:
+        key = (r["link"], r["prof"])
+        if key in seen:
+            continue
+        seen.add(key)
+        if r.get("cache") in ("hit", "l1"):
+            prof = stand_in_profile(r["prof"])
+            data = local_first_advice(r["link"], prof)
+            data["_cache_key"] = _profile_hash(prof)
+            cache.set(cache_key(r["link"], data["_cache_key"]), data)
+            n += 1
+    return n
+
+def replay(rows: list, fake: FakeLLM, cache, speedup: float = 1.0, concurrency: int = 16,
+           similar=None, timeout: float = 20.0) -> dict:
+    client = fake.client()
+    calls_before = fake.cfg.calls
+    lat, lag, outcomes, fallbacks, lock = [], [], Counter(), [0], threading.Lock()
+    t_first = rows[0]["ts"] if rows else 0.0
+
+    def one(r, due):
+        start = time.perf_counter()
+        meta = {}
+        get_advice(client, r["link"], stand_in_profile(r["prof"]), cache=cache, meta=meta, timeout=timeout,
+                   mode=r.get("mode", "hybrid"), similar=similar, priority=r.get("priority", 0))
+        with lock:
+            lat.append((time.perf_counter() - start) * 1000)
+            lag.append(max(0.0, start - due) * 1000)   # hoeveel later dan gepland (te weinig workers?)
+            outcomes[meta.get("cache") or "?"] += 1
+            fallbacks[0] += bool(meta.get("fallback"))
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for r in rows:
+            due = t0 + ((r["ts"] - t_first) / speedup if speedup > 0 else 0.0)
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            pool.submit(one, r, due)
+    elapsed = time.perf_counter() - t0
+    n = len(lat)
+    return {"requests": n, "elapsed_s": round(elapsed, 3), "throughput_rps": round(n / elapsed, 2) if elapsed else 0.0,
+            "outcomes": dict(outcomes),
+            "hit_rate": round(sum(outcomes[o] for o in HIT_OUTCOMES) / n, 4) if n else 0.0,
+            "latency": percentiles(lat), "lag": percentiles(lag),
+            "upstream_calls": fake.cfg.calls - calls_before, "fallbacks": fallbacks[0]}
+
+def main(argv=None):
+    from .trace import read_trace
+    ap = argparse.ArgumentParser(prog="python -m stylist.replay", description="Speel een advies-trace af tegen een nep-LLM.")
+    ap.add_argument("trace", help="JSONL van stylist.trace")
+    ap.add_argument("--speedup", type=float, default=1.0, help="x sneller dan live; 0 = zonder pauzes")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--limit", type=int, default=0, help="alleen de eerste N verzoeken")
+    ap.add_argument("--cache", default="memory://", help="cache-URL (default: leeg, in-memory)")
+    ap.add_argument("--seed-hits", action="store_true", help="wat live een hit was vooraf in de cache zetten")
+    ap.add_argument("--similar", action="store_true", help="in-memory similarity-index aan")
+    ap.add_argument("--latency-ms", type=float, default=300.0)
+    ap.add_argument("--token-ms", type=float, default=5.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--rpm", type=float, default=0, help="LLM-gate requests/min (default: onbegrensd)")
+    ap.add_argument("--tpm", type=float, default=0, help="LLM-gate tokens/min (default: onbegrensd)")
+    ap.add_argument("--out", default="", help="schrijf resultaat-JSON naar dit bestand (default: stdout)")
+    args = ap.parse_args(argv)
+
+    rows = read_trace(args.trace)
+    if args.limit:
+        rows = rows[: args.limit]
+    if not rows:
+        print("lege trace", file=sys.stderr)
+        return 1
+    GATE.configure(rpm=args.rpm or 1e6, tpm=args.tpm or 1e9)
+    cache = open_cache(args.cache)
+    seeded = seed_hits(rows, cache) if args.seed_hits else 0
+    similar = SimilarityIndex(None) if args.similar else None
+    with FakeLLM(latency_ms=args.latency_ms, token_ms=args.token_ms, error_rate=args.error_rate, seed=1) as fake:
+        result = replay(rows, fake, cache, args.speedup, args.concurrency, similar)
+    report = {"meta": {"trace": args.trace, "speedup": args.speedup, "concurrency": args.concurrency,
+                       "cache": args.cache, "seeded": seeded, "fake_latency_ms": args.latency_ms,
+                       "fake_token_ms": args.token_ms, "fake_error_rate": args.error_rate},
+              "trace": summarize_trace(rows), "replay": result}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
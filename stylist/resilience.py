@@ -0,0 +1,140 @@
+# stylist/resilience.py — latency-budget, retries met jitter en circuit breaker rond de upstream-call
+import random, threading, time
+from dataclasses import dataclass
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+_RETRYABLE_NAMES = {"APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError",
+                    "TimeoutError", "ConnectionError"}
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+class BudgetExceeded(TimeoutError):
+    pass
+
+class Overloaded(RuntimeError):
+    # lokaal geweigerd (wachtrij vol/te traag): upstream is niet benaderd, telt niet mee voor de breaker
+    pass
+
+def is_retryable(exc: BaseException) -> bool:
+    if getattr(exc, "status_code", None) in RETRYABLE_STATUS:
+        return True
+    return any(c.__name__ in _RETRYABLE_NAMES for c in type(exc).__mro__)
+
+def _retry_after(exc) -> float:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+@dataclass
+class RetryPolicy:
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 4.0
+
+    def delay(self, attempt: int, exc=None) -> float:
+        # "full jitter": voorkomt dat alle sessies na een 429-burst tegelijk terugkomen
+        d = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        return max(d, min(_retry_after(exc), self.max_delay))
+
+class CircuitBreaker:
+    # closed -> (failure_threshold fouten op rij) -> open -> (reset_after sec) -> half_open -> 1 proefcall
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.short_circuits = 0
+        self._probe = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state, self._probe = "half_open", False
+            if self.state == "half_open" and not self._probe:
+                self._probe = True
+                return True
+            self.short_circuits += 1
+            return False
+
+    def release_probe(self):
+        # proefcall kwam niet bij upstream (lokaal geweigerd of budget op): de volgende mag proberen
+        with self._lock:
+            if self.state == "half_open":
+                self._probe = False
+
+    def success(self):
+        with self._lock:
+            self.state, self.failures, self._probe = "closed", 0, False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opens += 1
+                self.state, self.opened_at, self._probe = "open", time.monotonic(), False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures,
+                    "opens": self.opens, "short_circuits": self.short_circuits}
+
+RETRY = RetryPolicy()
+BREAKER = CircuitBreaker()
+COUNTERS = {"attempts": 0, "retries": 0, "failures": 0, "budget_exceeded": 0}
+_counters_lock = threading.Lock()
+
+def _count(name: str):
+    with _counters_lock:
+        COUNTERS[name] += 1
+
+def call_with_retry(fn, budget: float, policy: RetryPolicy = RETRY, breaker: CircuitBreaker = BREAKER,
+                    retry_if=None):
+    # fn(timeout_sec) -> resultaat. Herhaalt retryable fouten binnen het totale latency-budget.
+    # retry_if(exc) kan een retry alsnog weigeren (bv. als er al gestreamd is).
+    deadline = time.monotonic() + budget
+    for attempt in range(max(1, policy.attempts)):
+        if not breaker.allow():
+            raise CircuitOpenError("upstream circuit open")
+        left = deadline - time.monotonic()
+        if left <= 0:
+            breaker.release_probe()
+            _count("budget_exceeded")
+            raise BudgetExceeded(f"latency-budget van {budget:.1f}s op")
+        _count("attempts")
+        try:
+            result = fn(left)
+        except Overloaded:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            retryable = is_retryable(e)
+            if retryable:
+                breaker.failure()
+            else:
+                breaker.success()   # upstream antwoordde (bv. 400): gezond, alleen dit verzoek faalt
+            _count("failures")
+            if not retryable or attempt + 1 >= policy.attempts or (retry_if is not None and not retry_if(e)):
+                raise
+            d = policy.delay(attempt, e)
+            if time.monotonic() + d >= deadline:
+                _count("budget_exceeded")
+                raise
+            _count("retries")
+            time.sleep(d)
+            continue
+        breaker.success()
+        return result
+
+def stats() -> dict:
+    with _counters_lock:
+        out = dict(COUNTERS)
+    return {**out, "breaker": BREAKER.stats()}
@@ -0,0 +1,153 @@
+# stylist/shops.py — zoek-templates per shop (uit shop_search.json) en een offline validator
+#
+#   python -m stylist.shops lookup https://www2.hm.com/nl_nl/productpage.123.html "wit overhemd"
+#   python -m stylist.shops validate fixtures/      -> <host>.html / <host>.xml tegen de templates
+#
+# Lookup: genormaliseerde host (canon._norm_host) en daarna de bovenliggende domeinen in één dict,
+# per host gecachet. Geen template -> None; de aanroeper (stylist.links) valt terug op Google.
+import os, re, sys, json, argparse
+from urllib.parse import urlsplit, parse_qsl, quote
+
+from .canon import _norm_host
+
+DEFAULT_TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "shop_search.json")
+
+class SearchRegistry:
+    def __init__(self, templates: dict, default: str = None):
+        self.templates = {h.lower(): t for h, t in templates.items()}
+        self.default = default
+        self._by_host = {}   # netloc -> template of None; begrensd door het aantal shops dat we zien
+
+    @classmethod
+    def load(cls, path: str = None):
+        with open(path or DEFAULT_TEMPLATES_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("shops", {}), data.get("default"))
+
+    def template_for(self, netloc: str):
+        # ook subdomeinen (www2.hm.com, nl.shop.com) vallen onder de template van het hoofddomein
+        try:
+            return self._by_host[netloc]
+        except KeyError:
+            pass
+        parts, t = _norm_host(netloc).split("."), None
+        for i in range(len(parts) - 1):
+            t = self.templates.get(".".join(parts[i:]))
+            if t is not None:
+                break
+        t = self.default if t is None else t
+        if len(self._by_host) < 10_000:
+            self._by_host[netloc] = t
+        return t
+
+    def search_url(self, product_url: str, query: str, parts=None):
+        # -> zoek-URL binnen de shop, of None (geen template, of te weinig padsegmenten voor {segN})
+        p = parts or urlsplit(product_url)
+        t = self.template_for(p.netloc)
+        return None if t is None else fill(t, p, query)
+
+def fill(template: str, parts, query: str):
+    segs = [s for s in parts.path.split("/") if s]
+    values = {"origin": f"{parts.scheme}://{parts.netloc}", "q": quote(query)}
+    for n in (1, 2):
+        if "{seg%d}" % n in template:
+            if len(segs) <= n:   # laatste segment is het product zelf, geen taal/land
+                return None
+            values[f"seg{n}"] = segs[n - 1]
+    return template.format(**values)
+
+REGISTRY = SearchRegistry.load(os.getenv("SHOP_SEARCH_FILE") or None)
+
+# ---------- Validatie tegen opgeslagen pagina's ----------
+_SEARCH_ACTION = re.compile(r'"(?:target|urlTemplate)"\s*:\s*"([^"]*\{search_term_string\}[^"]*)"')
+_FORM = re.compile(r"<form\b[^>]*>.*?</form>", re.S | re.I)
+_INPUT = re.compile(r"<input\b[^>]*>", re.I)
+_LOC = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.I)
+_QUERY_NAMES = {"q", "query", "term", "text", "search", "searchtext", "searchterm", "keyword", "keywords", "zoekterm"}
+
+def _attr(tag: str, name: str) -> str:
+    m = re.search(r'\b%s\s*=\s*["\']([^"\']*)["\']' % name, tag, re.I)
+    return m.group(1) if m else ""
+
+def template_shape(template: str):
+    # "{origin}/{seg1}/search-results.html?q={q}" -> (regex op het pad, zoekparameter)
+    path, _, query = template.replace("{origin}", "").partition("?")
+    rx = re.escape(path.rstrip("/") or "/")
+    for n in (1, 2):
+        rx = rx.replace(re.escape("{seg%d}" % n), "[^/]+")
+    return re.compile(rx), next((k for k, v in parse_qsl(query) if v == "{q}"), None)
+
+def evidence(html: str) -> list:
+    # [(pad, zoekparameter)] uit JSON-LD SearchAction en zoekformulieren
+    out = []
+    for m in _SEARCH_ACTION.finditer(html):
+        p = urlsplit(m.group(1))
+        param = next((k for k, v in parse_qsl(p.query) if "search_term_string" in v), None)
+        out.append((p.path.rstrip("/") or "/", param))
+    for form in _FORM.findall(html):
+        head = form[: form.find(">") + 1]
+        action = _attr(head, "action")
+        if not action:
+            continue
+        for inp in _INPUT.findall(form):
+            name = _attr(inp, "name")
+            searchy = (_attr(inp, "type").lower() == "search" or _attr(head, "role").lower() == "search"
+                       or name.lower() in _QUERY_NAMES)
+            if name and (searchy or re.search(r"search|zoek", action, re.I)):
+                out.append((urlsplit(action).path.rstrip("/") or "/", name))
+                break
+    return out
+
+def _sitemap_evidence(xml: str) -> list:
+    out = []
+    for u in _LOC.findall(xml):
+        p = urlsplit(u)
+        out += [(p.path.rstrip("/") or "/", k) for k, _ in parse_qsl(p.query, keep_blank_values=True)]
+    return out
+
+def validate(fixtures: str, registry: SearchRegistry = None) -> list:
+    # per template: ok / mismatch / no-evidence / no-fixture
+    registry = registry or REGISTRY
+    rows = []
+    for host, template in sorted(registry.templates.items()):
+        rx, param = template_shape(template)
+        found, seen = [], False
+        for ext, extract in (("html", evidence), ("xml", _sitemap_evidence)):
+            path = os.path.join(fixtures, f"{host}.{ext}")
+            if os.path.exists(path):
+                seen = True
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    found_in = extract(f.read())
+                # sitemap: alleen URL's op het zoekpad tellen (productlinks met ?params zeggen niets)
+                found += found_in if ext == "html" else [e for e in found_in if rx.fullmatch(e[0])]
+        ok = any(rx.fullmatch(p) and k == param for p, k in found)
+        status = "ok" if ok else "mismatch" if found else "no-evidence" if seen else "no-fixture"
+        rows.append({"host": host, "template": template, "status": status,
+                     "found": [f"{p}?{k}=" for p, k in dict.fromkeys(found)][:3]})
+    return rows
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m stylist.shops", description="Zoek-templates per shop.")
+    ap.add_argument("--file", default=os.getenv("SHOP_SEARCH_FILE") or DEFAULT_TEMPLATES_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    lk = sub.add_parser("lookup", help="zoek-URL voor een productlink")
+    lk.add_argument("url")
+    lk.add_argument("query", nargs="?", default="wit t-shirt")
+    va = sub.add_parser("validate", help="templates controleren tegen opgeslagen <host>.html / <host>.xml")
+    va.add_argument("fixtures")
+    sub.add_parser("list")
+    args = ap.parse_args(argv)
+    registry = SearchRegistry.load(args.file)
+    if args.cmd == "lookup":
+        print(registry.search_url(args.url, args.query) or "(geen template: Google-fallback)")
+    elif args.cmd == "list":
+        print(json.dumps(registry.templates, indent=2))
+    else:
+        rows = validate(args.fixtures, registry)
+        for r in rows:
+            found = f"  gevonden: {', '.join(r['found'])}" if r["found"] and r["status"] != "ok" else ""
+            print(f"{r['status']:<12} {r['host']:<18} {r['template']}{found}")
+        return 1 if any(r["status"] == "mismatch" for r in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
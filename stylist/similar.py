@@ -0,0 +1,231 @@
+# stylist/similar.py — similarity-index over URL-keywords: hergebruik advies van bijna-identieke producten
+#
+# "heren-slim-fit-jeans-donkerblauw" en "slim-fit-jeans-dark-blue-men" -> gehashte n-gram-vectoren
+# (NumPy-matrix, cosine via één matrix-vector-product), alleen binnen dezelfde profiel-bucket.
+# Doelgroep (heren/dames/kinderen) en categorie zijn harde filters: "dames-jeans" hergebruikt nooit
+# advies van "heren-jeans", hoe hoog de cosine ook is.
+#
+#   python -m stylist.similar .cache/similar.npz "slim fit jeans dark blue men"
+import os, re, sys, json, zlib, argparse, threading
+
+import numpy as np
+
+from .local import COLOR_WORDS, FIT_WORDS, _WORD2CAT
+
+DEFAULT_INDEX_PATH = ".cache/similar.npz"
+DEFAULT_THRESHOLD = 0.85    # cosine; 0 = uit
+DIM = 256                   # 50k rijen x 256 x float32 = ~51 MB; meer dimensies wonnen niets op URL-keywords
+MAX_ENTRIES = 50_000        # daarna valt de oudste helft eruit
+AUTOSAVE_EVERY = 25         # toevoegingen tussen twee saves (in een achtergrondthread)
+
+_PHRASES = {"dark blue": "navy", "light blue": "lichtblauw", "off white": "ecru"}
+_SYNONYMS = {"men": "heren", "mens": "heren", "man": "heren", "women": "dames", "womens": "dames", "vrouw": "dames",
+             "kids": "kinderen", "kinder": "kinderen"}
+_GENDERS = {"heren", "dames", "kinderen"}
+
+def hard_tags(keywords: str) -> tuple:
+    # (doelgroepen, categorieën) als gesorteerde, komma-gescheiden strings; "" = niet genoemd
+    words = [_SYNONYMS.get(w, w) for w in re.sub(r"[^\w]+", " ", (keywords or "").lower()).split()]
+    return (",".join(sorted({w for w in words if w in _GENDERS})),
+            ",".join(sorted({_WORD2CAT[w] for w in words if w in _WORD2CAT})))
+
+def compatible(a: tuple, b: tuple) -> bool:
+    # doelgroep moet gelijk zijn (ook "niet genoemd"); categorieën overlappen als beide er een noemen
+    if a[0] != b[0]:
+        return False
+    return not a[1] or not b[1] or bool(set(a[1].split(",")) & set(b[1].split(",")))
+
+def _features(keywords: str) -> dict:
+    text = " " + re.sub(r"[^\w]+", " ", (keywords or "").lower()) + " "
+    for phrase, canon in _PHRASES.items():
+        text = text.replace(f" {phrase} ", f" {canon} ")
+    feats = {}
+    def add(f, w):
+        feats[f] = feats.get(f, 0.0) + w
+    for word in text.split():
+        word = _SYNONYMS.get(word, word)
+        add("w:" + word, 1.0)
+        for table, tag in ((COLOR_WORDS, "kleur"), (_WORD2CAT, "cat"), (FIT_WORDS, "fit")):
+            if word in table:
+                add(f"{tag}:{table[word]}", 1.5)
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            add("g:" + padded[i:i + 3], 0.3)
+    return feats
+
+def embed(keywords_list: list, dim: int = DIM) -> np.ndarray:
+    # (n, dim) float32, rijen L2-genormaliseerd; crc32 zodat vectoren stabiel zijn tussen processen
+    out = np.zeros((len(keywords_list), dim), dtype=np.float32)
+    for row, kw in enumerate(keywords_list):
+        for f, w in _features(kw).items():
+            h = zlib.crc32(f.encode("utf-8"))
+            out[row, h % dim] += w if (h >> 31) & 1 else -w
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    return out / np.where(norms == 0, 1.0, norms)
+
+class SimilarityIndex:
+    def __init__(self, path: str = None, dim: int = DIM, threshold: float = DEFAULT_THRESHOLD,
+                 max_entries: int = MAX_ENTRIES, autosave_every: int = AUTOSAVE_EVERY):
+        self.path, self.dim, self.threshold = path, dim, threshold
+        self.max_entries, self.autosave_every = max_entries, autosave_every
+        self._vecs = np.zeros((64, dim), dtype=np.float32)   # capaciteit groeit x2
+        self._bucket = np.zeros(64, dtype=np.int32)           # profiel-bucket-id per rij
+        self._links, self._bucket_ids, self._rows = [], {}, {}
+        self._tags = []                                       # hard_tags per rij
+        self._n, self._dirty = 0, 0
+        self._lock = threading.Lock()
+        self._saver = None                                    # lopende achtergrond-save
+        self._save_lock = threading.Lock()                    # één schrijver op het .tmp-bestand
+        self.lookups = self.reused = 0
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def __len__(self):
+        return self._n
+
+    # ---------- Schrijven ----------
+    def add(self, link: str, prof_hash: str, keywords: str):
+        vec = embed([keywords], self.dim)[0]
+        tags = hard_tags(keywords)
+        with self._lock:
+            bid = self._bucket_ids.setdefault(prof_hash, len(self._bucket_ids))
+            row = self._rows.get((prof_hash, link))
+            if row is None:
+                if self._n >= self.max_entries:
+                    self._compact(self._n // 2)
+                if self._n == len(self._vecs):
+                    self._grow()
+                row = self._n
+                self._n += 1
+                self._links.append((prof_hash, link))
+                self._tags.append(tags)
+                self._rows[(prof_hash, link)] = row
+            self._tags[row] = tags
+            self._vecs[row], self._bucket[row] = vec, bid
+            self._dirty += 1
+            save = self.path and self._dirty >= self.autosave_every and self._saver is None
+            if save:
+                self._saver = threading.Thread(target=self._save_bg, name="similar-save", daemon=True)
+        if save:
+            self._saver.start()   # np.savez van de hele matrix hoort niet op de request-thread
+
+    def _save_bg(self):
+        try:
+            self.save()
+        finally:
+            with self._lock:
+                self._saver = None
+
+    def _grow(self):
+        # x1.5, nooit boven max_entries; onder self._lock
+        cap = min(self.max_entries, max(len(self._vecs) + 64, len(self._vecs) * 3 // 2))
+        vecs = np.zeros((cap, self.dim), dtype=np.float32)
+        bucket = np.zeros(cap, dtype=np.int32)
+        vecs[: self._n], bucket[: self._n] = self._vecs[: self._n], self._bucket[: self._n]
+        self._vecs, self._bucket = vecs, bucket
+
+    def _compact(self, drop: int):
+        # oudste `drop` rijen eruit (invoegvolgorde); onder self._lock
+        keep = slice(drop, self._n)
+        n = self._n - drop
+        self._vecs[:n], self._bucket[:n] = self._vecs[keep].copy(), self._bucket[keep].copy()
+        self._links, self._tags = self._links[drop:], self._tags[drop:]
+        self._rows = {key: i for i, key in enumerate(self._links)}
+        self._n = n
+
+    # ---------- Zoeken ----------
+    def search(self, keywords_list: list, prof_hash: str, k: int = 3, filtered: bool = False) -> list:
+        # per query: [(score, link)] aflopend, alleen binnen dezelfde profiel-bucket
+        # filtered: alleen buren met dezelfde doelgroep/categorie (hard_tags)
+        queries = embed(keywords_list, self.dim)
+        with self._lock:
+            bid = self._bucket_ids.get(prof_hash)
+            if bid is None or not self._n:
+                return [[] for _ in keywords_list]
+            rows = np.flatnonzero(self._bucket[: self._n] == bid)
+            scores = self._vecs[rows] @ queries.T            # (rijen, queries) in één keer
+            links = [self._links[r][1] for r in rows]
+            tags = [self._tags[r] for r in rows] if filtered else None
+        out = []
+        for col in range(scores.shape[1]):
+            s = scores[:, col]
+            if filtered:
+                want = hard_tags(keywords_list[col])
+                s = np.where([compatible(want, t) for t in tags], s, -np.inf)
+            top = [i for i in np.argsort(-s)[:k] if s[i] > -np.inf]
+            out.append([(float(s[i]), links[i]) for i in top])
+        return out
+
+    def lookup(self, link: str, keywords: str, prof_hash: str, cache, key_fn, threshold: float = None):
+        # beste gecachte buur boven de drempel -> (data, score, buur-link) of None
+        threshold = self.threshold if threshold is None else threshold
+        if threshold <= 0:
+            return None
+        with self._lock:
+            self.lookups += 1
+        for score, other in self.search([keywords], prof_hash, filtered=True)[0]:
+            if score < threshold:
+                break
+            if other == link:
+                continue
+            data = cache.get(key_fn(other, prof_hash)) if cache is not None else None
+            if data is not None and not data.get("_fallback"):
+                with self._lock:
+                    self.reused += 1
+                return data, score, other
+        return None
+
+    # ---------- Persistentie ----------
+    def save(self, path: str = None):
+        path = path or self.path
+        if not path:
+            return
+        with self._save_lock:
+            with self._lock:
+                vecs, bucket = self._vecs[: self._n].copy(), self._bucket[: self._n].copy()
+                meta = {"dim": self.dim, "links": list(self._links), "tags": list(self._tags),
+                        "buckets": list(self._bucket_ids)}
+                self._dirty = 0
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp = path + ".tmp.npz"
+            np.savez(tmp, vecs=vecs, bucket=bucket, meta=np.array(json.dumps(meta)))
+            os.replace(tmp, path)
+
+    def _load(self, path: str):
+        with np.load(path) as z:
+            meta = json.loads(str(z["meta"]))
+            if meta["dim"] != self.dim:
+                return   # andere dimensie: opnieuw opbouwen
+            vecs, bucket = z["vecs"], z["bucket"]
+        n = len(vecs)
+        cap = max(64, n, min(self.max_entries, n + n // 2))
+        self._vecs = np.zeros((cap, self.dim), dtype=np.float32)
+        self._bucket = np.zeros(cap, dtype=np.int32)
+        self._vecs[:n], self._bucket[:n] = vecs, bucket
+        self._links = [tuple(x) for x in meta["links"]]
+        # oude index zonder tags: die rijen matchen niets meer tot ze opnieuw toegevoegd worden
+        self._tags = [tuple(x) for x in meta.get("tags") or [("?", "?")] * n]
+        self._rows = {key: i for i, key in enumerate(self._links)}
+        self._bucket_ids = {h: i for i, h in enumerate(meta["buckets"])}
+        self._n = n
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": self._n, "profile_buckets": len(self._bucket_ids),
+                    "lookups": self.lookups, "reused": self.reused}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m stylist.similar", description="Zoek bijna-identieke producten in de index.")
+    ap.add_argument("index", nargs="?", default=DEFAULT_INDEX_PATH)
+    ap.add_argument("keywords", nargs="*")
+    ap.add_argument("-k", type=int, default=5)
+    args = ap.parse_args(argv)
+    idx = SimilarityIndex(args.index)
+    print(json.dumps(idx.stats()))
+    if args.keywords:
+        for h in dict.fromkeys(ph for ph, _ in idx._links):
+            for score, link in idx.search([" ".join(args.keywords)], h, k=args.k)[0]:
+                print(f"{score:.3f}  {h}  {link}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+# stylist/singleflight.py — gelijktijdige identieke aanvragen samenvoegen tot één upstream-call
+import copy, threading
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}        # key -> _Call
+        self._lock = threading.Lock()
+        self.leaders = 0        # echte uitvoeringen
+        self.deduplicated = 0   # aanroepen die meeliftten op een lopende call
+        self.timeouts = 0       # meelifters die de wachttijd overschreden
+
+    def do(self, key, fn, timeout=None, on_timeout=None):
+        # eerste aanroeper voert fn() uit; gelijktijdige aanroepers met dezelfde key wachten op dat resultaat
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.deduplicated += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+            return call.result
+
+        if not call.done.wait(timeout):
+            with self._lock:
+                self.timeouts += 1
+            if on_timeout is None:
+                raise TimeoutError(f"single-flight wachttijd verlopen voor {key!r}")
+            return on_timeout()
+        if call.error is not None:
+            raise call.error
+        # eigen kopie: resultaat wordt door aanroepers soms aangevuld
+        return copy.deepcopy(call.result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "deduplicated": self.deduplicated,
+                "timeouts": self.timeouts,
+                "in_flight": len(self._calls),
+            }
+
+FLIGHT = SingleFlight()
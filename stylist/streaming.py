@@ -0,0 +1,121 @@
+# stylist/streaming.py — incrementeel JSON parsen van een gestreamde chat-completion
+import json, threading, time
+
+class PartialJSON:
+    # Houdt bij waar de laatst complete waarde eindigt, zodat een afgebroken prefix
+    # gesloten en geparsed kan worden: {"a": ["x", "y  ->  {"a": ["x"]}
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+        self._stack = []          # '{' / '['
+        self._expect_key = False  # binnen object: volgende string is een key
+        self._in_str = False
+        self._str_is_key = False
+        self._esc = False
+        self._cut = None          # (index na laatste complete waarde, stack op dat moment)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def feed(self, chunk: str) -> bool:
+        # True als er sinds de vorige feed een nieuwe complete waarde bij is gekomen
+        if not chunk:
+            return False
+        self._parts.append(chunk)
+        before = self._cut
+        for ch in chunk:
+            self._step(ch)
+            self._pos += 1
+        return self._cut is not before
+
+    def _mark(self):
+        self._cut = (self._pos + 1, tuple(self._stack))
+
+    def _step(self, ch):
+        if self._in_str:
+            if self._esc:
+                self._esc = False
+            elif ch == "\\":
+                self._esc = True
+            elif ch == '"':
+                self._in_str = False
+                if not self._str_is_key:
+                    self._mark()
+            return
+        if ch == '"':
+            self._in_str = True
+            self._str_is_key = bool(self._stack) and self._stack[-1] == "{" and self._expect_key
+        elif ch in "{[":
+            self._stack.append(ch)
+            self._expect_key = ch == "{"
+        elif ch in "}]":
+            if self._stack:
+                self._stack.pop()
+            self._expect_key = False
+            self._mark()
+        elif ch == ":":
+            self._expect_key = False
+        elif ch == ",":
+            self._expect_key = bool(self._stack) and self._stack[-1] == "{"
+
+    def snapshot(self):
+        # beste gok van het object tot nu toe, of None als er nog niets bruikbaars is
+        if self._cut is None:
+            return None
+        idx, stack = self._cut
+        closers = "".join("}" if c == "{" else "]" for c in reversed(stack))
+        try:
+            val = json.loads(self.text[:idx] + closers)
+        except ValueError:
+            return None
+        return val if isinstance(val, dict) else None
+
+# ---------- Time-to-first-bullet ----------
+class StreamStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.first_bullet_ms_sum = 0.0
+        self.first_bullet_ms_max = 0.0
+        self.first_bullet_ms_last = 0.0
+
+    def observe(self, ms: float):
+        with self._lock:
+            self.streams += 1
+            self.first_bullet_ms_sum += ms
+            self.first_bullet_ms_max = max(self.first_bullet_ms_max, ms)
+            self.first_bullet_ms_last = ms
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            avg = self.first_bullet_ms_sum / self.streams if self.streams else 0.0
+            return {"streams": self.streams, "first_bullet_ms_avg": round(avg, 1),
+                    "first_bullet_ms_max": round(self.first_bullet_ms_max, 1),
+                    "first_bullet_ms_last": round(self.first_bullet_ms_last, 1)}
+
+STREAM_STATS = StreamStats()
+
+def _has_bullet(partial: dict) -> bool:
+    pers = partial.get("personal_advice")
+    return isinstance(pers, dict) and any(isinstance(v, list) and v for v in pers.values())
+
+def stream_json(chunks, on_update=None, t0=None, meta=None) -> str:
+    # chunks: iterator van chat.completions stream-chunks; on_update(partial_dict) per nieuwe waarde
+    t0 = time.perf_counter() if t0 is None else t0
+    parser, first = PartialJSON(), False
+    for chunk in chunks:
+        usage = getattr(chunk, "usage", None)
+        if usage is not None and meta is not None:   # laatste chunk bij stream_options.include_usage
+            meta["usage"] = {"prompt_tokens": usage.prompt_tokens or 0,
+                             "completion_tokens": usage.completion_tokens or 0}
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if parser.feed(delta or "") and on_update is not None:
+            partial = parser.snapshot()
+            if partial is None:
+                continue
+            if not first and _has_bullet(partial):
+                first = True
+                STREAM_STATS.observe((time.perf_counter() - t0) * 1000)
+            on_update(partial)
+    return parser.text
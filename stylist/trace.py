@@ -0,0 +1,49 @@
+# stylist/trace.py — opt-in trace van adviesverzoeken naar JSONL (voor stylist.replay)
+#
+#   STYLIST_TRACE=.cache/trace.jsonl [STYLIST_TRACE_SAMPLE=0.1] streamlit run FashionAIStylist.py
+#   python -m stylist.api --trace .cache/trace.jsonl
+#
+# Per verzoek één regel: canonieke link, profiel-hash, modus, prioriteit, cache-uitkomst,
+# fallback, duur en stage-timings, tokens. Geen profielvelden of andere persoonsgegevens.
+import os, json, time, random, threading
+
+class TraceWriter:
+    def __init__(self, path: str, sample: float = 1.0):
+        self.path, self.sample = path, sample
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.written = 0
+
+    def sampled(self) -> bool:
+        return self.sample >= 1.0 or random.random() < self.sample
+
+    def write(self, link: str, prof_hash: str, meta: dict, rec: dict, mode: str, priority: int):
+        usage = meta.get("usage") or {}
+        row = {"ts": round(time.time(), 3), "link": link, "prof": prof_hash, "mode": mode, "priority": priority,
+               "cache": meta.get("cache"), "fallback": bool(meta.get("fallback")), "dur_ms": round(rec["dur_ms"], 2),
+               "stages": {k: round(v, 2) for k, v in rec["stages"].items()},
+               "prompt_tokens": usage.get("prompt_tokens", 0), "completion_tokens": usage.get("completion_tokens", 0)}
+        line = json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._f.write(line)
+            self._f.flush()
+            self.written += 1
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+TRACER = None
+
+def enable_trace(path: str, sample: float = 1.0) -> TraceWriter:
+    # idempotent per pad: Streamlit voert de app-module bij elke rerun opnieuw uit
+    global TRACER
+    if TRACER is None or TRACER.path != path:
+        TRACER = TraceWriter(path, sample)
+    return TRACER
+
+def read_trace(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(l) for l in f if l.strip()]
+    return sorted(rows, key=lambda r: r["ts"])
@@ -0,0 +1,59 @@
+# tests/test_api.py — headless API: invoer-validatie en foutafhandeling
+import json, threading, urllib.error, urllib.request
+
+import pytest
+
+from stylist import api
+from stylist.api import make_server
+from stylist.cache import open_cache
+
+@pytest.fixture
+def server():
+    srv = make_server(None, open_cache("memory://"), port=0, mode="local")
+    srv.RequestHandlerClass.log_message = lambda *a: None
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+def post(base, path, raw: bytes):
+    req = urllib.request.Request(base + path, data=raw, method="POST", headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as r:
+            return r.status, json.load(r)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+LINK = "https://www.zalando.nl/heren-slim-fit-jeans-1.html"
+
+@pytest.mark.parametrize("path, body", [
+    ("/advice", [1, 2]),
+    ("/advice", "x"),
+    ("/advice", {"url": 123}),
+    ("/advice", {"url": LINK, "profile": "fit=slim"}),
+    ("/advice", {"url": LINK, "profile": [1]}),
+    ("/advice", {"url": LINK, "mode": 3}),
+    ("/advice", {"url": LINK, "mode": "turbo"}),
+    ("/advice/batch", {"urls": LINK}),
+    ("/advice/batch", {"urls": [LINK, 5]}),
+    ("/prefetch", {"urls": [None]}),
+])
+def test_bad_payloads_get_400(server, path, body):
+    status, data = post(server, path, json.dumps(body).encode())
+    assert status == 400 and data["error"]
+
+def test_invalid_json_gets_400(server):
+    assert post(server, "/advice", b"{kapot")[0] == 400
+
+def test_valid_payloads(server):
+    status, data = post(server, "/advice", json.dumps({"url": LINK, "profile": {"fit": "Slim"}}).encode())
+    assert status == 200 and data["personal_advice"]["for_you"]
+    status, data = post(server, "/advice/batch", json.dumps({"urls": [LINK], "mode": "local"}).encode())
+    assert status == 200
+
+def test_handler_bug_returns_500(server, monkeypatch):
+    def boom(*a, **kw):
+        raise RuntimeError("bug")
+    monkeypatch.setattr(api, "advice_payload", boom)
+    status, data = post(server, "/advice", json.dumps({"url": LINK}).encode())
+    assert status == 500 and data == {"error": "interne fout"}
@@ -0,0 +1,26 @@
+# tests/test_batch.py — batch-advies: volgorde, cache-hits en per-request metrics over worker-threads
+from stylist.batch import get_advice_batch, iter_advice_batch, unique_links
+from stylist.cache import open_cache
+from stylist.fakellm import FakeLLM
+from stylist.metrics import begin_request, end_request
+
+LINKS = [f"https://www.zalando.nl/heren-slim-fit-jeans-{i}.html" for i in range(3)]
+
+def test_unique_links_collapses_tracking_variants():
+    items = unique_links([LINKS[0], LINKS[0] + "?utm_source=x", "geen-url", LINKS[1]])
+    assert [k for _, k in items] == ["https://zalando.nl/heren-slim-fit-jeans-0.html",
+                                     "https://zalando.nl/heren-slim-fit-jeans-1.html"]
+
+def test_worker_usage_lands_in_the_request():
+    cache = open_cache("memory://")
+    with FakeLLM(latency_ms=5, token_ms=0) as fake:
+        token = begin_request("batch")
+        out = get_advice_batch(fake.client(), LINKS, {}, cache=cache)
+        rec = end_request(token)
+        assert all(d["personal_advice"]["for_you"] for d in out)
+        assert rec["caches"] == {"miss": 3}
+        assert rec["prompt_tokens"] > 0 and rec["completion_tokens"] > 0 and rec["cost_usd"] > 0
+        assert "llm_call" in rec["stages"]
+        # tweede keer: alles uit de cache, zonder worker-threads
+        metas = [m for _, _, m in iter_advice_batch(fake.client(), LINKS, {}, cache=cache)]
+        assert [m["cache"] for m in metas] == ["hit"] * 3
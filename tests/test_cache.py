@@ -0,0 +1,80 @@
+# tests/test_cache.py — gedeelde SQLite-cache: TTL, LRU-eviction, lopende totalen en meerdere processen
+import time
+
+import pytest
+
+from stylist import cache as cache_mod
+from stylist.cache import SQLiteAdviceCache, open_cache
+
+ADVICE = {"headline": "Navy chino", "personal_advice": {"for_you": ["a", "b"]}}
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "advice.sqlite3")
+
+def _exact(c):
+    # wat de triggers bijhouden, nageteld over de hele tabel
+    n, size = c._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM advice").fetchone()
+    return n, size
+
+def test_open_cache_parses_url(path):
+    c = open_cache(f"sqlite:///{path}?ttl=5&max_entries=7")
+    assert isinstance(c, SQLiteAdviceCache) and (c.ttl, c.max_entries) == (5, 7)
+    with pytest.raises(ValueError):
+        open_cache("redis://localhost")
+
+def test_roundtrip_and_ttl_expiry(path):
+    c = SQLiteAdviceCache(path)
+    c.set("k", ADVICE)
+    assert c.get("k") == ADVICE
+    c.set("short", ADVICE, ttl=0.01)
+    time.sleep(0.02)
+    assert c.get("short") is None
+    st = c.stats()
+    assert (st.hits, st.misses, st.expired, st.entries) == (1, 1, 1, 1)
+
+def test_lru_eviction_under_max_entries(path, monkeypatch):
+    monkeypatch.setattr(cache_mod, "TOUCH_INTERVAL", 0)   # elke hit ververst het LRU-tijdstip
+    c = SQLiteAdviceCache(path, max_entries=3)
+    for i in range(3):
+        c.set(f"k{i}", {**ADVICE, "i": i})
+        time.sleep(0.002)
+    assert c.get("k0") is not None
+    time.sleep(0.002)
+    c.set("k3", ADVICE)
+    assert c.get("k1") is None and c.get("k0") is not None and c.get("k3") is not None
+    assert c.stats().entries == 3 and c.stats().evictions == 1
+
+def test_eviction_under_max_bytes_drops_expired_first(path):
+    c = SQLiteAdviceCache(path)
+    c.set("probe", ADVICE)
+    size = c.stats().bytes
+    c = SQLiteAdviceCache(path + "2", max_bytes=size * 3)
+    c.set("a", ADVICE)
+    c.set("old", ADVICE, ttl=0.01)   # jonger dan "a", maar verlopen: gaat eerst
+    c.set("b", ADVICE)
+    time.sleep(0.02)
+    c.set("c", ADVICE)
+    assert c.get("a") is not None and c.stats().bytes <= c.max_bytes
+
+def test_usage_totals_follow_upsert_evict_and_clear(path):
+    c = SQLiteAdviceCache(path, max_entries=5)
+    for i in range(8):
+        c.set(f"k{i}", {**ADVICE, "i": "x" * i})
+        assert c._usage() == _exact(c)
+    c.set("k7", {**ADVICE, "i": "veel langer dan eerst"})   # upsert: size verandert, aantal niet
+    assert c._usage() == _exact(c) and c._usage()[0] == 5
+    c.delete("k7")
+    assert c._usage() == _exact(c)
+    c.clear()
+    assert c._usage() == (0, 0)
+
+def test_two_instances_share_one_file(path):
+    a, b = SQLiteAdviceCache(path), SQLiteAdviceCache(path)
+    a.set("k", ADVICE)
+    assert b.get("k") == ADVICE
+    b.set("k2", ADVICE)
+    b.delete("k")
+    assert a.get("k") is None and a.get("k2") == ADVICE
+    assert a.stats().entries == b.stats().entries == 1 and a._usage() == _exact(a)
+    a.close(); b.close()
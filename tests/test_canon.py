@@ -0,0 +1,44 @@
+# tests/test_canon.py — URL-canonicalisatie en het collapse-rapport
+import pytest
+
+from stylist.canon import CanonReport, canonicalize_url
+
+@pytest.mark.parametrize("raw, want", [
+    # tracking-params, varianten, host en schema
+    ("http://www.zalando.nl/heren-jeans-1.html?utm_source=x&gclid=y", "https://zalando.nl/heren-jeans-1.html"),
+    ("https://m.asos.com/nl/heren/jeans/prd/123/?colourWayId=9&clr=blue", "https://asos.com/nl/heren/jeans/prd/123"),
+    ("https://shop.example/p/jeans?size=M&color=blue&id=7&utm_medium=mail", "https://shop.example/p/jeans?id=7"),
+    ("shop.example/p//jeans/", "https://shop.example/p/jeans"),
+    ("https://WWW.Shop.Example:443/p?b=2&a=1#reviews", "https://shop.example/p?a=1&b=2"),
+    ("https://shop.example:8080/p", "https://shop.example:8080/p"),
+    # per shop: zara houdt alleen v1, de bijenkorf gooit sku weg
+    ("https://www.zara.com/nl/nl/jeans-p123.html?v1=55&v2=66", "https://zara.com/nl/nl/jeans-p123.html?v1=55"),
+    ("https://www.debijenkorf.nl/jeans-1?sku=9&ref=x", "https://debijenkorf.nl/jeans-1"),
+    ("https://nl.hm.com/productpage.1.html?x=1", "https://nl.hm.com/productpage.1.html"),
+])
+def test_canonical_forms(raw, want):
+    assert canonicalize_url(raw) == want
+
+def test_idempotent_and_passthrough():
+    c = canonicalize_url("https://www.zalando.nl/a-b.html?utm_source=x")
+    assert canonicalize_url(c) == c
+    assert canonicalize_url("") == ""
+    assert canonicalize_url("ftp://x.nl/a?utm_source=1") == "ftp://x.nl/a?utm_source=1"
+
+def test_report_counts_each_variant_once():
+    rep = CanonReport()
+    for _ in range(100):
+        for i in range(6):
+            rep.canonicalize(f"https://www.zalando.nl/a-b-c.html?utm_source={i}")
+    s = rep.summary()
+    assert s["requests"] == 600 and s["raw_urls"] == 6 and s["canonical_keys"] == 1
+    assert s["collapse_ratio"] == pytest.approx(5 / 6, abs=1e-4)
+    assert len(rep.top()[0][2]) == rep.sample
+
+def test_report_estimate_stays_bounded():
+    rep = CanonReport()
+    for _ in range(2):
+        for i in range(5000):
+            rep.canonicalize(f"https://zalando.nl/a-b-c.html?gclid={i}")
+    assert len(rep._keys["https://zalando.nl/a-b-c.html"][0]) == rep.kmv
+    assert rep.summary()["raw_urls"] == pytest.approx(5000, rel=0.35)
@@ -0,0 +1,69 @@
+# tests/test_compact_store.py — compacte L1-store: bytetelling, string-pool en eviction
+import time
+
+from stylist.cache import CompactAdviceStore
+
+def advice(i, bullet="Kies een rechte pijp"):
+    return {"headline": f"Product {i}", "personal_advice": {"for_you": [bullet, f"tip {i}"], "avoid": ["te wijd"]},
+            "_cache_key": "h"}
+
+def test_roundtrip_gives_an_own_copy():
+    s = CompactAdviceStore()
+    s.set("a", advice(1))
+    got = s.get("a")
+    assert got == advice(1)
+    got["personal_advice"]["for_you"].append("x")
+    assert s.get("a") == advice(1)
+
+def test_odd_shapes_are_stored_as_json():
+    s, odd = CompactAdviceStore(), {"headline": "X", "personal_advice": {"other": [1, 2]}, "nested": {"a": 1}}
+    s.set("odd", odd)
+    assert s.get("odd") == odd
+
+def test_shared_strings_are_counted_once():
+    s = CompactAdviceStore()
+    s.set("a", advice(1))
+    first = s.stats().bytes
+    s.set("b", advice(1))   # alles gedeeld behalve de key: alleen record-overhead erbij
+    assert s.stats().bytes - first < first
+    s.delete("a")
+    assert s.stats().bytes == first and s.get("b") == advice(1)   # gedeelde strings blijven voor "b"
+
+def test_bytes_return_to_zero():
+    s = CompactAdviceStore()
+    for i in range(50):
+        s.set(f"k{i}", advice(i % 7, bullet=f"bullet {i % 3}"))
+    s.set("k0", advice(99))   # overschrijven verrekent het oude record
+    for i in range(25):
+        s.delete(f"k{i}")
+    s.clear()
+    assert s.stats().bytes == 0 and s.stats().entries == 0
+    assert not s._pool and not s._refs and not s._shapes
+    for i in range(50):
+        s.set(f"k{i}", advice(i))
+    for i in range(50):
+        s.delete(f"k{i}")
+    assert s.stats().bytes == 0 and not s._pool
+
+def test_evicts_least_recently_used_within_byte_limit():
+    s = CompactAdviceStore()
+    s.set("probe", advice(0))
+    per_item = s.stats().bytes
+    s = CompactAdviceStore(max_bytes=per_item * 4)
+    for i in range(4):
+        s.set(f"k{i}", advice(i))
+    s.get("k0")   # k0 recent gebruikt: k1 gaat als eerste
+    for i in range(4, 8):
+        s.set(f"k{i}", advice(i))
+    st = s.stats()
+    assert st.bytes <= s.max_bytes and st.evictions > 0
+    assert s.get("k0") is not None and s.get("k1") is None and s.get("k7") is not None
+
+def test_max_entries_and_ttl():
+    s = CompactAdviceStore(max_entries=3)
+    for i in range(5):
+        s.set(f"k{i}", advice(i))
+    assert s.stats().entries == 3 and s.get("k1") is None
+    s.set("short", advice(9), ttl=0.01)
+    time.sleep(0.02)
+    assert s.get("short") is None and s.stats().expired == 1
@@ -0,0 +1,105 @@
+# tests/test_gate.py — LLM-gate: rate-limit, prioriteiten en load shedding
+import threading, time
+
+from types import SimpleNamespace
+
+import pytest
+
+from stylist.advice import build_messages, estimate_tokens, fetch_advice
+from stylist.gate import PRIORITY_BACKGROUND, PRIORITY_BATCH, PRIORITY_INTERACTIVE, LLMGate
+from stylist.ratelimit import TokenBucket
+from stylist.resilience import Overloaded
+
+def test_admits_within_budget():
+    g = LLMGate(rpm=600, tpm=1e6, burst=5)
+    for _ in range(5):
+        assert g.acquire(100, timeout=0.5) < 0.1
+    assert g.stats() == {"queue_depth": 0, "admitted": 5, "shed": 0}
+
+def test_sheds_on_timeout_when_rate_exhausted():
+    g = LLMGate(rpm=1, tpm=1e6, burst=1)
+    g.acquire(1, timeout=0.1)
+    with pytest.raises(Overloaded):
+        g.acquire(1, timeout=0.1)
+    assert g.stats()["shed"] == 1 and g.stats()["queue_depth"] == 0
+
+def test_background_limit_is_lower():
+    g = LLMGate(max_queue=64)
+    assert g._limit(PRIORITY_INTERACTIVE) == 64
+    assert g._limit(PRIORITY_BATCH) == 32
+    assert g._limit(PRIORITY_BACKGROUND) == 16
+
+def test_sheds_when_queue_full():
+    g = LLMGate(rpm=60, tpm=1e6, max_queue=4, burst=1)
+    g.acquire(1)   # bucket leeg: de volgende wachter blijft in de rij staan
+    waiter = threading.Thread(target=g.acquire, args=(1,), kwargs={"timeout": 2.0})   # na ~1 s aan de beurt
+    waiter.start()
+    while g.stats()["queue_depth"] < 1:
+        time.sleep(0.001)
+    with pytest.raises(Overloaded):
+        g.acquire(1, priority=PRIORITY_BACKGROUND, timeout=0.3)   # achtergrondlimiet 4 >> 2 = 1: al bezet
+    waiter.join()
+    assert g.stats()["shed"] == 1 and g.stats()["admitted"] == 2
+
+def test_interactive_goes_before_background():
+    g = LLMGate(rpm=600, tpm=1e6, burst=1)
+    g.acquire(1)
+    order = []
+    def run(prio, name):
+        g.acquire(1, priority=prio, timeout=2.0)
+        order.append(name)
+    bg = threading.Thread(target=run, args=(PRIORITY_BACKGROUND, "bg"))
+    bg.start()
+    time.sleep(0.02)
+    fg = threading.Thread(target=run, args=(PRIORITY_INTERACTIVE, "fg"))
+    fg.start()
+    bg.join(); fg.join()
+    assert order == ["fg", "bg"]
+
+def test_settle_charges_the_difference():
+    g = LLMGate(rpm=600, tpm=6000, burst=1)
+    before = g.tokens.tokens
+    g.acquire(100)
+    g.settle(100, 400)
+    assert g.tokens.tokens == pytest.approx(before - 400, abs=5)
+
+class _Client:
+    # minimale OpenAI-vorm: eerste `fail` pogingen een 503, daarna een antwoord met usage
+    def __init__(self, fail=0, used=(300, 100)):
+        self.calls, self.fail, self.used = [], fail, used
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kw):
+        self.calls.append(kw["timeout"])
+        if len(self.calls) <= self.fail:
+            raise _Upstream()
+        msg = SimpleNamespace(content='{"headline": "X", "personal_advice": {"for_you": ["a"]}}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg)],
+                               usage=SimpleNamespace(prompt_tokens=self.used[0], completion_tokens=self.used[1]))
+
+class _Upstream(Exception):
+    status_code = 503
+
+class _SlowGate(LLMGate):
+    # toelating die precies het hele budget heeft opgegeten
+    def acquire(self, est_tokens, priority=PRIORITY_INTERACTIVE, timeout=None):
+        return super().acquire(est_tokens, priority) + timeout
+
+def test_queue_wait_that_spends_the_budget_is_shed_and_refunded():
+    g, client = _SlowGate(rpm=600, tpm=60000, burst=1), _Client()
+    tokens = g.tokens.tokens
+    with pytest.raises(Overloaded):
+        fetch_advice(client, "https://x.nl/p", {}, timeout=2.0, gate=g)
+    assert client.calls == []
+    assert g.requests.tokens == pytest.approx(1.0, abs=0.01)   # plek en tokens teruggegeven
+    assert g.tokens.tokens == pytest.approx(tokens, abs=20)
+
+def test_each_attempt_settles_its_own_estimate():
+    g, client = LLMGate(rpm=600, burst=5), _Client(fail=1)
+    g.tokens = TokenBucket(60, burst=5000)   # nauwelijks bijvullen tijdens de retry-pauze
+    before = g.tokens.tokens
+    fetch_advice(client, "https://x.nl/p", {}, timeout=5.0, gate=g)
+    assert len(client.calls) == 2 and all(t > 0 for t in client.calls)
+    est = estimate_tokens(build_messages("https://x.nl/p", {}))
+    # mislukte poging blijft op de schatting staan, de geslaagde op het werkelijke verbruik
+    assert g.tokens.tokens == pytest.approx(before - est - 400, abs=10)
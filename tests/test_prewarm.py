@@ -0,0 +1,36 @@
+# tests/test_prewarm.py — cache vooraf vullen, hervatten en load shedding
+import pytest
+
+from stylist import advice
+from stylist.cache import open_cache
+from stylist.canon import canonicalize_url
+from stylist.prewarm import prewarm
+from stylist.resilience import Overloaded
+
+URLS = [canonicalize_url(f"https://www.zalando.nl/heren-chino-{i}.html") for i in range(6)]
+
+@pytest.fixture
+def upstream(monkeypatch):
+    # fetch_advice vervangen: URLs in `shed` worden door de gate geweigerd, de rest slaagt
+    state = {"shed": set(), "calls": []}
+    def fake(client, link, profile, meta=None, **kw):
+        state["calls"].append(link)
+        if link in state["shed"]:
+            raise Overloaded("vol")
+        meta["usage"] = {"prompt_tokens": 100, "completion_tokens": 50}
+        return {"headline": "X", "personal_advice": {"for_you": ["a"]}}
+    monkeypatch.setattr(advice, "fetch_advice", fake)
+    return state
+
+def test_shed_jobs_count_as_remaining_and_are_retried(upstream):
+    cache = open_cache("memory://")
+    upstream["shed"] = set(URLS[:2])
+    first = prewarm(None, URLS, [{}], cache, rpm=6000, tpm=1e7).as_dict()
+    assert (first["warmed"], first["shed"], first["failed"]) == (4, 2, 0)
+    assert first["remaining"] == 2 and first["not_started"] == 0
+    assert first["total_tokens"] == 4 * 150
+
+    upstream["shed"], upstream["calls"] = set(), []
+    second = prewarm(None, URLS, [{}], cache, rpm=6000, tpm=1e7).as_dict()
+    assert sorted(upstream["calls"]) == sorted(URLS[:2])   # alleen de geweigerde opnieuw
+    assert (second["warmed"], second["already_cached"], second["remaining"]) == (2, 4, 0)
@@ -0,0 +1,43 @@
+# tests/test_profiles.py — profiel-bucketing voor gedeelde cache-keys
+import pytest
+
+from stylist.advice import _profile_hash
+from stylist.profiles import FREE_TEXT_FIELDS, BucketConfig, KeyStats, _hash, bucket_profile
+
+PROFILES = [
+    {"lengte_cm": "181", "maat_boven": "medium", "maat_beneden": "W32 L34", "kleuren": "Donkerblauw, zwart en wit",
+     "fit": " Slim ", "notities": "  Liever   GEEN wol "},
+    {"lengte_cm": "183 cm", "maat_boven": "M", "maat_beneden": "32/34", "kleuren": "wit / navy / black",
+     "fit": "Slim", "notities": "liever geen wol"},
+    {"lengte_cm": "", "maat_boven": "xl", "maat_beneden": "", "kleuren": "", "fit": "", "notities": ""},
+    {"lengte_cm": 250, "maat_boven": None},
+    {},
+]
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_bucketing_is_idempotent(profile):
+    once = bucket_profile(profile)
+    assert bucket_profile(once) == once
+    assert set(once) == set(profile)   # geen velden erbij
+
+def test_similar_profiles_collapse_to_one_key():
+    a, b = (bucket_profile(p) for p in PROFILES[:2])
+    assert a == b == {"lengte_cm": "180-184", "maat_boven": "M", "maat_beneden": "32/34",
+                      "kleuren": "navy, wit, zwart", "fit": "Slim", "notities": "liever geen wol"}
+    assert _profile_hash(PROFILES[0]) == _profile_hash(PROFILES[1])
+    assert _profile_hash(PROFILES[0]) != _profile_hash({**PROFILES[0], "lengte_cm": "186"})
+
+def test_out_of_range_height_is_dropped():
+    assert bucket_profile({"lengte_cm": "250"})["lengte_cm"] == ""
+    assert bucket_profile({"lengte_cm": "181"}, BucketConfig(height_step=0))["lengte_cm"] == "181"
+
+def test_drop_fields_and_disabled():
+    cfg = BucketConfig(drop_fields=FREE_TEXT_FIELDS)
+    assert bucket_profile(PROFILES[0], cfg)["notities"] == ""
+    assert bucket_profile(PROFILES[0], BucketConfig(enabled=False))["lengte_cm"] == "181"
+
+def test_key_stats_measure_the_reduction():
+    stats = KeyStats()
+    for p in PROFILES[:2]:
+        stats.observe(_hash(p), _hash(bucket_profile(p)))
+    assert stats.as_dict() == {"keys_raw": 2, "keys_bucketed": 1, "reduction": 0.5}
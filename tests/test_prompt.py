@@ -0,0 +1,35 @@
+# tests/test_prompt.py — prompt-template en lokale token-schatting
+import pytest
+
+from stylist import cache, prompt
+from stylist.prompt import SYSTEM_PROMPT, compact_profile, count_tokens, prompt_tokens, render
+
+def test_system_prefix_is_identical_between_calls():
+    a = render("https://x.nl/a", "chino", {"fit": "Slim"})
+    b = render("https://y.nl/b", "jurk", {})
+    assert a[0] == b[0] == {"role": "system", "content": SYSTEM_PROMPT}
+    assert '"personal_advice"' in SYSTEM_PROMPT
+
+def test_user_message_has_only_filled_profile_fields():
+    msg = render("https://x.nl/a", "chino navy", {"fit": " Slim ", "colors": "", "build": None})[1]
+    assert msg == {"role": "user", "content": "URL: https://x.nl/a\nKeywords: chino navy\nProfiel: fit=Slim"}
+    assert "Profiel" not in render("https://x.nl/a", "chino", {})[1]["content"]
+
+def test_compact_profile():
+    assert compact_profile({"fit": "Slim", "occasion": "werk", "x": 3}) == "fit=Slim;occasion=werk"
+    assert compact_profile(None) == ""
+
+@pytest.mark.parametrize("text, n", [("", 0), ("chino", 2), ("123456", 2), ("a, b!", 4), ("slim-fit", 3)])
+def test_count_tokens(text, n):
+    assert count_tokens(text) == n
+
+def test_prompt_tokens_adds_message_overhead():
+    messages = [{"role": "system", "content": "abcd"}, {"role": "user", "content": None}]
+    assert prompt_tokens(messages) == (1 + 4) + (0 + 4) + 2
+    full = render("https://x.nl/a", "chino", {"fit": "Slim"})
+    assert prompt_tokens(full) == prompt_tokens(full[:1]) + prompt_tokens(full[1:]) - 2
+
+def test_cache_key_follows_prompt_version(monkeypatch):
+    key = cache.cache_key("https://x.nl/a", "h")
+    monkeypatch.setattr(cache, "PROMPT_VERSION", prompt.PROMPT_VERSION + 1)
+    assert cache.cache_key("https://x.nl/a", "h") != key
@@ -0,0 +1,46 @@
+# tests/test_repair.py — tolerant parsen van model-output
+import json
+
+import pytest
+
+from stylist.repair import parse_advice, repair_json
+
+GOOD = {"headline": "Navy chino", "personal_advice": {"for_you": ["a", "b"], "avoid": ["c"],
+                                                      "colors": ["navy"], "combine": ["wit shirt"]}}
+
+def test_clean_json_passes_through():
+    assert repair_json(json.dumps(GOOD)) == (GOOD, "clean")
+
+def test_code_fence_and_trailing_commas():
+    text = '```json\n{"headline": "X", "personal_advice": {"for_you": ["a", "b",], "avoid": ["c"],},}\n```'
+    data, outcome = repair_json(text)
+    assert outcome == "repaired"
+    assert data["personal_advice"] == {"for_you": ["a", "b"], "avoid": ["c"]}
+
+def test_commas_inside_strings_are_kept():
+    data, _ = repair_json('{"headline": "a, ]", "personal_advice": {"for_you": ["x,}", "y",]}}')
+    assert data["headline"] == "a, ]" and data["personal_advice"]["for_you"] == ["x,}", "y"]
+
+def test_truncated_output_keeps_complete_values():
+    text = json.dumps(GOOD)[:-25]
+    data, outcome = repair_json(text)
+    assert outcome == "repaired"
+    assert data["headline"] == "Navy chino" and data["personal_advice"]["for_you"] == ["a", "b"]
+
+def test_sections_at_top_level_are_salvaged():
+    data, outcome = repair_json('{"for_you": "los advies", "colors": ["navy", 3, {"x": 1}]}')
+    assert outcome == "repaired"
+    assert data["personal_advice"] == {"for_you": ["los advies"], "colors": ["navy", 3]}
+
+@pytest.mark.parametrize("text", ["", "geen json", '{"foo": 1}', "[1, 2]", None])
+def test_nothing_usable_raises(text):
+    with pytest.raises(ValueError):
+        repair_json(text)
+
+def test_parse_advice_annotates_meta():
+    meta = {}
+    parse_advice('{"headline": "X", "personal_advice": {"avoid": ["c"],}}', meta)
+    assert meta == {"parse": "repaired", "salvaged": ["avoid"]}
+    with pytest.raises(ValueError):
+        parse_advice("kapot", meta)
+    assert meta["parse"] == "fallback"
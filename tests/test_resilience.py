@@ -0,0 +1,85 @@
+# tests/test_resilience.py — circuit breaker en call_with_retry
+import time
+
+import pytest
+
+from stylist.resilience import (BudgetExceeded, CircuitBreaker, CircuitOpenError, Overloaded, RetryPolicy,
+                                call_with_retry)
+
+class Upstream(Exception):
+    status_code = 503
+
+def _half_open(reset_after=0.01):
+    b = CircuitBreaker(failure_threshold=1, reset_after=reset_after)
+    b.failure()
+    time.sleep(reset_after * 2)
+    return b
+
+NO_WAIT = RetryPolicy(attempts=3, base_delay=0.0, max_delay=0.0)
+
+def test_opens_after_threshold_and_short_circuits():
+    b = CircuitBreaker(failure_threshold=2, reset_after=60)
+    b.failure()
+    assert b.allow()
+    b.failure()
+    assert b.state == "open" and not b.allow()
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(lambda left: "ok", 1.0, breaker=b)
+    assert b.stats()["short_circuits"] == 2
+
+def test_half_open_allows_one_probe():
+    b = _half_open()
+    assert b.allow()
+    assert b.state == "half_open" and not b.allow()
+    b.success()
+    assert b.state == "closed" and b.allow()
+
+def test_failed_probe_reopens():
+    b = _half_open()
+    with pytest.raises(Upstream):
+        call_with_retry(lambda left: (_ for _ in ()).throw(Upstream()), 1.0, policy=RetryPolicy(attempts=1), breaker=b)
+    assert b.state == "open" and not b.allow()
+
+def test_shed_probe_is_released():
+    # gate weigert de proefcall lokaal: de breaker mag daarna niet blijvend half_open vastzitten
+    b = _half_open()
+    def shed(left):
+        raise Overloaded("vol")
+    with pytest.raises(Overloaded):
+        call_with_retry(shed, 1.0, breaker=b)
+    assert call_with_retry(lambda left: "ok", 1.0, breaker=b) == "ok"
+    assert b.state == "closed"
+
+def test_spent_budget_releases_probe():
+    b = _half_open()
+    with pytest.raises(BudgetExceeded):
+        call_with_retry(lambda left: "ok", 0.0, breaker=b)
+    assert b.allow()
+
+def test_retries_retryable_then_succeeds():
+    b, calls = CircuitBreaker(failure_threshold=5), []
+    def flaky(left):
+        calls.append(left)
+        if len(calls) < 3:
+            raise Upstream()
+        return "ok"
+    assert call_with_retry(flaky, 5.0, policy=NO_WAIT, breaker=b) == "ok"
+    assert len(calls) == 3 and b.state == "closed" and b.failures == 0
+
+def test_non_retryable_is_not_retried_and_keeps_breaker_closed():
+    b, calls = CircuitBreaker(failure_threshold=1), []
+    def bad_request(left):
+        calls.append(1)
+        raise ValueError("400")
+    with pytest.raises(ValueError):
+        call_with_retry(bad_request, 5.0, policy=NO_WAIT, breaker=b)
+    assert len(calls) == 1 and b.state == "closed"
+
+def test_retry_if_can_veto():
+    calls = []
+    def fail(left):
+        calls.append(1)
+        raise Upstream()
+    with pytest.raises(Upstream):
+        call_with_retry(fail, 5.0, policy=NO_WAIT, breaker=CircuitBreaker(), retry_if=lambda e: False)
+    assert len(calls) == 1
@@ -0,0 +1,41 @@
+# tests/test_shops.py — zoek-templates per shop en de offline validator
+from urllib.parse import urlsplit
+
+import pytest
+
+from stylist.shops import SearchRegistry, fill, validate
+
+REG = SearchRegistry({"hm.com": "{origin}/{seg1}/search-results.html?q={q}",
+                      "zara.com": "{origin}/{seg1}/{seg2}/search?searchTerm={q}",
+                      "wehkamp.nl": "{origin}/zoeken/?term={q}"})
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://www2.hm.com/nl_nl/productpage.123.html", "https://www2.hm.com/nl_nl/search-results.html?q=wit%20overhemd"),
+    ("https://www.zara.com/nl/nl/chino-p123.html", "https://www.zara.com/nl/nl/search?searchTerm=wit%20overhemd"),
+    ("https://www.wehkamp.nl/heren-chino/", "https://www.wehkamp.nl/zoeken/?term=wit%20overhemd"),
+])
+def test_fill_uses_origin_segments_and_quoted_query(url, expected):
+    assert REG.search_url(url, "wit overhemd") == expected
+
+def test_too_few_segments_or_unknown_host_gives_none():
+    assert fill("{origin}/{seg1}/{seg2}/search?q={q}", urlsplit("https://www.zara.com/nl/p1.html"), "x") is None
+    assert REG.search_url("https://www.onbekend.nl/p/1", "x") is None
+    assert SearchRegistry({}, default="{origin}/s?q={q}").search_url("https://a.nl/p", "x y") == "https://a.nl/s?q=x%20y"
+
+def test_subdomains_fall_under_the_parent_template():
+    assert REG.template_for("nl.shop.hm.com") == REG.templates["hm.com"]
+
+def test_validate_against_fixtures(tmp_path):
+    (tmp_path / "hm.com.html").write_text(
+        '<script type="application/ld+json">{"potentialAction": {"@type": "SearchAction",'
+        ' "target": "https://www2.hm.com/nl_nl/search-results.html?q={search_term_string}"}}</script>')
+    (tmp_path / "zara.com.html").write_text(
+        '<form action="/nl/nl/zoeken" role="search"><input type="search" name="q"></form>')
+    (tmp_path / "wehkamp.nl.xml").write_text("<urlset><url><loc>https://www.wehkamp.nl/product/123?kleur=wit</loc></url></urlset>")
+    rows = {r["host"]: r for r in validate(str(tmp_path), REG)}
+    assert rows["hm.com"]["status"] == "ok"
+    assert rows["zara.com"]["status"] == "mismatch" and rows["zara.com"]["found"] == ["/nl/nl/zoeken?q="]
+    assert rows["wehkamp.nl"]["status"] == "no-evidence"   # productlinks in de sitemap tellen niet
+
+def test_validate_without_fixtures(tmp_path):
+    assert {r["status"] for r in validate(str(tmp_path), REG)} == {"no-fixture"}
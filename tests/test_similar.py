@@ -0,0 +1,67 @@
+# tests/test_similar.py — similarity-index: drempel, profiel-buckets, harde filters en persistentie
+import os, time
+
+from stylist.advice import _keywords_from_url, _profile_hash, get_advice, local_first_advice
+from stylist.cache import cache_key, open_cache
+from stylist.similar import SimilarityIndex
+
+HEREN = "https://shop.nl/heren-slim-fit-jeans-donkerblauw-123"
+ENGELS = "https://shop.nl/slim-fit-jeans-dark-blue-men-9"
+DAMES = "https://shop.nl/dames-slim-fit-jeans-donkerblauw-123"
+TRUI = "https://shop.nl/heren-wollen-trui-grijs-5"
+
+def _seeded(prof_hash, threshold=0.85):
+    cache, idx = open_cache("memory://"), SimilarityIndex(None, threshold=threshold)
+    data = local_first_advice(HEREN, {})
+    data.update(headline="Heren Slim Fit Jeans: snel advies", _cache_key=prof_hash)
+    cache.set(cache_key(HEREN, prof_hash), data)
+    idx.add(HEREN, prof_hash, _keywords_from_url(HEREN))
+    return cache, idx
+
+def lookup(idx, cache, link, prof_hash):
+    return idx.lookup(link, _keywords_from_url(link), prof_hash, cache, cache_key)
+
+def test_threshold():
+    h = _profile_hash({})
+    cache, idx = _seeded(h)
+    found = lookup(idx, cache, ENGELS, h)
+    assert found is not None and found[2] == HEREN and found[1] >= 0.85
+    assert lookup(idx, cache, TRUI, h) is None
+    cache, idx = _seeded(h, threshold=0.99)
+    assert lookup(idx, cache, ENGELS, h) is None
+    cache, idx = _seeded(h, threshold=0)
+    assert lookup(idx, cache, ENGELS, h) is None
+
+def test_profile_buckets_are_isolated():
+    h, other = _profile_hash({}), _profile_hash({"fit": "Relaxed"})
+    cache, idx = _seeded(h)
+    assert lookup(idx, cache, ENGELS, other) is None
+    assert idx.search([_keywords_from_url(ENGELS)], other) == [[]]
+
+def test_gender_is_a_hard_filter():
+    h = _profile_hash({})
+    cache, idx = _seeded(h)
+    score = idx.search([_keywords_from_url(DAMES)], h)[0][0][0]
+    assert score > 0.85 and lookup(idx, cache, DAMES, h) is None
+
+def test_reuse_gets_own_headline():
+    h = _profile_hash({})
+    cache, idx = _seeded(h)
+    meta = {}
+    data = get_advice(None, ENGELS, {}, cache=cache, meta=meta, similar=idx)
+    assert meta["cache"] == "similar" and data["headline"] == "Slim Fit Jeans Dark Blue Men"
+    assert cache.get(cache_key(HEREN, h))["headline"] == "Heren Slim Fit Jeans: snel advies"
+
+def test_autosave_in_background_and_reload(tmp_path):
+    path = str(tmp_path / "idx.npz")
+    idx = SimilarityIndex(path, autosave_every=5, max_entries=100)
+    for i in range(250):
+        idx.add(f"https://a.nl/heren-jeans-{i}", "h", f"heren jeans model {i}")
+    assert len(idx) <= 100 and len(idx._vecs) <= 100
+    deadline = time.monotonic() + 5
+    while idx._saver is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    idx.save()
+    again = SimilarityIndex(path, max_entries=100)
+    assert len(again) == len(idx) and os.path.exists(path)
+    assert again.search(["heren jeans model 249"], "h", k=1)[0][0][1] == "https://a.nl/heren-jeans-249"
@@ -0,0 +1,73 @@
+# tests/test_singleflight.py — gelijktijdige identieke aanvragen samenvoegen
+import threading
+
+import pytest
+
+from stylist.singleflight import SingleFlight
+
+def _concurrent(n, target):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads
+
+def test_one_leader_for_concurrent_callers():
+    sf, release, calls, results = SingleFlight(), threading.Event(), [], []
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return {"n": 1}
+    threads = _concurrent(8, lambda: results.append(sf.do("k", fn, timeout=2)))
+    while sf.stats()["deduplicated"] < 7:
+        pass
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and results == [{"n": 1}] * 8
+    assert sf.stats() == {"leaders": 1, "deduplicated": 7, "timeouts": 0, "in_flight": 0}
+
+def test_followers_get_a_copy():
+    sf, release, results = SingleFlight(), threading.Event(), []
+    def fn():
+        release.wait(2)
+        return {"tags": []}
+    threads = _concurrent(2, lambda: results.append(sf.do("k", fn, timeout=2)))
+    while sf.stats()["deduplicated"] < 1:
+        pass
+    release.set()
+    for t in threads:
+        t.join()
+    results[0]["tags"].append("x")
+    assert results[1]["tags"] == []
+
+def test_error_reaches_all_callers_and_key_is_freed():
+    sf, release, errors = SingleFlight(), threading.Event(), []
+    def fn():
+        release.wait(2)
+        raise RuntimeError("upstream")
+    def call():
+        try:
+            sf.do("k", fn, timeout=2)
+        except RuntimeError as e:
+            errors.append(e)
+    threads = _concurrent(3, call)
+    while sf.stats()["deduplicated"] < 2:
+        pass
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(errors) == 3
+    assert sf.do("k", lambda: "weer", timeout=1) == "weer"
+
+def test_follower_timeout_uses_on_timeout():
+    sf, release = SingleFlight(), threading.Event()
+    leader = threading.Thread(target=lambda: sf.do("k", lambda: release.wait(2)))
+    leader.start()
+    while sf.stats()["in_flight"] < 1:
+        pass
+    assert sf.do("k", lambda: "nooit", timeout=0.01, on_timeout=lambda: "fallback") == "fallback"
+    with pytest.raises(TimeoutError):
+        sf.do("k", lambda: "nooit", timeout=0.01)
+    release.set()
+    leader.join()
+    assert sf.stats()["timeouts"] == 2
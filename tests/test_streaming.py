@@ -0,0 +1,52 @@
+# tests/test_streaming.py — incrementeel JSON parsen tijdens het streamen
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from stylist.streaming import PartialJSON, stream_json
+
+FULL = {"headline": "Navy \"slim\" chino", "personal_advice": {"for_you": ["a, b", "c]"], "avoid": ["d"]}}
+
+def _fed(text):
+    p = PartialJSON()
+    p.feed(text)
+    return p.snapshot()
+
+@pytest.mark.parametrize("prefix, expected", [
+    ('{"a": ["x", "y', {"a": ["x"]}),
+    ('{"headline": "X", "personal', {"headline": "X"}),
+    ('{"headline": "X", "personal_advice": {"for_you": [', {"headline": "X"}),
+    ('{"head', None),
+    ('', None),
+])
+def test_prefix_is_closed_after_last_complete_value(prefix, expected):
+    assert _fed(prefix) == expected
+
+def test_char_by_char_snapshots_grow_to_the_full_object():
+    text, p, seen = json.dumps(FULL), PartialJSON(), []
+    for ch in text:
+        if p.feed(ch):
+            seen.append(p.snapshot())
+    assert seen[-1] == FULL and p.text == text
+    assert [len(json.dumps(s)) for s in seen] == sorted(len(json.dumps(s)) for s in seen)
+    assert {"headline": FULL["headline"]} in seen   # escaped quote sluit de string niet af
+
+def test_feed_reports_only_new_values():
+    p = PartialJSON()
+    assert p.feed('{"headline": "X"') is True
+    assert p.feed(', "person') is False
+    assert p.feed("") is False
+
+def _chunk(content=None, usage=None):
+    choices = [] if content is None else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+def test_stream_json_calls_on_update_and_collects_usage():
+    text = json.dumps(FULL)
+    chunks = [_chunk(text[i:i + 7]) for i in range(0, len(text), 7)]
+    chunks.append(_chunk(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=40)))
+    updates, meta = [], {}
+    assert stream_json(iter(chunks), updates.append, meta=meta) == text
+    assert updates and updates[-1] == FULL
+    assert meta["usage"] == {"prompt_tokens": 120, "completion_tokens": 40}